@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import sweep
+
+SWEEP_RESPONSES = ['shear_ratio', 'period_ratio']
+
+
+# %% ADAPTIVE SAMPLING OF A TWO-PARAMETER RESPONSE SURFACE
+# the coarse grid x_range by y_range is evaluated first, then, level by level, every cell whose center differs
+# from the mean of its corners by more than tol (curvature), or whose responses vary by more than grad_tol across
+# it (gradient), is split in four, so flat regions keep the coarse grid and only the tuning region is refined
+# a level evaluates its new points in two batches, the cell centers and then the edge midpoints of the split cells,
+# so an evaluate that runs points in parallel always gets full batches
+
+def key(x, y):
+    # midpoints of neighbouring cells are computed from the same corners, rounding only guards the float keys
+    return round(float(x), 10), round(float(y), 10)
+
+
+def sample(evaluate, x_range, y_range, tol, grad_tol=None, max_level=3, max_points=None, names=('x', 'y'),
+           responses=None):
+    # evaluate(xy) takes a list of (x, y) points and returns one row of responses per point, with any backend
+    # tol and grad_tol are scalars or one value per response, max_points caps the number of evaluated points
+    # returns one row per evaluated point with its responses and the level it was added at
+
+    values = {}
+    levels = {}
+
+    def run(xy, level):
+        xy = [point for point in dict.fromkeys(xy) if point not in values]
+        if max_points is not None:
+            xy = xy[:max(max_points - len(values), 0)]
+
+        if xy:
+            rows = np.asarray(evaluate(xy), dtype=float).reshape(len(xy), -1)
+            for point, row in zip(xy, rows):
+                values[point] = row
+                levels[point] = level
+
+    x_range = sorted(set(float(x) for x in x_range))
+    y_range = sorted(set(float(y) for y in y_range))
+
+    run([key(x, y) for x in x_range for y in y_range], 0)
+
+    cells = [(x_range[i], x_range[i + 1], y_range[j], y_range[j + 1])
+             for i in range(len(x_range) - 1) for j in range(len(y_range) - 1)]
+
+    for level in range(1, max_level + 1):
+        run([key((x0 + x1) / 2, (y0 + y1) / 2) for x0, x1, y0, y1 in cells], level)
+
+        split = []
+        for x0, x1, y0, y1 in cells:
+            points = [key(x0, y0), key(x1, y0), key(x0, y1), key(x1, y1), key((x0 + x1) / 2, (y0 + y1) / 2)]
+
+            # cells left out by max_points are not refined
+            if any(point not in values for point in points):
+                continue
+
+            corners = np.array([values[point] for point in points[:4]])
+            center = values[points[4]]
+
+            curvature = np.abs(center - corners.mean(axis=0))
+            gradient = np.ptp(np.vstack([corners, center]), axis=0)
+
+            if (curvature > tol).any() or (grad_tol is not None and (gradient > grad_tol).any()):
+                split.append((x0, x1, y0, y1))
+
+        if not split:
+            break
+
+        run([point for x0, x1, y0, y1 in split for point in
+             [key((x0 + x1) / 2, y0), key((x0 + x1) / 2, y1), key(x0, (y0 + y1) / 2), key(x1, (y0 + y1) / 2)]],
+            level)
+
+        cells = [cell for x0, x1, y0, y1 in split for cell in
+                 [(x0, (x0 + x1) / 2, y0, (y0 + y1) / 2), ((x0 + x1) / 2, x1, y0, (y0 + y1) / 2),
+                  (x0, (x0 + x1) / 2, (y0 + y1) / 2, y1), ((x0 + x1) / 2, x1, (y0 + y1) / 2, y1)]]
+
+    points = sorted(values)
+    n_responses = len(values[points[0]]) if points else 0
+    responses = list(responses) if responses is not None else ['response_{}'.format(i) for i in range(n_responses)]
+
+    samples_df = pd.DataFrame(np.array([values[point] for point in points]).reshape(len(points), n_responses),
+                              columns=responses)
+    samples_df.insert(0, names[0], [point[0] for point in points])
+    samples_df.insert(1, names[1], [point[1] for point in points])
+    samples_df['level'] = [levels[point] for point in points]
+
+    return samples_df
+
+
+# %% COUPLED-FRAME SWEEPS
+
+def sweep_evaluator(run, m1, w2, run_flags=(1, 2)):
+    # evaluate function over (n12, kp1) for sample, run(points) analyzes a list of sweep.sweep_points points with
+    # any backend (a serial loop, sweep.run_parallel, the simulator) and returns an out_df holding them
+    # responses are SWEEP_RESPONSES, the peak base reaction of frame 1 and the analyzed first period of the coupled
+    # model over those of frame 1 alone, so run_flags must hold the single (1) and coupled (2) runs, in any order
+
+    if sorted(run_flags) != [1, 2]:
+        raise ValueError('run_flags {} must run frame 1 alone (1) and the coupled frames (2)'.format(run_flags))
+
+    def evaluate(xy):
+        groups = [sweep.sweep_points([n12], [kp1], run_flags, m1, w2) for n12, kp1 in xy]
+        out_df = run([point for group in groups for point in group])
+
+        # file names of the single and coupled runs of every (n12, kp1), by flag
+        pairs = [dict((flag, file_name) for file_name, k1, kp, flag in group) for group in groups]
+
+        return [[out_df.loc[pair[2], 'max_u1_frm1'] / out_df.loc[pair[1], 'max_u1_frm1'],
+                 out_df.loc[pair[2], 'sap_T'] / out_df.loc[pair[1], 'sap_T']] for pair in pairs]
+
+    return evaluate
@@ -0,0 +1,257 @@
+import sys
+import inspect
+import tempfile
+import functools
+import numpy as np
+import pandas as pd
+import sap2000
+import sweep
+import results
+import simulator
+import instrument
+from modelclasses import Model
+
+DLL_PATH = r'C:\Program Files\Computers and Structures\SAP2000 25\SAP2000v1.dll'
+
+# columns of benchmark, indexed by OAPI path
+OUT_COLUMNS = ['backend', 'count', 'mean_us', 'max_us', 'total_s']
+
+
+# %% OAPI THROUGH PYTHONNET
+# Model, results, and the rest of the package call the OAPI the way comtypes exposes it: sub-objects are plain
+# attributes, enums are ints, and methods with ByRef arguments return [outputs..., ret]
+# the .NET assembly loaded with pythonnet (test1_NET.py) needs every sub-object cast to its interface, every enum
+# argument built from its type, and returns (ret, outputs...) with outputs as .NET arrays, so NetObject wraps the
+# cOAPI object and answers in the comtypes layout, double and int arrays are copied into numpy arrays in one block
+# instead of element by element, which is where .NET gains on COM variant arrays for large result sets
+# the interface of every sub-object and the parameters of every method are read once by reflection and kept on
+# the wrapper, like instrument.Proxy keeps them
+
+NET = {}
+
+
+def load_net(dll_path=DLL_PATH):
+    # pythonnet is only available with the .NET runtime, import it here so the rest of the package loads anywhere
+    if 'module' not in NET:
+        import clr
+        clr.AddReference('System.Runtime.InteropServices')
+        clr.AddReference(dll_path)
+
+        import System
+        import SAP2000v1
+        from System.Runtime.InteropServices import Marshal
+
+        NET.update(clr=clr, System=System, module=SAP2000v1, Marshal=Marshal)
+
+    return NET
+
+
+def to_python(value):
+    System = NET['System']
+
+    if not isinstance(value, System.Object):
+        return value
+
+    net_type = value.GetType()
+
+    if net_type.IsEnum:
+        return System.Convert.ToInt32(value)
+
+    if net_type.IsArray:
+        element_type = net_type.GetElementType().FullName
+
+        if element_type in ('System.Double', 'System.Int32'):
+            array = np.empty(value.Length, dtype=float if element_type == 'System.Double' else np.int32)
+            if value.Length:
+                NET['Marshal'].Copy(value, 0, System.IntPtr.__overloads__[System.Int64](array.ctypes.data),
+                                    value.Length)
+            return array
+
+        return tuple(to_python(item) for item in value)
+
+    return value
+
+
+class NetObject:
+
+    def __init__(self, target, interface):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_type', NET['clr'].GetClrType(interface))
+
+    def __getattr__(self, name):
+        prop = self._type.GetProperty(name)
+
+        if prop is not None:
+            value = getattr(self._target, name)
+            interface = getattr(NET['module'], prop.PropertyType.Name, None)
+
+            # sub-objects, e.g. SapModel.FrameObj, are cast to their interface and kept, values are read every time
+            if not prop.PropertyType.IsInterface or interface is None:
+                return to_python(value)
+
+            child = NetObject(interface(value), interface)
+
+        else:
+            child = net_method(getattr(self._target, name),
+                               [method for method in self._type.GetMethods() if method.Name == name])
+
+        object.__setattr__(self, name, child)
+        return child
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+def net_method(method, overloads):
+
+    def call(*args):
+        # the overload taking this many arguments, optional ones left out are given their default
+        for overload in overloads:
+            parameters = overload.GetParameters()
+            if len([parameter for parameter in parameters if not parameter.IsOptional]) <= len(args) <= \
+                    len(parameters):
+                break
+        else:
+            raise TypeError('No overload of {} takes {} arguments'.format(overloads[0].Name, len(args)))
+
+        args = list(args) + [parameter.DefaultValue for parameter in parameters[len(args):]]
+
+        for i, parameter in enumerate(parameters):
+            parameter_type = parameter.ParameterType
+            if parameter_type.IsByRef:
+                parameter_type = parameter_type.GetElementType()
+            if parameter_type.IsEnum and not isinstance(args[i], NET['System'].Enum):
+                args[i] = getattr(NET['module'], parameter_type.Name)(int(args[i]))
+
+        res = method(*args)
+
+        if isinstance(res, tuple):
+            return [to_python(value) for value in res[1:]] + [res[0]]
+
+        return to_python(res)
+
+    return call
+
+
+def attach_net(attach_to_instance=False, program_path=None, dll_path=DLL_PATH):
+    # cOAPI object of a new SAP2000 instance, of the latest installed version unless program_path is given, or of
+    # the running instance with attach_to_instance=True
+    net = load_net(dll_path)
+    module = net['module']
+
+    helper = module.cHelper(module.Helper())
+
+    if attach_to_instance:
+        try:
+            my_sap_object = helper.GetObject('CSI.SAP2000.API.SapObject')
+
+        except net['System'].Exception as error:
+            raise RuntimeError('No running instance of the program found or failed to attach.') from error
+
+    else:
+        try:
+            if program_path is not None:
+                my_sap_object = helper.CreateObject(program_path)
+            else:
+                my_sap_object = helper.CreateObjectProgID('CSI.SAP2000.API.SapObject')
+
+        except net['System'].Exception as error:
+            raise RuntimeError('Cannot start a new instance of the program.') from error
+
+        print('SAP2000 is now running')
+
+    return NetObject(module.cOAPI(my_sap_object), module.cOAPI)
+
+
+def open_pythonnet(visible=False, attach_to_instance=False, program_path=None, dll_path=DLL_PATH):
+    sap_object = attach_net(attach_to_instance, program_path, dll_path)
+    return sap_object, sap2000.opensap2000(sap_object, visible=visible)
+
+
+# %% BACKENDS SELECTABLE AT RUNTIME
+# every backend opens an instance as (sap_object, sap_model), with sap_model answering in the comtypes layout, and
+# closes it from sap_object, so Model, results, sweep.run_parallel, and suite.run_suite run on any of them
+# 'comtypes' is COM through sap2000.attachtoapi, 'pythonnet' the .NET assembly, and 'simulator' the native solver,
+# which needs no SAP2000 at all
+
+BACKENDS = {
+    'comtypes': (sweep.open_instance, sweep.close_instance),
+    'pythonnet': (open_pythonnet, sweep.close_instance),
+    'simulator': (simulator.open_instance, simulator.close_instance),
+}
+
+
+def open_function(backend, **options):
+    # open function of backend for sweep.run_parallel and suite.run_suite, options the backend does not take (e.g.
+    # binding_version for pythonnet) are left out so one set of options works with every backend
+    function = BACKENDS[backend][0]
+    parameters = inspect.signature(function).parameters
+    return functools.partial(function, **dict((name, value) for name, value in options.items()
+                                              if name in parameters))
+
+
+def close_function(backend):
+    return BACKENDS[backend][1]
+
+
+# %% PER-CALL LATENCY OF EVERY BACKEND
+# one coupled-frame point is built, analyzed, and extracted on each backend, then the calls a sweep repeats most
+# (units, geometry queries, group results) are each made n more times, every call is timed with instrument.Recorder
+# and the mean and largest latency of each OAPI path is reported per backend
+
+def benchmark(backend='simulator', n=100, model_path=None, **options):
+    model_path = tempfile.mkdtemp() if model_path is None else model_path
+
+    sap_object, sap_model = open_function(backend, **options)()
+    recorder = instrument.Recorder()
+    model_obj = Model(instrument.wrap(sap_model, recorder=recorder))
+
+    try:
+        model_obj.new()
+        # incremental keeps the model after its analysis so the repeated calls query it
+        sweep.run_point(model_obj, model_path, *sweep.sweep_point(50000.0, 25000.0, 2), incremental=True)
+
+        sap_obj = model_obj.sap_obj
+        frame_name = model_obj.geometry.frm_df['user_name'].iloc[0]
+        units = sap2000.UNITS['kip_ft_F']
+
+        with recorder.point('repeated'):
+            for i in range(n):
+                sap_obj.GetPresentUnits()
+                sap_obj.SetPresentUnits(units)
+                sap_obj.FrameObj.GetPoints(frame_name, '', '')
+                results.fetch(sap_obj, 'JointReact', 'BASE')
+
+    finally:
+        BACKENDS[backend][1](sap_object)
+
+    bench_df = pd.DataFrame.from_dict(dict((path, stats.report()) for path, stats in recorder.totals().items()),
+                                      orient='index')[OUT_COLUMNS[1:]]
+    bench_df.index.name = 'path'
+    bench_df.insert(0, 'backend', backend)
+
+    return bench_df.sort_values('total_s', ascending=False)
+
+
+def compare(backends=('comtypes', 'pythonnet', 'simulator'), n=100, model_path=None, **options):
+    # benchmark of every backend that can be opened on this machine, the mean latency of each path side by side
+    # a backend that cannot be imported or started (no pythonnet, no SAP2000) is skipped, with none left an empty
+    # benchmark table is returned
+    bench_dfs = []
+    for backend in backends:
+        try:
+            bench_dfs.append(benchmark(backend, n, model_path, **options))
+        except (ImportError, OSError, RuntimeError) as error:
+            print('Skipped {}: {}'.format(backend, error))
+
+    if not bench_dfs:
+        return pd.DataFrame(columns=OUT_COLUMNS, index=pd.Index([], name='path'))
+
+    bench_df = pd.concat(bench_dfs)
+    return bench_df.reset_index().pivot_table(index='path', columns='backend', values='mean_us')
+
+
+if __name__ == '__main__':
+    # python backends.py [backend ...], e.g. python backends.py comtypes pythonnet
+    with pd.option_context('display.width', 120, 'display.max_rows', None):
+        print(compare(sys.argv[1:] or ('comtypes', 'pythonnet', 'simulator')).round(1))
@@ -0,0 +1,74 @@
+import os
+import sys
+import glob
+import instrument
+
+SUPPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'support')
+
+TYPE_LIBRARIES = ['SAP2000v1.tlb', 'CSiAPIv1.tlb']
+
+
+# %% PRE-GENERATED EARLY-BOUND OAPI BINDINGS
+# comtypes turns a type library into python wrapper modules (comtypes.gen.SAP2000v1 and its _<guid> module) whose
+# interface pointers call the vtable directly, but it writes them the first time a process needs them, and every
+# worker whose comtypes cache is missing or not writable generates them again
+# generate() writes the wrappers of the type libraries shipped in support/SAP2000_<version> once, into
+# support/bindings/<version>, and use() puts that directory first on comtypes.gen so they are imported as they are,
+# pinned to the version they were generated from
+
+def versions():
+    # SAP2000 versions whose type libraries are shipped in support, oldest first
+    names = [os.path.basename(path)[len('SAP2000_'):] for path in glob.glob(os.path.join(SUPPORT, 'SAP2000_*'))]
+    return sorted(names, key=lambda version: [int(part) for part in version.split('.')])
+
+
+def type_libraries(version):
+    paths = [os.path.join(SUPPORT, 'SAP2000_' + version, name) for name in TYPE_LIBRARIES]
+    return [path for path in paths if os.path.exists(path)]
+
+
+def gen_path(version):
+    return os.path.join(SUPPORT, 'bindings', version)
+
+
+def use(version):
+    # import the comtypes wrappers generated for version instead of the per-user comtypes cache
+    import comtypes.client
+    import comtypes.gen
+
+    path = gen_path(version)
+    if not os.path.isdir(path):
+        raise FileNotFoundError('No bindings for SAP2000 {}, run python bindings.py {}'.format(version, version))
+
+    if path in comtypes.gen.__path__:
+        comtypes.gen.__path__.remove(path)
+    comtypes.gen.__path__.insert(0, path)
+
+    # modules comtypes still has to generate, e.g. of other type libraries, are written next to them
+    comtypes.client.gen_dir = path
+
+
+def generate(version=None):
+    # write the wrappers of every shipped type library of version, the newest one when None, returns the modules
+    import comtypes.client
+
+    version = versions()[-1] if version is None else version
+
+    os.makedirs(gen_path(version), exist_ok=True)
+    use(version)
+
+    return [comtypes.client.GetModule(file_name) for file_name in type_libraries(version)]
+
+
+# %% CACHED INTERFACE POINTERS
+# every sap_model.FrameObj.AddByCoord call gets the FrameObj interface and the AddByCoord method again, the
+# cached sap_model keeps both after the first call so model-building loops make one vtable call per OAPI call
+
+def cached(sap_model):
+    return instrument.Proxy(sap_model, None)
+
+
+if __name__ == '__main__':
+    # python bindings.py [version], e.g. python bindings.py 25.0.0
+    for module in generate(*sys.argv[1:2]):
+        print('Generated {}'.format(module.__name__))
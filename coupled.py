@@ -0,0 +1,121 @@
+import numpy as np
+import native
+
+# %% CLOSED-FORM TWO DEGREE OF FREEDOM COUPLED FRAMES
+# every function broadcasts over arrays of any shape, the trailing axis of the outputs runs over the two modes
+
+
+def eigen(m1, m2, k1, k2, kp):
+    # frequencies, periods, and mass-normalized mode shapes of two single-story frames joined by a spring kp
+
+    m1, m2, k1, k2, kp = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in (m1, m2, k1, k2, kp)])
+
+    # symmetric form of M^-1/2 K M^-1/2 = [[a, b], [b, d]]
+    a = (k1 + kp) / m1
+    d = (k2 + kp) / m2
+    b = -kp / np.sqrt(m1 * m2)
+
+    # the larger eigenvalue has no cancellation, the smaller one follows from the determinant instead of the
+    # difference of nearly equal terms
+    mean = (a + d) / 2
+    radius = np.hypot((a - d) / 2, b)
+    w2_high = mean + radius
+    w2_low = (a * d - b ** 2) / w2_high
+
+    # eigenvectors from the rotation angle stay well defined when the two frames are tuned to each other
+    theta = np.arctan2(2 * b, a - d) / 2
+    cos, sin = np.cos(theta), np.sin(theta)
+
+    shapes = np.empty(a.shape + (2, 2))
+    shapes[..., 0, 0], shapes[..., 1, 0] = -sin / np.sqrt(m1), cos / np.sqrt(m2)
+    shapes[..., 0, 1], shapes[..., 1, 1] = cos / np.sqrt(m1), sin / np.sqrt(m2)
+
+    # make the largest component of each mode positive
+    largest = np.take_along_axis(shapes, np.abs(shapes).argmax(axis=-2)[..., np.newaxis, :], axis=-2)
+    shapes *= np.where(largest < 0, -1, 1)
+
+    omega = np.sqrt(np.stack([w2_low, w2_high], axis=-1))
+
+    return omega, 2 * np.pi / omega, shapes
+
+
+def grid(n12_range, kp1_range, m1, m2, k2):
+    # stiffness grids for the n12 = w1 / w2 and kp1 = kp / k1 sweep of main.py, with n12 along the first axis
+
+    n12, kp1 = np.meshgrid(np.asarray(n12_range, dtype=float), np.asarray(kp1_range, dtype=float), indexing='ij')
+
+    k1 = m1 * (n12 * np.sqrt(k2 / m2)) ** 2
+
+    return k1, k1 * kp1
+
+
+def system(m1, m2, k1, k2, kp, damping=0, cp=0):
+    # lumped mass, stiffness, and damping matrices of the coupled pair, damping is a modal damping ratio and cp a
+    # linear damper in parallel with the coupling spring
+
+    m1, m2, k1, k2, kp, cp = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in (m1, m2, k1, k2, kp, cp)])
+
+    m = np.stack([m1, m2], axis=-1)
+    k = np.empty(m1.shape + (2, 2))
+    k[..., 0, 0], k[..., 0, 1], k[..., 1, 0], k[..., 1, 1] = k1 + kp, -kp, -kp, k2 + kp
+
+    omega, period, shapes = eigen(m1, m2, k1, k2, kp)
+    c = native.modal_damping(m, shapes, omega, np.asarray(damping, dtype=float)[..., np.newaxis])
+    c[..., 0, 0] += cp
+    c[..., 1, 1] += cp
+    c[..., 0, 1] -= cp
+    c[..., 1, 0] -= cp
+
+    return m, k, c
+
+
+def time_history(m1, m2, k1, k2, kp, ag, dt=0.005, damping=0, cp=0, history=False, method='newmark'):
+    # batched linear response of coupled pairs to ground accelerations ag (..., n_steps + 1) in consistent units
+    # returns peak displacements and base shears of each frame and the peak link force, plus the displacement,
+    # velocity, and acceleration histories when history is True
+    # method='state_space' propagates the response exactly between samples (native.state_space), so a coarse dt
+    # only loses the peaks between samples instead of adding the period error of newmark
+
+    m, k, c = system(m1, m2, k1, k2, kp, damping, cp)
+
+    k1, k2, kp, cp = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in (k1, k2, kp, cp)])
+    zero = np.zeros(k1.shape)
+
+    base_shear = np.stack([np.stack([k1, zero, zero, zero], axis=-1),
+                           np.stack([zero, k2, zero, zero], axis=-1)], axis=-2)
+    link_force = np.stack([kp, -kp, cp, -cp], axis=-1)[..., np.newaxis, :]
+
+    integrate = {'newmark': native.newmark, 'state_space': native.state_space}[method]
+    res = integrate(m, k, c, ag, dt, outputs={'base_shear': base_shear, 'link_force': link_force}, history=history)
+    res['link_force'] = res['link_force'][..., 0]
+
+    return res
+
+
+def damper_time_history(m1, m2, k1, k2, kp, cd, alpha, ag, dt=0.005, damping=0, history=False, tol=1e-10,
+                        max_iter=50):
+    # batched response of coupled pairs joined by a spring kp in parallel with a fluid viscous damper
+    # f = cd |v1 - v2|^alpha sign(v1 - v2), to ground accelerations ag (..., n_steps + 1) in consistent units
+    # every argument broadcasts, e.g. cd[:, None, None] and alpha[None, :, None] against records ag[None, None]
+    # sweep a (cd, alpha) grid over every record in one integration
+    # returns the peaks of time_history, with the link force the spring plus damper force, and the peak damper
+    # force alone
+
+    m, k, c = system(m1, m2, k1, k2, kp, damping)
+
+    k1, k2, kp = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in (k1, k2, kp)])
+    zero = np.zeros(k1.shape)
+
+    # outputs act on [u1, u2, v1, v2, f], the link force kp (u1 - u2) + f has the sign of time_history's
+    base_shear = np.stack([np.stack([k1, zero, zero, zero, zero], axis=-1),
+                           np.stack([zero, k2, zero, zero, zero], axis=-1)], axis=-2)
+    link_force = np.stack([kp, -kp, zero, zero, zero + 1], axis=-1)[..., np.newaxis, :]
+
+    res = native.newmark_dampers(m, k, c, ag, dt, [[1., -1.]], np.asarray(cd, dtype=float)[..., np.newaxis],
+                                 np.asarray(alpha, dtype=float)[..., np.newaxis],
+                                 outputs={'base_shear': base_shear, 'link_force': link_force}, history=history,
+                                 tol=tol, max_iter=max_iter)
+    res['link_force'] = res['link_force'][..., 0]
+    res['damper_force'] = res['damper_force'][..., 0]
+
+    return res
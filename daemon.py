@@ -0,0 +1,407 @@
+import os
+import sys
+import time
+import queue
+import secrets
+import collections
+import tempfile
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+import pandas as pd
+import sweep
+import suite
+import backends
+import resultcache
+
+# a named pipe on Windows and a unix socket elsewhere, multiprocessing.connection picks the family from the address
+ADDRESS = r'\\.\pipe\sap2000-daemon' if sys.platform == 'win32' else os.path.join(tempfile.gettempdir(),
+                                                                                    'sap2000-daemon.sock')
+
+KEY_FILE = os.path.join(os.path.expanduser('~'), '.sap2000-daemon.key')
+
+
+def authkey(key_file=KEY_FILE, wait=1.0):
+    # messages are pickled, so only clients holding the key written here, readable by this user only, are accepted
+    # when daemons or clients start together only one creates the file, the others read its key once written
+    for _ in range(int(wait / 0.01) + 1):
+        try:
+            with open(key_file, 'rb') as f:
+                key = f.read()
+            if key:
+                return key
+
+        except FileNotFoundError:
+            key = secrets.token_hex(32).encode()
+            try:
+                with os.fdopen(os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+                    f.write(key)
+                return key
+            except FileExistsError:
+                pass
+
+        time.sleep(0.01)
+
+    raise RuntimeError('The key file {} is empty'.format(key_file))
+
+
+# %% JOBS
+# a job is a list of tasks of one kind run on the warm instances, each task holds the arguments of the run function
+# of its kind after model_obj and model_path, i.e. a sweep point for 'sweep' and a suite.suite_points task for
+# 'suite', and every task is answered with ('done', row) or ('failed', error)
+
+JOBS = {
+    'sweep': sweep.run_point,
+    'suite': suite.run_point,
+}
+
+
+def run_job(model_obj, model_path, kind, *args, bulk=False, cache=None, incremental=False):
+    # run function of the daemon workers, the tasks they get are (kind, *args)
+    return JOBS[kind](model_obj, model_path, *args, bulk=bulk, cache=cache, incremental=incremental)
+
+
+# %% RESIDENT INSTANCES
+# n_instances sweep.worker processes start their instance when the daemon starts (warm=True) and keep it between
+# jobs, so a script only pays for ApplicationStart once per daemon instead of once per run
+# every client connection is served by its own thread, the tasks of all jobs wait in one queue so concurrent jobs
+# spread over every instance, and one thread routes worker results back to the job they belong to
+# like sweep.run_parallel, every worker has its own task queue and is handed a task only when it holds none, so the
+# task of a worker is always known
+# a worker that dies is replaced, failing the task it was running or requeuing the one it had not started yet, and
+# the instance of a worker whose task raised is restarted by sweep.worker itself
+# workers that exit before they are ready more than 2 * n_instances times in a row, at startup or later, stop the
+# daemon from dispatching and every pending job is answered with the error, as are the jobs still pending on stop
+
+class Daemon:
+
+    def __init__(self, model_path, backend='simulator', n_instances=1, address=ADDRESS, key=None, bulk=False,
+                 cache=None, incremental=False, poll=1.0, **options):
+        self.model_path = model_path
+        self.n_instances = n_instances
+        self.address = address
+        self.key = authkey() if key is None else key
+        self.bulk = bulk
+        self.cache = cache
+        self.incremental = incremental
+        self.poll = poll
+
+        self.open_function = backends.open_function(backend, **options)
+        self.close_function = backends.close_function(backend)
+
+        self.context = multiprocessing.get_context('spawn')
+        self.results = self.context.Queue()
+        self.queues = {}
+        self.workers = {}
+
+        # task index: (job, position, task) until answered, task indexes not handed out yet, and worker_id: task
+        # index of the task handed to it and of the task it started
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.waiting = collections.deque()
+        self.assigned = {}
+        self.in_flight = {}
+        self.next_index = 0
+
+        self.n_ready = 0
+        self.ready_workers = set()
+        self.startup_failures = 0
+        self.ready = threading.Event()
+        self.error = None
+        self.stopping = False
+
+    def start_worker(self, worker_id):
+        self.ready_workers.discard(worker_id)
+        self.queues[worker_id] = self.context.Queue()
+        process = self.context.Process(target=sweep.worker, args=(worker_id, self.model_path, self.queues[worker_id],
+                                                                  self.results, self.open_function,
+                                                                  self.close_function, self.bulk, self.cache,
+                                                                  self.incremental, run_job, False, True),
+                                       daemon=True)
+        process.start()
+        return process
+
+    def start(self):
+        # start the instances and wait until every one of them is ready
+        for worker_id in range(self.n_instances):
+            self.workers[worker_id] = self.start_worker(worker_id)
+
+        threading.Thread(target=self.dispatch, daemon=True).start()
+        self.ready.wait()
+
+        if self.error is not None:
+            self.stopping = True
+            raise self.error
+
+    def hand_out(self):
+        # next waiting tasks to the workers holding none, called holding the lock
+        for worker_id in self.workers:
+            if self.waiting and worker_id not in self.assigned:
+                index = self.waiting.popleft()
+                self.assigned[worker_id] = index
+                self.queues[worker_id].put((index, self.pending[index][2]))
+
+    def dispatch(self):
+        while not self.stopping:
+            try:
+                self.receive(*self.results.get(timeout=self.poll))
+                continue
+
+            except queue.Empty:
+                dead = [worker_id for worker_id, process in list(self.workers.items()) if not process.is_alive()]
+
+            # answers a worker sent before dying are read before its task is requeued
+            while True:
+                try:
+                    self.receive(*self.results.get_nowait())
+                except queue.Empty:
+                    break
+
+            for worker_id in dead:
+                with self.lock:
+                    index = self.assigned.pop(worker_id, None)
+                    started = self.in_flight.pop(worker_id, None) is not None
+                    if index is not None and not started:
+                        self.waiting.appendleft(index)
+
+                if started:
+                    self.finish(index, ('failed', 'worker {} died'.format(worker_id)))
+
+                if worker_id not in self.ready_workers:
+                    self.startup_failures += 1
+                    if self.startup_failures > 2 * self.n_instances:
+                        self.error = RuntimeError('Daemon instances keep exiting before they are ready')
+                        self.abort(self.error)
+                        self.ready.set()
+                        return
+
+                with self.lock:
+                    self.workers[worker_id] = self.start_worker(worker_id)
+                    self.hand_out()
+
+    def receive(self, status, worker_id, index, value):
+        if status == 'ready':
+            self.ready_workers.add(worker_id)
+            self.startup_failures = 0
+            self.n_ready += 1
+            if self.n_ready == self.n_instances:
+                self.ready.set()
+
+        elif status == 'started':
+            with self.lock:
+                self.in_flight[worker_id] = index
+
+        else:
+            with self.lock:
+                self.in_flight.pop(worker_id, None)
+                self.assigned.pop(worker_id, None)
+            self.finish(index, (status, value))
+
+    def finish(self, index, answer):
+        with self.lock:
+            # tasks of jobs already answered by abort are dropped
+            if index not in self.pending:
+                return
+            job, position, _ = self.pending.pop(index)
+            job['answers'][position] = answer
+            job['remaining'] -= 1
+            if not job['remaining']:
+                job['event'].set()
+            self.hand_out()
+
+    def abort(self, error):
+        # answer every pending job with error, raised by submit
+        with self.lock:
+            for job, position, task in self.pending.values():
+                job['error'] = error
+                job['event'].set()
+            self.pending.clear()
+            self.waiting.clear()
+            self.assigned.clear()
+            self.in_flight.clear()
+
+    def submit(self, kind, tasks):
+        # run a job and wait for every answer, in the order of tasks
+        if kind not in JOBS:
+            raise ValueError('Unknown job kind {}'.format(kind))
+
+        job = {'answers': [None] * len(tasks), 'remaining': len(tasks), 'event': threading.Event()}
+
+        with self.lock:
+            if self.error is not None or self.stopping:
+                raise RuntimeError('The daemon is not running jobs') from self.error
+
+            for position, task in enumerate(tasks):
+                self.pending[self.next_index] = (job, position, (kind,) + tuple(task))
+                self.waiting.append(self.next_index)
+                self.next_index += 1
+            self.hand_out()
+
+        if tasks:
+            job['event'].wait()
+
+        if 'error' in job:
+            raise job['error']
+
+        return job['answers']
+
+    def status(self):
+        with self.lock:
+            return {'instances': self.n_instances, 'alive': sum(process.is_alive() for process in
+                                                                self.workers.values()),
+                    'running': len(self.in_flight), 'queued': len(self.pending) - len(self.in_flight)}
+
+    def handle(self, connection):
+        # requests are ('sweep' or 'suite', tasks), ('status',), and ('stop',), every one gets one reply
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except EOFError:
+                    return
+
+                try:
+                    if request[0] == 'status':
+                        reply = self.status()
+
+                    elif request[0] == 'stop':
+                        connection.send('stopping')
+                        self.stop()
+                        return
+
+                    else:
+                        reply = self.submit(*request)
+
+                except Exception as error:
+                    reply = error
+
+                connection.send(reply)
+
+    def serve(self):
+        # accept clients until a stop request, then close the instances
+        if sys.platform != 'win32' and os.path.exists(self.address):
+            os.remove(self.address)
+
+        with Listener(self.address, authkey=self.key) as listener:
+            print('Daemon listening on {} with {} instances'.format(self.address, self.n_instances))
+
+            while not self.stopping:
+                try:
+                    connection = listener.accept()
+                except OSError:
+                    # a client with the wrong key
+                    continue
+
+                threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+        self.close()
+
+    def stop(self):
+        self.stopping = True
+        self.abort(RuntimeError('The daemon stopped before the job finished'))
+
+        # wake the accept of serve
+        try:
+            Client(self.address, authkey=self.key).close()
+        except OSError:
+            pass
+
+    def close(self):
+        for worker_id in self.workers:
+            self.queues[worker_id].put(None)
+
+        for process in self.workers.values():
+            process.join()
+
+
+# %% CLIENT
+# scripts and notebooks connect to a running daemon and get the same tables run_parallel and run_suite return
+
+class DaemonClient:
+
+    def __init__(self, address=ADDRESS, key=None):
+        self.connection = Client(address, authkey=authkey() if key is None else key)
+
+    def request(self, *request):
+        self.connection.send(request)
+        reply = self.connection.recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def submit(self, kind, tasks):
+        return self.request(kind, [tuple(task) for task in tasks])
+
+    def status(self):
+        return self.request('status')
+
+    def stop(self):
+        return self.request('stop')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def run_sweep(self, points, store=None):
+        # out_df of sweep points, with a sweep.ResultStore rows are appended to it and the stored out_df returned
+        out_df = sweep.new_out_df()
+
+        for point, (status, value) in zip(points, self.submit('sweep', points)):
+            if status != 'done':
+                print('There were issues running {}: {}'.format(point[0], value))
+            elif store is None:
+                out_df.loc[point[0]] = value
+            else:
+                store.append(point[0], value)
+
+        if store is not None:
+            store.sync()
+            return store.load()
+
+        return out_df
+
+    def run_suite(self, points, records, store=None, dt=0.005, damp=0, record_cache=None, batch_size=None):
+        # per-record table of every point under every record, as suite.run_suite returns it
+        # records are read by the daemon, so their paths are those of the machine it runs on
+        stored = set(store.load().index) if store is not None and store.done else set()
+        tasks = suite.suite_points(points, records, dt, damp, record_cache, batch_size, stored)
+
+        rows = []
+        for task, (status, value) in zip(tasks, self.submit('suite', tasks)):
+            if status != 'done':
+                print('There were issues running {}: {}'.format(task[0], value))
+            elif store is None:
+                rows += [[task[0]] + row for row in value]
+            else:
+                store.append(task[0], value)
+
+        if store is not None:
+            store.sync()
+            return store.load()
+
+        return pd.DataFrame(rows, columns=suite.SUITE_COLUMNS).set_index(['file_name', 'record'])
+
+
+if __name__ == '__main__':
+    # python daemon.py [backend] [n_instances] [model_path] starts a daemon, e.g. python daemon.py comtypes 2
+    # python daemon.py status and python daemon.py stop query and stop a running one
+    if sys.argv[1:2] in (['status'], ['stop']):
+        with DaemonClient() as client:
+            print(client.request(sys.argv[1]))
+
+    else:
+        backend = sys.argv[1] if len(sys.argv) > 1 else 'simulator'
+        n_instances = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+        model_path = sys.argv[3] if len(sys.argv) > 3 else os.path.join(os.path.expanduser('~'), 'Desktop',
+                                                                         'models', 'daemon')
+        os.makedirs(model_path, exist_ok=True)
+
+        daemon = Daemon(model_path, backend, n_instances,
+                        cache=resultcache.ResultCache(os.path.join(model_path, 'cache')))
+        daemon.start()
+        daemon.serve()
@@ -0,0 +1,186 @@
+import os
+import re
+import hashlib
+import numpy as np
+
+EL_CENTRO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'support', 'el_centro.txt')
+
+
+# %% READ GROUND MOTION FILES WITH THE SAME OPTIONS AS FuncTH.SetFromFile_1
+
+def read_time_history(file_name=EL_CENTRO, headlines=0, pre_chars=0, points_per_line=3, value_type=2,
+                      free_format=False, number_fixed=10, dt=None):
+    # value_type 1 reads equally spaced values at dt, value_type 2 reads time and value pairs
+    # every field is gathered into one string and converted to floats by numpy in a single pass
+
+    with open(file_name) as f:
+        lines = [line.rstrip('\n')[pre_chars:] for line in f.readlines()[headlines:]]
+
+    if free_format:
+        fields = ' '.join(lines).replace(',', ' ')
+    else:
+        # fixed-width fields may touch, e.g. -0.1234567-0.2345678, so they are cut apart before splitting
+        fields = ' '.join(line[i:i + number_fixed] for line in lines for i in range(0, len(line), number_fixed))
+
+    values = np.array(fields.split(), dtype=float)
+
+    if value_type == 2:
+        if len(values) % 2:
+            raise ValueError('{}: odd number of values in a time and value file'.format(file_name))
+        time, values = values[0::2], values[1::2]
+    else:
+        if dt is None or dt <= 0:
+            raise ValueError('{}: equally spaced values need a time step dt > 0'.format(file_name))
+        time = dt * np.arange(len(values))
+
+    check_time(time, file_name)
+
+    return time, values
+
+
+def read_at2(file_name):
+    # PEER NGA .AT2 record, four header lines then equally spaced accelerations in g
+    # the fourth line reads either 'NPTS=  4000, DT=   .0050 SEC' or, in older files, '4000   .0050   NPTS, DT'
+
+    with open(file_name) as f:
+        header = [f.readline() for _ in range(4)]
+        fields = f.read()
+
+    match = re.search(r'NPTS\s*=\s*(\d+)\s*,?\s*DT\s*=\s*([-+.\dEe]+)', header[3], re.IGNORECASE)
+    if match is None:
+        match = re.match(r'\s*(\d+)\s+([-+.\dEe]+)', header[3])
+    if match is None:
+        raise ValueError('{}: no NPTS and DT on the fourth line of an .AT2 file'.format(file_name))
+
+    n_points, dt = int(match.group(1)), float(match.group(2))
+
+    values = np.array(fields.replace(',', ' ').split(), dtype=float)
+    if len(values) < n_points:
+        raise ValueError('{}: {} values for NPTS = {}'.format(file_name, len(values), n_points))
+
+    if dt <= 0:
+        raise ValueError('{}: time step DT = {} of an .AT2 file'.format(file_name, dt))
+
+    return dt * np.arange(n_points), values[:n_points]
+
+
+def check_time(time, file_name=''):
+    # times must increase strictly, repeated or decreasing times would make the interpolation ambiguous
+    steps = np.diff(time)
+    if len(time) == 0 or np.isnan(time).any() or (steps <= 0).any():
+        bad = np.flatnonzero(~(steps > 0))
+        raise ValueError('{}: time does not increase{}'.format(
+            file_name, ' after t = {}'.format(time[bad[0]]) if len(bad) else ''))
+
+
+# %% BINARY CACHE OF PARSED RECORDS
+# a parsed record is saved as a (2, n_points) .npy file of times and values, named by the hash of the source file
+# and the reading options, and opened memory-mapped so a suite of hundreds of records starts without parsing text
+# a changed source file gets a new hash, stale entries are never read
+
+def file_hash(file_name):
+    sha = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def load(file_name=EL_CENTRO, cache_path=None, **options):
+    # .AT2 files are read with read_at2, everything else with read_time_history and the given options
+    # returns read-only memory-mapped time and value arrays when cache_path is given
+
+    def parse():
+        if file_name.lower().endswith('.at2'):
+            return read_at2(file_name)
+        return read_time_history(file_name, **options)
+
+    if cache_path is None:
+        return parse()
+
+    text = '\n'.join([file_hash(file_name)] + ['{}={!r}'.format(*option) for option in sorted(options.items())])
+    cache_name = os.path.join(cache_path, hashlib.sha256(text.encode()).hexdigest() + '.npy')
+
+    if not os.path.exists(cache_name):
+        os.makedirs(cache_path, exist_ok=True)
+
+        # write to a temporary file and rename so other processes never open a partial record
+        temp_name = '{}.{}.tmp'.format(cache_name, os.getpid())
+        with open(temp_name, 'wb') as f:
+            np.save(f, np.vstack(parse()))
+        os.replace(temp_name, cache_name)
+
+    record = np.load(cache_name, mmap_mode='r')
+    return record[0], record[1]
+
+
+def resample(time, values, dt=0.005, n_steps=2400):
+    # linearly interpolate onto n_steps + 1 equally spaced points, the function is zero past the end of the record
+    # n_steps=None covers the record from t = 0 to its last time
+    if n_steps is None:
+        n_steps = int(np.floor(time[-1] / dt + 1e-9))
+    return np.interp(dt * np.arange(n_steps + 1), time, values, left=0, right=0)
+
+
+# %% RESPONSE SPECTRA
+
+def spectrum(ag, dt, periods, damping=0.05):
+    # displacement, pseudo-velocity, and pseudo-acceleration spectra of equally spaced ground accelerations
+    # ag (..., n_steps + 1), every record, period, and damping ratio (< 1) is stepped through time together
+    # with the exact recurrence for piecewise-linear excitation (Nigam and Jennings)
+    # outputs have shape ag.shape[:-1] + (len(periods), len(damping)) and the units of ag
+
+    ag = np.asarray(ag, dtype=float)
+    periods = np.atleast_1d(np.asarray(periods, dtype=float))
+    damping = np.atleast_1d(np.asarray(damping, dtype=float))
+
+    # rigid oscillators follow the ground, they are integrated at a dummy period and replaced at the end
+    rigid = periods <= 0
+    omega = (2 * np.pi / np.where(rigid, 1, periods))[:, np.newaxis]
+    zeta = damping[np.newaxis, :]
+
+    root = np.sqrt(1 - zeta ** 2)
+    omega_d = omega * root
+    e = np.exp(-zeta * omega * dt)
+    s, c = np.sin(omega_d * dt), np.cos(omega_d * dt)
+    k = omega ** 2
+
+    coef_a = e * (zeta / root * s + c)
+    coef_b = e * s / omega_d
+    coef_c = (2 * zeta / (omega * dt) + e * (((1 - 2 * zeta ** 2) / (omega_d * dt) - zeta / root) * s
+                                              - (1 + 2 * zeta / (omega * dt)) * c)) / k
+    coef_d = (1 - 2 * zeta / (omega * dt) + e * ((2 * zeta ** 2 - 1) / (omega_d * dt) * s
+                                                  + 2 * zeta / (omega * dt) * c)) / k
+    coef_a_v = -e * omega / root * s
+    coef_b_v = e * (c - zeta / root * s)
+    coef_c_v = (-1 / dt + e * ((omega / root + zeta / (dt * root)) * s + c / dt)) / k
+    coef_d_v = (1 - e * (zeta / root * s + c)) / (k * dt)
+
+    # time runs along the first axis, records then periods then damping ratios after it
+    p = -np.moveaxis(ag, -1, 0)[..., np.newaxis, np.newaxis]
+    u = np.zeros(ag.shape[:-1] + omega.shape[:1] + zeta.shape[1:])
+    v = np.zeros(u.shape)
+    sd = np.zeros(u.shape)
+
+    for i in range(ag.shape[-1] - 1):
+        u, v = (coef_a * u + coef_b * v + coef_c * p[i] + coef_d * p[i + 1],
+                coef_a_v * u + coef_b_v * v + coef_c_v * p[i] + coef_d_v * p[i + 1])
+        np.maximum(sd, np.abs(u), out=sd)
+
+    sd[..., rigid, :] = 0
+    psv = omega * sd
+    psa = k * sd
+    psa[..., rigid, :] = np.abs(ag).max(axis=-1)[..., np.newaxis, np.newaxis]
+
+    return sd, psv, psa
+
+
+def interpolate(periods, values):
+    # spectrum function for the native response spectrum case, interpolated like a sap2000 user function
+    periods = np.asarray(periods, dtype=float)
+    values = np.asarray(values, dtype=float)
+
+    def function(query):
+        return np.interp(query, periods, values)
+
+    return function
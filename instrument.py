@@ -0,0 +1,189 @@
+import json
+import time
+import contextlib
+import numpy as np
+
+# values returned as they are instead of being wrapped
+PLAIN_TYPES = (bool, int, float, complex, str, bytes, list, tuple, dict, set, type(None), np.ndarray)
+
+# arguments counted by their length
+SEQUENCE_TYPES = (list, tuple, np.ndarray)
+
+
+# %% CALL STATISTICS
+# every OAPI method path, e.g. FrameObj.AddByCoord, keeps its call count, total and largest latency, a histogram of
+# latencies in power-of-two microsecond bins, and the number of argument items (list arguments count their length)
+
+class CallStats:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.arg_items = 0
+        self.histogram = {}
+
+    def add(self, elapsed, args):
+        # elapsed in ns
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+        for arg in args:
+            self.arg_items += len(arg) if type(arg) in SEQUENCE_TYPES else 1
+
+        # bin i holds latencies below 2 ** i us
+        bin_number = (elapsed // 1000).bit_length()
+        self.histogram[bin_number] = self.histogram.get(bin_number, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.arg_items += other.arg_items
+        for bin_number, count in other.histogram.items():
+            self.histogram[bin_number] = self.histogram.get(bin_number, 0) + count
+
+    def report(self):
+        return {'count': self.count, 'total_s': self.total / 1e9, 'mean_us': self.total / self.count / 1e3,
+                'max_us': self.max / 1e3, 'arg_items': self.arg_items,
+                'histogram_us': dict(('<{}'.format(2 ** bin_number), self.histogram[bin_number])
+                                     for bin_number in sorted(self.histogram))}
+
+
+# %% RECORDER
+# calls are grouped by sweep point, and every point also keeps the wall time of its build, analyze, and extract
+# phases so time spent outside OAPI calls (pandas, text export, the cache) shows up as well
+
+class Recorder:
+
+    def __init__(self):
+        self.points = {}
+        self.current = self.new_point('setup')
+
+    def new_point(self, name):
+        return self.points.setdefault(name, {'wall': 0, 'phases': {}, 'calls': {}})
+
+    def record(self, path, elapsed, args):
+        stats = self.current['calls'].get(path)
+        if stats is None:
+            stats = self.current['calls'][path] = CallStats()
+        stats.add(elapsed, args)
+
+    @contextlib.contextmanager
+    def point(self, name):
+        previous, self.current = self.current, self.new_point(name)
+        start = time.perf_counter_ns()
+        try:
+            yield self
+        finally:
+            self.current['wall'] += time.perf_counter_ns() - start
+            self.current = previous
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        phases = self.current['phases']
+        start = time.perf_counter_ns()
+        try:
+            yield self
+        finally:
+            phases[name] = phases.get(name, 0) + time.perf_counter_ns() - start
+
+    def totals(self):
+        totals = {}
+        for point in self.points.values():
+            for path, stats in point['calls'].items():
+                totals.setdefault(path, CallStats()).merge(stats)
+        return totals
+
+    def report(self):
+        # nested dicts, ready for json
+        return {'points': dict((name, {'wall_s': point['wall'] / 1e9,
+                                       'phases_s': dict((phase, elapsed / 1e9)
+                                                        for phase, elapsed in point['phases'].items()),
+                                       'calls': dict((path, stats.report())
+                                                     for path, stats in sorted(point['calls'].items()))})
+                               for name, point in self.points.items()),
+                'totals': dict((path, stats.report()) for path, stats in
+                               sorted(self.totals().items(), key=lambda item: -item[1].total))}
+
+    def export(self, file_name):
+        with open(file_name, 'w') as f:
+            json.dump(self.report(), f, indent=1)
+        return file_name
+
+    def summary(self, top=15):
+        # the paths taking the most time over every point, as printable lines
+        lines = ['{:<45}{:>9}{:>12}{:>11}'.format('path', 'count', 'total_s', 'mean_us')]
+        for path, stats in sorted(self.totals().items(), key=lambda item: -item[1].total)[:top]:
+            lines.append('{:<45}{:>9}{:>12.4f}{:>11.1f}'.format(path, stats.count, stats.total / 1e9,
+                                                                stats.total / stats.count / 1e3))
+        return '\n'.join(lines)
+
+
+# %% TRANSPARENT PROXY
+# wraps the sap_model returned by sap2000.opensap2000 (or a simulator SapModel), sub-objects such as FrameObj are
+# wrapped in turn and their methods timed, plain values pass through, proxies and timed methods are stored on the
+# proxy the first time a path is used so later calls do not go through __getattr__ at all
+# without a recorder nothing is timed and the proxy only caches sub-objects and methods (bindings.cached)
+# when instrumentation is off the sap_model is used as it is, with no proxy and no overhead
+
+class Proxy:
+
+    def __init__(self, target, recorder, path=''):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_recorder', recorder)
+        object.__setattr__(self, '_path', path)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if isinstance(value, PLAIN_TYPES):
+            return value
+
+        path = self._path + '.' + name if self._path else name
+
+        if callable(value):
+            child = value if self._recorder is None else timed(value, self._recorder, path)
+        else:
+            child = Proxy(value, self._recorder, path)
+
+        object.__setattr__(self, name, child)
+        return child
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+def timed(method, recorder, path):
+
+    def call(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            recorder.record(path, time.perf_counter_ns() - start, args)
+
+    return call
+
+
+def wrap(sap_model, enabled=True, recorder=None):
+    # the instrumented sap_model, or sap_model itself when not enabled
+    if not enabled:
+        return sap_model
+    return Proxy(sap_model, Recorder() if recorder is None else recorder)
+
+
+def recorder_of(sap_model):
+    return sap_model._recorder if isinstance(sap_model, Proxy) else None
+
+
+def point(sap_model, name):
+    # context grouping the calls of one sweep point, doing nothing for a sap_model that is not instrumented
+    recorder = recorder_of(sap_model)
+    return contextlib.nullcontext() if recorder is None else recorder.point(name)
+
+
+def phase(sap_model, name):
+    recorder = recorder_of(sap_model)
+    return contextlib.nullcontext() if recorder is None else recorder.phase(name)
@@ -1,312 +1,192 @@
 import os
 import sap2000
 from modelclasses import Model
+import sweep
+import suite
+import adaptive
+import instrument
+import backends
+import daemon
+import resultcache
 import pandas as pd
-from math import pi, sqrt
+from math import sqrt
 from numpy import arange
 import datetime
 
 # %% OPEN SAP2000 AND READY PROGRAM
 
-# check model directory
-root_dir = os.getcwd()
+# the guard keeps worker processes of sweep.run_parallel from re-running this script
+if __name__ == '__main__':
 
-model_path = os.path.join(os.environ['HOMEPATH'], 'Desktop') + r'\models'
+    # check model directory
+    root_dir = os.getcwd()
 
-sap2000.check_model_path(model_path)
+    model_path = os.path.join(os.path.expanduser('~'), 'Desktop', 'models')
 
-# create sap2000 object in memory
-# in case user wants to attach to running instance, set attach_to_instance=True
-# OAPI can automatically find most recent installation starting with SAP2000 v19
-# For other installs, set specify_path=True
-program_path = r'C:\Program Files\Computers and Structures\SAP2000 25\SAP2000.exe'
-sap_obj = sap2000.attachtoapi(attach_to_instance=False, specify_path=False, program_path=program_path)
+    sap2000.check_model_path(model_path)
 
-# open sap2000
-# to show sap2000 GUI, set visible=True
-model_obj = Model(sap2000.opensap2000(sap_obj, visible=True))
+    # set up sweep points
 
-# open new model in units of lb_in_F
+    run_flags = [1, 2]
 
-model_obj.new()
+    m2 = 125000 / sap2000.GRAVITY / 12
+    m1 = m2
+    w2 = sqrt(100000 / m2)
 
-# set up output array
+    n12_range = arange(0.25, 1.25, 0.25).round(decimals=2)
+    kp1_range = arange(0.25, 1.25, 0.25).round(decimals=2)
 
-out_df_args = dict.fromkeys(['file_name', 'no_frames',
-                             'max_u1_frm1', 'max_u1_frm2',
-                             'm1', 'm2',
-                             'k1', 'k2', 'kp',
-                             'user_T', 'sap_T',
-                             'frm1_bm_stiff', 'frm2_bm_stiff',
-                             'frm1_col_stiff', 'frm2_col_stiff',
-                             'frm1_bm_weight', 'frm2_bm_weight'])
+    points = sweep.sweep_points(n12_range, kp1_range, run_flags, m1, w2)
 
-out_df = pd.DataFrame(columns=list(out_df_args.keys()))
-out_df.set_index('file_name', inplace=True)
+    # to run several SAP2000 instances in parallel, set n_workers to the number of licensed seats
+    n_workers = 1
 
-run_flags = [1, 2]
+    # backend is 'comtypes' (COM), 'pythonnet' (the .NET assembly SAP2000v1.dll), or 'simulator', where the native
+    # solver answers every OAPI call without SAP2000 (e.g. on Linux), python backends.py compares their per-call
+    # latency on this machine
+    backend = 'comtypes'
 
-m2 = 125000 / sap2000.GRAVITY / 12
-m1 = m2
-w2 = sqrt(100000 / m2)
+    # to import the comtypes wrappers generated once by python bindings.py <version> instead of generating them in
+    # every process, set binding_version to that version, e.g. '25.0.0'
+    binding_version = None
 
-n12_range = arange(0.25, 1.25, 0.25).round(decimals=2)
-kp1_range = arange(0.25, 1.25, 0.25).round(decimals=2)
+    open_function = backends.open_function(backend, binding_version=binding_version)
+    close_function = backends.close_function(backend)
 
-for n12_loop in n12_range:
+    # to send the points to the instances kept open by a daemon started with python daemon.py <backend>
+    # <n_instances> instead of starting sap2000 here, set use_daemon=True, backend and n_workers are then the daemon's
+    use_daemon = False
 
-    k1_loop = round(m1 * (n12_loop * w2) ** 2, 2)
+    # to open each model in SAP2000 from one generated .$2k text file instead of one COM call per object, set
+    # bulk=True
+    bulk = False
 
-    for kp1_loop in kp1_range:
+    # to keep each model after its analysis and only push the sections, link properties, and masses that change
+    # between points instead of rebuilding it, set incremental=True
+    incremental = False
 
-        kp_loop = round(k1_loop * kp1_loop, 4)
+    # analyzed models are cached by content in model_path/cache, so reruns only analyze new or changed points
+    # set cache=None to always run sap2000
+    cache = resultcache.ResultCache(os.path.join(model_path, 'cache'))
 
-        for flag in run_flags:
-            # %% DEFINE MODEL GEOMETRY, PROPERTIES, AND LOADING
+    # to run every point under each ground-motion record in a directory (.AT2 files or .txt files laid out like
+    # support/el_centro.txt) instead of the response spectrum, set record_path, e.g. to
+    # os.path.join(root_dir, 'support'), records are parsed once and kept as .npy files in model_path/records
+    record_path = None
 
-            # set file name for current run
+    # to start from the n12_range by kp1_range grid and only refine the cells where the base shear or period ratio
+    # of coupled to single frames changes quickly, set adaptive_sampling=True, cells are split until the ratios are
+    # resolved to within adaptive_tol or max_level splits, and the samples are written to model_path/adaptive.csv
+    adaptive_sampling = False
+    adaptive_tol = 0.02
+    max_level = 3
 
-            file_name = 'k1-{}_kp-{}_frm-{}'.format(k1_loop / 1000, kp_loop / 1000, flag)
+    # finished points are appended to model_path/results.csv as they complete, a restarted sweep skips every point
+    # already in it, delete the file to start over
+    # record suites are appended to model_path/suite.csv one row per point and record instead
+    if record_path is not None:
+        store = suite.SuiteStore(os.path.join(model_path, 'suite.csv'))
 
-            # initialize model object
+    else:
+        store = sweep.ResultStore(os.path.join(model_path, 'results.csv'))
 
-            # set degrees of freedom
-            model_obj.props.set_mdl_dof_df(dof='2-D')
+    # to time every OAPI call by method and sweep point, set profile=True, the report is written to
+    # model_path/profile.json (model_path/worker<id>/profile.json with n_workers > 1)
+    profile = False
 
-            # load degrees of freedom for 2-D motion into sap2000
-            model_obj.props.load_mdl_dof_df()
+    # to also write the results to an Excel workbook at the end, set export_excel=True
+    export_excel = True
 
-            # set material properties
-            mat_prop = {'material': 'STEEL', 'material_id': sap2000.MATERIAL_TYPES['MATERIAL_STEEL'],
-                        'youngs': 29000000, 'poisson': 0.3, 't_coeff': 6E-06, 'weight': 0}
+    if record_path is not None:
+        if incremental:
+            # run points of the same model layout one after the other so most of them only need an update
+            points.sort(key=lambda point: point[3])
 
-            model_obj.props.add_mat_df(mat_prop)
+        if use_daemon:
+            with daemon.DaemonClient() as client:
+                suite_df = client.run_suite(points, suite.find_records(record_path), store,
+                                            record_cache=os.path.join(model_path, 'records'))
 
-            # load dataframe of material properties into sap2000
-            model_obj.props.load_mat_df()
+        else:
+            suite_df = suite.run_suite(points, suite.find_records(record_path), model_path, store,
+                                       n_workers=n_workers, open_function=open_function,
+                                       close_function=close_function,
+                                       record_cache=os.path.join(model_path, 'records'), bulk=bulk, cache=cache,
+                                       incremental=incremental)
 
-            frm1_col_stiff = k1_loop / 2
-            frm1_bm_stiff = 50 * frm1_col_stiff
+        # median and 84th percentile responses of every point over the records
+        out_df = suite.statistics(suite_df)
 
-            frm2_col_stiff = 50000
-            frm2_bm_stiff = 50 * frm2_col_stiff
+    else:
+        if n_workers == 1 and not use_daemon:
+            # create sap2000 object in memory and open sap2000, the most recent installation is started
+            # to show sap2000 GUI, set visible=True
+            sap_obj, sap_model = open_function(visible=True)
+            model_obj = Model(instrument.wrap(sap_model, enabled=profile))
 
-            # generate frame properties
-            model_obj.props.gen_frm(frm1_col_stiff, frm1_bm_stiff, frm2_col_stiff, frm2_bm_stiff)
+            # open new model in units of lb_in_F
 
-            # load dataframe of frame properties into sap2000
-            model_obj.props.load_frm_df()
+            model_obj.new()
 
-            # add link property
+        def run(points):
+            # run every point not stored yet and return the out_df of every stored point
 
-            dof = [False] * 6
-            fixed = [0] * 6
-            ke = [0] * 6
-            ce = [0] * 6
-            dj2 = 0
-            dj3 = 0
+            points = [point for point in points if point[0] not in store.done]
 
-            dof[0] = True
+            if incremental:
+                # run points of the same model layout one after the other so most of them only need an update
+                points.sort(key=lambda point: point[3])
 
-            ke[0] = kp_loop
-            kp = ke[0]
+            if use_daemon and points:
+                with daemon.DaemonClient() as client:
+                    client.run_sweep(points, store)
 
-            link_prop = {'name': 'Default', 'dof': dof, 'fixed': fixed,
-                         'ke': ke, 'ce': ce, 'dj2': dj2, 'dj3': dj3,
-                         'ke_coupled': False, 'ce_coupled': False,
-                         'notes': '', 'guid': 'Default', 'w': 0,
-                         'm': 0, 'R1': 0, 'R2': 0, 'R3': 0}
+            elif n_workers > 1 and points:
+                sweep.run_parallel(points, model_path, n_workers=n_workers, open_function=open_function,
+                                   close_function=close_function, bulk=bulk, cache=cache, incremental=incremental,
+                                   store=store, profile=profile)
 
-            model_obj.props.add_link_df(link_prop)
+            elif points:
+                for point in points:
+                    store.append(point[0], sweep.run_point(model_obj, model_path, *point, bulk=bulk, cache=cache,
+                                                           incremental=incremental))
 
-            model_obj.props.load_link_df()
+                    print('Finished running {} ...'.format(point[0]))
 
-            # switch to k-ft units
-            model_obj.switch_units(units=sap2000.UNITS['lb_ft_F'])
+            store.sync()
 
-            # generate frames given arguments set into the gen_frm_df() function and load frames into sap2000
+            return store.load()
 
-            no_frames = flag
-            no_stories = 1
-            frm_width = 20
-            frm1_bm_weight = 125000
-            frm2_bm_weight = 125000
-            frm_height = 20
-            frm_spacing = 20
+        if adaptive_sampling:
+            samples_df = adaptive.sample(adaptive.sweep_evaluator(run, m1, w2, run_flags), n12_range, kp1_range,
+                                         tol=adaptive_tol, max_level=max_level, names=('n12', 'kp1'),
+                                         responses=adaptive.SWEEP_RESPONSES)
+            samples_df.to_csv(os.path.join(model_path, 'adaptive.csv'), index=False)
 
-            model_obj.geometry.gen_frm(no_frames=no_frames, no_stories=no_stories, frm_width=frm_width,
-                                       frm_height=frm_height, frm_spacing=frm_spacing,
-                                       frm1_bm_weight=frm1_bm_weight, frm2_bm_weight=frm2_bm_weight)
+            out_df = store.load()
 
-            model_obj.geometry.load_frm_df()
+        else:
+            out_df = run(points)
 
-            if flag == 2:
-                # add link
+        if n_workers == 1 and not use_daemon:
+            if profile:
+                recorder = instrument.recorder_of(model_obj.sap_obj)
+                recorder.export(os.path.join(model_path, 'profile.json'))
+                print(recorder.summary())
 
-                model_obj.geometry.new_link()
+            # %% CLOSE SAP2000 MODEL AND APPLICATION
 
-                model_obj.geometry.load_link_df()
+            close_function(sap_obj)
 
-            # add restraints
+    store.close()
 
-            model_obj.geometry.set_restraints('fixed')
+    if export_excel:
+        t_o = datetime.datetime.now()
+        writer = pd.ExcelWriter('output_{}-{}-{}_{}-{}.xlsx'.format(t_o.year, t_o.month, t_o.day, t_o.hour,
+                                                                    t_o.minute))
+        out_df.to_excel(writer, sheet_name='Sheet1')
+        writer.close()
 
-            # refresh sap2000 view to show elements
+    # %% MANIPULATE DATA
 
-            model_obj.refresh_view()
-
-            # add response spectrum
-
-            model_obj.loads.set_rsa()
-
-            # # add time history excitation
-            #
-            # model_obj.loads.set_time_history()
-
-            # %% SAVE MODEL AND RUN IT
-
-            model_obj.switch_units(units=sap2000.UNITS['kip_in_F'])
-
-            model_obj.saveandrun(model_path=model_path, file_name=file_name, anal_type='RSA')
-
-            model_obj.refresh_view()
-
-            # %% OBTAIN DATA
-            class Results:
-
-                def __init__(self):
-                    [self.number_results, self.obj, self.elm, self.a_case, self.step_type, self.step_num,
-                     self.u1, self.u2, self.u3, self.r1, self.r2, self.r3, self.ret] = [None] * 13
-
-                    [self.mode_no, self.load_case, self.period, self.frequency,
-                     self.circ_freq, self.eigen_value] = [None] * 6
-
-                    [self.F1, self.F2, self.F3,
-                     self.Mx, self.My, self.Mz] = [None] * 6
-
-                def new_joint_displ(self, sap_function):
-                    [self.number_results, self.obj, self.elm, self.a_case, self.step_type, self.step_num,
-                     self.u1, self.u2, self.u3, self.r1, self.r2, self.r3, self.ret] = sap_function
-
-                def new_modal_period(self, sap_function):
-                    [self.mode_no, self.load_case, self.step_type,
-                     self.step_num, self.period, self.frequency, self.circ_freq,
-                     self.eigen_value, self.ret] = sap_function
-
-                def new_joint_react(self, sap_function):
-                    [self.number_results, self.obj,
-                     self.elm, self.load_case, self.step_type, self.step_num,
-                     self.F1, self.F2, self.F3, self.Mx, self.My, self.Mz, self.ret] = sap_function
-
-
-            model_obj.switch_units(units=sap2000.UNITS['kip_ft_F'])
-
-            res = Results()
-
-            model_obj.sap_obj.Results.Setup.DeselectAllCasesAndCombosForOutput()
-            model_obj.sap_obj.Results.Setup.SetCaseSelectedForOutput('RSA', True)
-            # model_obj.sap_obj.Results.Setup.SetOptionModalHist(1)
-            #
-            # res.new_joint_displ(
-            #         model_obj.sap_obj.Results.JointDispl('4', 0, 0, [], [], [], [], [], [], [], [], [], [], []))
-
-            res.new_joint_react(
-                    model_obj.sap_obj.Results.JointReact('1', 0, 0, [], [], [], [], [], [], [], [], [], [], []))
-
-            max_F1_frm1 = max((tuple(map(abs, res.F1))))
-
-            max_u1_frm1 = None
-            # try:
-            #     max_u1_frm1 = max((tuple(map(abs, res.u1))))
-            #
-            # except ValueError:
-            #     print('There were issues obtaining max_u1_frm1 in file {}'.format(file_name))
-
-            m1 = frm1_bm_weight / sap2000.GRAVITY / 12
-            k1 = frm1_col_stiff * 2
-            user_T = 2 * pi * sqrt(m1 / k1)
-
-            max_F1_frm2 = None
-            max_u1_frm2 = None
-            m2 = None
-            k2 = None
-            if flag == 2:
-
-                # res.new_joint_displ(
-                #         model_obj.sap_obj.Results.JointDispl('6', 0, 0, [], [], [], [], [], [], [], [], [], [], []))
-
-                # try:
-                #     max_u1_frm2 = max((tuple(map(abs, res.u1))))
-                #
-                # except ValueError:
-                #     print('There were issues obtaining max_u1_frm2 in file {}'.format(file_name))
-
-                res.new_joint_react(
-                        model_obj.sap_obj.Results.JointReact('5', 0, 0, [], [], [], [], [], [], [], [], [], [], []))
-                max_F1_frm2 = max((tuple(map(abs, res.F1))))
-
-                m2 = frm2_bm_weight / sap2000.GRAVITY / 12
-                k2 = frm2_col_stiff * 2
-
-                user_w = (1 / (2 * m1 ** 2 * m2 ** 2)) * (
-                        k2 * m1 ** 2 * m2 + kp * m1 ** 2 * m2 +
-                        k1 * m1 * m2 ** 2 + kp * m1 * m2 ** 2 -
-                        sqrt(((-k2) * m1 ** 2 * m2 - kp * m1 **
-                              2 * m2 - k1 * m1 * m2 ** 2 - kp *
-                              m1 * m2 ** 2) ** 2 - 4 *
-                             (k1 * k2 * m1 ** 3 * m2 ** 3 + k1
-                              * kp * m1 ** 3 * m2 ** 3 + k2
-                              * kp * m1 ** 3 * m2 ** 3)))
-
-                user_T = 2 * pi / sqrt(user_w)
-
-            elif flag == 1:
-                frm2_bm_stiff = None
-                frm2_col_stiff = None
-                frm2_bm_weight = None
-                kp = None
-
-            model_obj.sap_obj.Results.Setup.DeselectAllCasesAndCombosForOutput()
-            model_obj.sap_obj.Results.Setup.SetCaseSelectedForOutput('MODAL', True)
-            model_obj.sap_obj.Results.Setup.SetOptionModeShape(1, 1)
-
-            res.new_modal_period(model_obj.sap_obj.Results.ModalPeriod(1, ['MODAL'], [], [], [], [], [], []))
-
-            sap_T = min(res.period)
-
-            # out_df.loc[file_name] = [no_frames,
-            #                          max_u1_frm1, max_u1_frm2,
-            #                          m1, m2,
-            #                          k1, k2, kp,
-            #                          user_T, sap_T,
-            #                          frm1_bm_stiff, frm2_bm_stiff,
-            #                          frm1_col_stiff, frm2_col_stiff,
-            #                          frm1_bm_weight, frm2_bm_weight]
-
-            out_df.loc[file_name] = [no_frames,
-                                     max_F1_frm1, max_F1_frm2,
-                                     m1, m2,
-                                     k1, k2, kp,
-                                     user_T, sap_T,
-                                     frm1_bm_stiff, frm2_bm_stiff,
-                                     frm1_col_stiff, frm2_col_stiff,
-                                     frm1_bm_weight, frm2_bm_weight]
-
-            print('Finished running {} ...'.format(file_name))
-
-            model_obj.reset()
-
-t_o = datetime.datetime.now()
-writer = pd.ExcelWriter('output_{}-{}-{}_{}-{}.xlsx'.format(t_o.year, t_o.month, t_o.day, t_o.hour, t_o.minute))
-out_df.to_excel(writer, 'Sheet1')
-writer.close()
-
-print('Debugging Placeholder')
-
-# %% CLOSE SAP2000 MODEL AND APPLICATION
-
-sap_obj = sap2000.closesap2000(sap_obj, save_model=False)
-
-# %% MANIPULATE DATA
-
-print('Script has terminated...')
+    print('Script has terminated...')
@@ -1,8 +1,72 @@
 import os
+import numpy as np
 import pandas as pd
 import sap2000
 
 
+# %% COLUMNAR TABLES
+# rows added one at a time are kept as records and concatenated onto the DataFrame once, the next time it is read,
+# so building an N-member model takes linear instead of quadratic time
+
+class Table:
+
+    def __init__(self, columns):
+        self.df = pd.DataFrame(columns=columns)
+        self.rows = []
+
+    def append(self, rows):
+        self.rows.extend(rows)
+
+    def extend(self, df):
+        # add a block of rows built column by column
+        self.df = pd.concat([self.frame(), df], ignore_index=True)
+
+    def __len__(self):
+        return len(self.df) + len(self.rows)
+
+    # single values by row number, rows not yet materialized are read and written in place
+    def get(self, index, column):
+        if index < len(self.df):
+            return self.df.at[index, column]
+        return self.rows[index - len(self.df)].get(column)
+
+    def set(self, index, column, value):
+        if index < len(self.df):
+            self.df.at[index, column] = value
+        else:
+            self.rows[index - len(self.df)][column] = value
+
+    def frame(self):
+        if self.rows:
+            self.df = pd.concat([self.df, pd.DataFrame(self.rows)], ignore_index=True)
+            self.rows = []
+        return self.df
+
+
+class TableAttribute:
+    # reading the attribute returns the materialized DataFrame, assigning a DataFrame replaces the table contents
+    # and has the owner rebuild any index it keeps over the rows (reindex), row numbers are reset to 0..n-1
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return getattr(obj, self.name).frame()
+
+    def __set__(self, obj, df):
+        table = getattr(obj, self.name)
+        table.df, table.rows = df.reset_index(drop=True), []
+        if hasattr(obj, 'reindex'):
+            obj.reindex()
+
+
+def same_table(df_1, df_2):
+    # cell by cell comparison that also handles list-valued cells
+    return df_1.shape == df_2.shape and (df_1.map(str).values == df_2.map(str).values).all()
+
+
 class Model:
 
     def __init__(self, my_sap_obj):
@@ -25,11 +89,97 @@ class Model:
         self.loads = self.Loads(self.sap_obj)
         self.new()
 
+    def adopt(self, model_obj):
+        # take over the tables of a model definition built in memory and loaded into sap2000 some other way, e.g.
+        # from a .$2k text file
+        self.props, self.geometry, self.loads = model_obj.props, model_obj.geometry, model_obj.loads
+        self.props.sap_obj = self.geometry.sap_obj = self.loads.sap_obj = self.sap_obj
+
+    def update(self, model_obj):
+        # bring sap2000 from the state last loaded by this Model to model_obj, a definition of the same model built
+        # in memory (e.g. with textmodel.new_recorder), by pushing only the section dimensions, link properties, and
+        # frame masses that changed
+        # returns False without pushing anything when any other part of the definition differs, the model then has
+        # to be rebuilt
+
+        props, new_props = self.props, model_obj.props
+        geometry, new_geometry = self.geometry, model_obj.geometry
+
+        if geometry.frm_df.empty or not (same_table(props.mdl_dof_df, new_props.mdl_dof_df) and
+                                         same_table(props.mat_df, new_props.mat_df) and
+                                         self.loads.defined == model_obj.loads.defined):
+            return False
+
+        structure = ['xi', 'yi', 'zi', 'xj', 'yj', 'zj', 'name', 'prop_name', 'user_name', 'frm_type',
+                     'i_restraint']
+        if not same_table(geometry.frm_df[structure], new_geometry.frm_df[structure]):
+            return False
+
+        sections = props.frm_df.drop_duplicates('name', keep='last').set_index('name')
+        new_sections = new_props.frm_df.drop_duplicates('name', keep='last').set_index('name')
+        links = props.link_df.drop_duplicates('name', keep='last').set_index('name')
+        new_links = new_props.link_df.drop_duplicates('name', keep='last').set_index('name')
+
+        # sections and links are pushed in the units model_obj loaded them in, tables loaded in other units than
+        # the ones in sap2000 cannot be compared
+        if set(sections.index) != set(new_sections.index) or set(links.index) != set(new_links.index) or \
+                props.units != new_props.units:
+            return False
+
+        section_columns = ['material', 'depth', 'width']
+        changed_sections = [name for name in new_sections.index if not same_table(
+                sections.loc[[name], section_columns], new_sections.loc[[name], section_columns])]
+
+        link_columns = ['dof', 'fixed', 'ke', 'ce', 'dj2', 'dj3', 'ke_coupled', 'ce_coupled', 'w', 'm',
+                        'R1', 'R2', 'R3']
+        changed_links = [name for name in new_links.index if not same_table(
+                links.loc[[name], link_columns], new_links.loc[[name], link_columns])]
+
+        beams = new_geometry.frm_df.loc[new_geometry.frm_df['frm_type'] == 'bm', ['user_name', 'mass']]
+        changed_masses = beams.loc[geometry.frm_df.loc[beams.index, 'mass'].values != beams['mass'].values]
+
+        # analyzed models are locked against changes
+        self.sap_obj.SetModelIsLocked(False)
+
+        previous_units = self.sap_obj.GetPresentUnits()
+
+        if changed_sections:
+            self.sap_obj.SetPresentUnits(new_props.units['frm_df'])
+
+        for name in changed_sections:
+            row = new_sections.loc[name]
+            self.sap_obj.PropFrame.SetRectangle(name, row['material'], row['depth'], row['width'])
+
+        if changed_links:
+            self.sap_obj.SetPresentUnits(new_props.units['link_df'])
+
+        for name in changed_links:
+            row = new_links.loc[name]
+            self.sap_obj.PropLink.SetLinear(name, row['dof'], row['fixed'], row['ke'], row['ce'],
+                                            row['dj2'], row['dj3'], row['ke_coupled'], row['ce_coupled'],
+                                            row['notes'], row['guid'])
+            self.sap_obj.PropLink.SetWeightAndMass(name, row['w'], row['m'], row['R1'], row['R2'], row['R3'])
+
+        self.sap_obj.SetPresentUnits(sap2000.UNITS['lb_ft_F'])
+
+        for index, row in changed_masses.iterrows():
+            self.sap_obj.FrameObj.SetMass(row['user_name'], row['mass'], True, 0)
+            geometry.set_member(row['user_name'], 'mass', row['mass'])
+
+        self.sap_obj.SetPresentUnits(previous_units)
+
+        props.frm_df = new_props.frm_df.copy()
+        props.link_df = new_props.link_df.copy()
+
+        return True
+
     def saveandrun(self, model_path, file_name='TestModel-001.sdb', anal_type='TIME_HISTORY'):
+        # anal_type is one case name or a list of them, e.g. one time history case per record, run together
 
         self.sap_obj.Analyze.SetRunCaseFlag('', False, True)
         self.sap_obj.Analyze.SetRunCaseFlag('MODAL', True)
-        self.sap_obj.Analyze.SetRunCaseFlag(anal_type, True)
+        for case in [anal_type] if isinstance(anal_type, str) else anal_type:
+            self.sap_obj.Analyze.SetRunCaseFlag(case, True)
 
         # save model
         model_path = ''.join([model_path, os.sep, file_name])
@@ -47,13 +197,20 @@ class Model:
 
     class Props:
 
+        mat_df = TableAttribute()
+        frm_df = TableAttribute()
+        link_df = TableAttribute()
+
         def __init__(self, sap_obj):
             self.sap_obj = sap_obj
             self.mdl_dof_df = pd.DataFrame(columns=[1, 2, 3, 4, 5, 6])
-            self.mat_df = pd.DataFrame(columns=['material_id', 'material', 'youngs', 'poisson', 't_coeff', 'weight'])
-            self.frm_df = pd.DataFrame(columns=['name', 'material', 'depth', 'width', 'mass'])
-            self.link_df = pd.DataFrame(columns=['name', 'dof', 'fixed', 'ke', 'ce', 'dj2', 'dj3',
-                                                 'ke_coupled', 'ce_coupled', 'notes', 'guid'])
+            self._mat_df = Table(['material_id', 'material', 'youngs', 'poisson', 't_coeff', 'weight'])
+            self._frm_df = Table(['name', 'material', 'depth', 'width', 'mass'])
+            self._link_df = Table(['name', 'dof', 'fixed', 'ke', 'ce', 'dj2', 'dj3',
+                                   'ke_coupled', 'ce_coupled', 'notes', 'guid'])
+
+            # present units each table was loaded into sap2000 in, e.g. {'frm_df': 1}, read back by Model.update
+            self.units = {}
 
         # Model properties methods
         def set_mdl_dof_df(self, dof='2-D'):
@@ -74,7 +231,7 @@ class Model:
         # Material properties methods
         def add_mat_df(self, mat_dict):
 
-            self.mat_df = self.mat_df = pd.concat([self.mat_df, pd.DataFrame([mat_dict])], ignore_index=True)
+            self._mat_df.append([mat_dict])
 
         def load_mat_df(self):
 
@@ -88,17 +245,20 @@ class Model:
 
         def gen_frm(self, frm1_col_stiff, frm1_bm_stiff, frm2_col_stiff, frm2_bm_stiff):
 
+            self.gen_frm_props([frm1_col_stiff, frm2_col_stiff], [frm1_bm_stiff, frm2_bm_stiff])
+
+        def gen_frm_props(self, col_stiff, bm_stiff):
+            # square column and beam sections for each frame, col_stiff and bm_stiff have one value per frame
+
             frm_dict_default = {'name': 'Default', 'material': 'STEEL', 'depth': 12,
                                 'width': 12, 'modifiers': [1, 1, 1, 1, 1, 1, 1, 1]}
 
             self.add_frm_df([frm_dict_default])
 
-            no_frames = 2
+            no_frames = len(col_stiff)
 
             frm_list = []
             for i in range(no_frames):
-                col_stiff = (frm1_col_stiff, frm2_col_stiff)
-                bm_stiff = (frm1_bm_stiff, frm2_bm_stiff)
                 m, k = (0, 0)
                 for j in range(2):
 
@@ -127,11 +287,12 @@ class Model:
         # Frame properties methods
         def add_frm_df(self, frm_list):
 
-            self.frm_df = pd.concat([self.frm_df, pd.DataFrame(frm_list)], ignore_index=True)
-
+            self._frm_df.append(frm_list)
 
         def load_frm_df(self):
 
+            self.units['frm_df'] = self.sap_obj.GetPresentUnits()
+
             for index, row in self.frm_df.iterrows():
                 self.sap_obj.PropFrame.SetRectangle(row['name'], row['material'],
                                                     row['depth'], row['width'])
@@ -150,11 +311,12 @@ class Model:
         # Link properties methods
         def add_link_df(self, link_dict):
 
-            self.link_df = pd.concat([self.link_df, pd.DataFrame([link_dict])], ignore_index=True)
-
+            self._link_df.append([link_dict])
 
         def load_link_df(self):
 
+            self.units['link_df'] = self.sap_obj.GetPresentUnits()
+
             for index, row in self.link_df.iterrows():
                 self.sap_obj.PropLink.SetLinear(row['name'], row['dof'], row['fixed'],
                                                 row['ke'], row['ce'], row['dj2'], row['dj3'],
@@ -166,119 +328,126 @@ class Model:
 
     class Geometry:
 
+        frm_df = TableAttribute()
+
         def __init__(self, sap_obj):
             self.sap_obj = sap_obj
 
-            self.frm_df = pd.DataFrame(columns=['xi', 'yi', 'zi', 'xj', 'yj', 'zj',
-                                                'name', 'is_single_joint', 'prop_name', 'user_name',
-                                                'csys', 'frm_i', 'frm_j', 'frm_type', 'frame_no',
-                                                'story_no', 'i_restraint', 'j_restraint', 'mass'])
+            self._frm_df = Table(['xi', 'yi', 'zi', 'xj', 'yj', 'zj',
+                                  'name', 'is_single_joint', 'prop_name', 'user_name',
+                                  'csys', 'frm_i', 'frm_j', 'frm_type', 'frame_no',
+                                  'story_no', 'i_restraint', 'j_restraint', 'mass'])
 
-        def add_frm_df(self, xi=None, yi=None, zi=None, xj=None, yj=None, zj=None,
-                       name='', prop_name=None, user_name=None, csys='Global',
-                       frm_type=None, frame_no=None, story_no=None, mass=None):
-
-            self.frm_df = pd.concat([self.frm_df, pd.DataFrame([{'xi': xi, 'yi': yi, 'zi': zi,
-                                                            'xj': xj, 'yj': yj, 'zj': zj,
-                                                            'name': name, 'prop_name': prop_name,
-                                                            'user_name': user_name, 'csys': csys,
-                                                            'frm_type': frm_type, 'frame_no': frame_no,
-                                                            'story_no': story_no, 'mass': mass}])],
-                                             ignore_index=True)
-
-        def gen_frm(self, no_frames=2, no_stories=10, frm_width=20, frm_height=20, frm_spacing=20,
-                    frm1_bm_weight=20, frm2_bm_weight=20):
-
-            def get_coords(frm_user_name=None, memb_end='i'):
-                x, y, z = (0, 0, 0)
-                if frm_user_name is None:
-                    x, y, z = (0, 0, 0)
-                if memb_end == 'i':
-                    self.frm_df.set_index('user_name', inplace=True)
-                    x, y, z = (self.frm_df.loc[frm_user_name, 'xi'],
-                               self.frm_df.loc[frm_user_name, 'yi'],
-                               self.frm_df.loc[frm_user_name, 'zi'])
-                    self.frm_df.reset_index(inplace=True)
-                elif memb_end == 'j':
-                    self.frm_df.set_index('user_name', inplace=True)
-                    x, y, z = (self.frm_df.loc[frm_user_name, 'xj'],
-                               self.frm_df.loc[frm_user_name, 'yj'],
-                               self.frm_df.loc[frm_user_name, 'zj'])
-                    self.frm_df.reset_index(inplace=True)
-                return x, y, z
-
-            def new_memb(i_coords=(0, 0, 0), length=1, frame_no=1, story_no=1,
-                         frm_type='col', left_or_right=1, props='Default', weight=0):
-
-                frm_df_args = dict.fromkeys(
-                        ['xi', 'yi', 'zi', 'xj', 'yj', 'zj',
-                         'prop_name', 'user_name', 'frm_type',
-                         'frame_no', 'story_no', 'mass'])
-
-                frm_df_args.update({'xi': i_coords[0], 'yi': i_coords[0], 'zi': i_coords[0]})
-
-                # calculate j_coord from given i_coords
-                j_coords = ()
-                if frm_type == 'col':
-
-                    weight = 0
+            # indexes kept up to date as members are added, row numbers are frm_df index labels
+            self.names = {}  # user_name: row
+            self.members = {}  # (frame_no, story_no, frm_type): [rows]
+            self.joints = {}  # joint name: (x, y, z)
+            self.joint_ends = {}  # joint name: [(row, 'i' or 'j')] of frame members
 
-                    j_coords = (i_coords[0], i_coords[1], i_coords[2] + length)
+        def index_member(self, index, user_name, frame_no, story_no, frm_type):
+            self.names[user_name] = index
+            self.members.setdefault((frame_no, story_no, frm_type), []).append(index)
 
-                elif frm_type == 'bm':
+        def set_joints(self, index, frm_i, frm_j):
+            # name the end joints of a frame member
+            for end, joint in (('i', frm_i), ('j', frm_j)):
+                self._frm_df.set(index, 'frm_' + end, joint)
+                self.joints.setdefault(joint, tuple(self._frm_df.get(index, axis + end) for axis in 'xyz'))
+                self.joint_ends.setdefault(joint, []).append((index, end))
 
-                    j_coords = (i_coords[0] + length, i_coords[1], i_coords[2])
+        def reindex(self):
+            # rebuild the indexes from the rows of frm_df, after it was assigned as a whole
+            self.names, self.members, self.joints, self.joint_ends = {}, {}, {}, {}
 
-                frm_df_args.update({'xi': i_coords[0], 'yi': i_coords[1], 'zi': i_coords[2]})
-                frm_df_args.update({'xj': j_coords[0], 'yj': j_coords[1], 'zj': j_coords[2]})
-
-                frm_df_args['prop_name'] = props
+            for index, row in self.frm_df.iterrows():
+                frame_no = row['frame_no'] if pd.notna(row['frame_no']) else None
+                self.index_member(index, row['user_name'], frame_no, row['story_no'], row['frm_type'])
 
-                frm_df_args['user_name'] = 'frm{}_st{}_{}{}'.format(frame_no, story_no, frm_type, left_or_right)
+                for end in ('i', 'j'):
+                    joint = row['frm_' + end]
+                    if pd.isna(joint):
+                        continue
+                    self.joints.setdefault(joint, tuple(row[axis + end] for axis in 'xyz'))
+                    if row['frm_type'] != 'link':
+                        self.joint_ends.setdefault(joint, []).append((index, end))
 
-                frm_df_args['frm_type'] = frm_type
+        def get_member(self, user_name, column):
+            return self._frm_df.get(self.names[user_name], column)
 
-                frm_df_args['frame_no'] = frame_no
+        def set_member(self, user_name, column, value):
+            self._frm_df.set(self.names[user_name], column, value)
 
-                frm_df_args['story_no'] = story_no
+        def get_end(self, user_name, memb_end='i'):
+            # x, y, z, and joint name of one end of a member
+            index = self.names[user_name]
+            return tuple(self._frm_df.get(index, column + memb_end) for column in ('x', 'y', 'z', 'frm_'))
 
-                frm_df_args['mass'] = weight / sap2000.GRAVITY / length
+        def add_frm_df(self, xi=None, yi=None, zi=None, xj=None, yj=None, zj=None,
+                       name='', prop_name=None, user_name=None, csys='Global',
+                       frm_type=None, frame_no=None, story_no=None, mass=None):
 
-                return frm_df_args
+            index = len(self._frm_df)
+            self.index_member(index, user_name, frame_no, story_no, frm_type)
+            self._frm_df.append([{'xi': xi, 'yi': yi, 'zi': zi,
+                                  'xj': xj, 'yj': yj, 'zj': zj,
+                                  'name': name, 'prop_name': prop_name,
+                                  'user_name': user_name, 'csys': csys,
+                                  'frm_type': frm_type, 'frame_no': frame_no,
+                                  'story_no': story_no, 'mass': mass}])
 
-            for i in range(no_frames):
+            return index
 
-                if i == 0:
-
-                    for j in range(no_stories):
-                        self.add_frm_df(**new_memb(i_coords=(0, 0, j * frm_height),
-                                                   length=frm_height, frm_type='col', frame_no=i + 1,
-                                                   left_or_right=1, story_no=j + 1,
-                                                   props='F{}_RECT_COL1'.format(i + 1)))
-                        self.add_frm_df(**new_memb(i_coords=(frm_width, 0, j * frm_height),
-                                                   length=frm_height, frm_type='col', frame_no=i + 1,
-                                                   left_or_right=2, story_no=j + 1,
-                                                   props='F{}_RECT_COL1'.format(i + 1)))
-                        self.add_frm_df(**new_memb(i_coords=get_coords('frm{}_st{}_col{}'.format(i + 1, j + 1, 1),
-                                                                       memb_end='j'), length=frm_height, frm_type='bm',
-                                                   frame_no=i + 1, left_or_right=1, props='F{}_RECT_BM1'.format(i + 1),
-                                                   story_no=j + 1, weight=frm1_bm_weight))
-
-                if no_frames == 2 and i == 1:
-
-                    for j in range(no_stories):
-                        self.add_frm_df(**new_memb(i_coords=(frm_width + frm_spacing, 0, j * frm_height),
-                                                   length=frm_height, frm_type='col', frame_no=i + 1,
-                                                   left_or_right=1, story_no=j + 1,
-                                                   props='F{}_RECT_COL1'.format(i + 1)))
-                        self.add_frm_df(**new_memb(i_coords=(2 * frm_width + frm_spacing, 0, j * frm_height),
-                                                   length=frm_height, frm_type='col', frame_no=i + 1,
-                                                   left_or_right=2, story_no=j + 1,
-                                                   props='F{}_RECT_COL1'.format(i + 1)))
-                        self.add_frm_df(**new_memb(i_coords=get_coords('frm{}_st{}_col{}'.format(i + 1, j + 1, 1),
-                                                                       memb_end='j'), length=frm_height, frm_type='bm',
-                                                   frame_no=i + 1, left_or_right=1, props='F{}_RECT_BM1'.format(i + 1),
-                                                   story_no=j + 1, weight=frm2_bm_weight))
+        def gen_frm(self, no_frames=2, no_stories=10, frm_width=20, frm_height=20, frm_spacing=20,
+                    frm1_bm_weight=20, frm2_bm_weight=20, no_bays=1, bm_weight=None):
+            # frames side by side along x, each no_bays bays of frm_width, with frm_spacing between frames
+            # frm_height is one height for every story or a list of story heights from the ground up
+            # bm_weight is the weight of each story of each frame, a number, one value per frame, or a
+            # (no_frames, no_stories) array, spread evenly over the story beams; by default frame 1 weighs
+            # frm1_bm_weight per story and every other frame frm2_bm_weight
+            # members are ordered by frame, story, columns left to right, then beams left to right
+
+            heights = np.broadcast_to(np.asarray(frm_height, dtype=float), (no_stories,))
+            elevations = np.concatenate([[0], np.cumsum(heights)])
+
+            if bm_weight is None:
+                bm_weight = [frm1_bm_weight] + [frm2_bm_weight] * (no_frames - 1)
+            bm_weight = np.asarray(bm_weight, dtype=float)
+            if bm_weight.ndim == 1:
+                bm_weight = bm_weight[:, np.newaxis]
+            bm_weight = np.broadcast_to(bm_weight, (no_frames, no_stories))
+
+            # grid of (frame, story, position), columns take positions 0..no_bays and beams 0..no_bays - 1
+            frame, story, position = [index.ravel() for index in np.meshgrid(
+                    np.arange(no_frames), np.arange(no_stories), np.arange(no_bays + 1), indexing='ij')]
+            is_bm = position < no_bays
+            bm = np.concatenate([np.zeros(len(frame), dtype=bool), np.ones(is_bm.sum(), dtype=bool)])
+            frame = np.concatenate([frame, frame[is_bm]])
+            story = np.concatenate([story, story[is_bm]])
+            position = np.concatenate([position, position[is_bm]])
+
+            order = np.lexsort((position, bm, story, frame))
+            frame, story, position, bm = frame[order], story[order], position[order], bm[order]
+
+            xi = (frame * (no_bays * frm_width + frm_spacing) + position * frm_width).astype(float)
+            xj = xi + np.where(bm, frm_width, 0)
+            zi = np.where(bm, elevations[story + 1], elevations[story])
+            zj = elevations[story + 1]
+
+            frm_type = np.where(bm, 'bm', 'col')
+            frame_no, story_no = frame + 1, story + 1
+            user_name = ('frm' + pd.Series(frame_no).astype(str) + '_st' + pd.Series(story_no).astype(str) + '_' +
+                         pd.Series(frm_type) + pd.Series(position + 1).astype(str))
+            prop_name = 'F' + pd.Series(frame_no).astype(str) + np.where(bm, '_RECT_BM1', '_RECT_COL1')
+            mass = np.where(bm, bm_weight[frame, story] / sap2000.GRAVITY / (no_bays * frm_width), 0)
+
+            for index, member in enumerate(zip(user_name, frame_no, story_no, frm_type), len(self._frm_df)):
+                self.index_member(index, *member)
+
+            zero = np.zeros(len(frame))
+            self._frm_df.extend(pd.DataFrame({'xi': xi, 'yi': zero, 'zi': zi, 'xj': xj, 'yj': zero, 'zj': zj,
+                                              'name': '', 'prop_name': prop_name, 'user_name': user_name,
+                                              'csys': 'Global', 'frm_type': frm_type, 'frame_no': frame_no,
+                                              'story_no': story_no, 'mass': mass}))
 
         def load_frm_df(self):
 
@@ -294,12 +463,7 @@ class Model:
 
                 frm_i, frm_j, run = self.sap_obj.FrameObj.GetPoints(row['user_name'], '', '')
 
-                self.frm_df.set_index('user_name', inplace=True)
-
-                self.frm_df.loc[row['user_name'], 'frm_i'] = frm_i
-                self.frm_df.loc[row['user_name'], 'frm_j'] = frm_j
-
-                self.frm_df.reset_index(inplace=True)
+                self.set_joints(index, frm_i, frm_j)
 
                 # Add mass to frame object
 
@@ -313,59 +477,50 @@ class Model:
                         name='', is_single_joint=False, prop_name=None, user_name=None,
                         frm_type=None, story_no=None, csys='Global'):
 
-            self.frm_df = pd.concat([self.frm_df, pd.DataFrame(
-                                    [{'frm_i': frm_i, 'frm_j': frm_j, 'xi': xi, 'yi': yi, 'zi': zi,
-                                   'xj': xj, 'yj': yj, 'zj': zj,
-                                   'name': name, 'is_single_joint': is_single_joint,
-                                   'prop_name': prop_name, 'user_name': user_name,
-                                   'frm_type': frm_type, 'story_no': story_no,
-                                   'csys': csys}])],
-                            ignore_index=True)
-
-        def new_link(self, story_no=0, props='Default'):
-
-            def get_coords(frm_user_name, memb_end='i'):
+            index = len(self._frm_df)
+            self.index_member(index, user_name, None, story_no, frm_type)
+            for joint, coords in ((frm_i, (xi, yi, zi)), (frm_j, (xj, yj, zj))):
+                if joint is not None:
+                    self.joints.setdefault(joint, coords)
 
-                x, y, z, frm_i_or_j = [None, None, None, None]
+            self._frm_df.append([{'frm_i': frm_i, 'frm_j': frm_j, 'xi': xi, 'yi': yi, 'zi': zi,
+                                  'xj': xj, 'yj': yj, 'zj': zj,
+                                  'name': name, 'is_single_joint': is_single_joint,
+                                  'prop_name': prop_name, 'user_name': user_name,
+                                  'frm_type': frm_type, 'story_no': story_no,
+                                  'csys': csys}])
 
-                if memb_end == 'i':
-                    self.frm_df.set_index('user_name', inplace=True)
-                    frm_i_or_j, x, y, z = (self.frm_df.loc[frm_user_name, 'frm_i'],
-                                           self.frm_df.loc[frm_user_name, 'xi'],
-                                           self.frm_df.loc[frm_user_name, 'yi'],
-                                           self.frm_df.loc[frm_user_name, 'zi'])
-                    self.frm_df.reset_index(inplace=True)
-                elif memb_end == 'j':
-                    self.frm_df.set_index('user_name', inplace=True)
-                    frm_i_or_j, x, y, z = (self.frm_df.loc[frm_user_name, 'frm_j'],
-                                           self.frm_df.loc[frm_user_name, 'xj'],
-                                           self.frm_df.loc[frm_user_name, 'yj'],
-                                           self.frm_df.loc[frm_user_name, 'zj'])
-                    self.frm_df.reset_index(inplace=True)
+            return index
 
-                return x, y, z, frm_i_or_j
+        def new_link(self, story_no=0, props='Default', frame_no=1, user_name='Default'):
+            # link between frame_no and the next frame at story_no, counted from 1 at the ground, the top story
+            # when story_no is 0
 
-            story = None
+            # stories of the frame_no frame that have beams, from the ground up
+            stories = sorted(story for frame, story, frm_type in self.members
+                             if frame == frame_no and frm_type == 'bm')
 
-            if story_no == 0:
+            if not stories:
+                raise ValueError('Frame {} has no beam stories to link'.format(frame_no))
 
-                story = self.frm_df[['frame_no', 'story_no', 'zi', 'frm_type']].sort_values('zi', ascending=False).loc[
-                    (self.frm_df['frame_no'] == 1) & (self.frm_df['frm_type'] == 'bm'), 'story_no'].iloc[0]
+            if not 0 <= story_no <= len(stories):
+                raise ValueError('Frame {} has no story {} to link, it has {} stories'.format(frame_no, story_no,
+                                                                                              len(stories)))
 
-            elif story_no > 0:
+            story = stories[story_no - 1]
 
-                story = self.frm_df[['frame_no', 'story_no', 'zi', 'frm_type']].sort_values('zi', ascending=True).loc[
-                    (self.frm_df['frame_no'] == 1) & (self.frm_df['frm_type'] == 'bm'), 'story_no'].iloc[story_no]
+            # the link runs from the right end of the last beam of frame_no to the left end of the first beam of
+            # the next frame
+            last_bay = max(self.members[(frame_no, story, 'bm')], key=lambda index: self._frm_df.get(index, 'xj'))
+            frm_user_name_1 = self._frm_df.get(last_bay, 'user_name')
+            frm_user_name_2 = 'frm{}_st{}_bm{}'.format(frame_no + 1, story, 1)
 
-            frm_user_name_1 = 'frm{}_st{}_bm{}'.format(1, story, 1)  # this obtains the name of the top story on frm1
-            frm_user_name_2 = 'frm{}_st{}_bm{}'.format(2, story, 1)  # this obtains the name of the top story on frm2
+            xi, yi, zi, frm_i = self.get_end(frm_user_name_1, memb_end='j')
+            xj, yj, zj, frm_j = self.get_end(frm_user_name_2, memb_end='i')
 
-            xi, yi, zi, frm_i = get_coords(frm_user_name_1, memb_end='j')
-            xj, yj, zj, frm_j = get_coords(frm_user_name_2, memb_end='i')
-
-            self.add_link_df(frm_i=frm_i, frm_j=frm_j, xi=xi, yi=yi, zi=zi, xj=xj, yj=yi, zj=zj,
+            self.add_link_df(frm_i=frm_i, frm_j=frm_j, xi=xi, yi=yi, zi=zi, xj=xj, yj=yj, zj=zj,
                              name='', is_single_joint=False, prop_name=props,
-                             user_name='Default', csys='Global', frm_type='link', story_no=story)
+                             user_name=user_name, csys='Global', frm_type='link', story_no=story)
 
         def load_link_df(self):
 
@@ -379,11 +534,34 @@ class Model:
 
             self.sap_obj.SetPresentUnits(previous_units)
 
+        def number_joints(self, tol=1e-6):
+            # name frame joints the way sap2000 does when frames are added by coordinates: sequentially, in order
+            # of creation, reusing the name of any existing joint at the same location
+
+            self.joints, self.joint_ends = {}, {}
+
+            # joints hashed on coordinates rounded to tol
+            names = {}
+
+            def joint_name(x, y, z):
+                key = (round(x / tol), round(y / tol), round(z / tol))
+                if key not in names:
+                    names[key] = str(len(names) + 1)
+                return names[key]
+
+            for index, row in self.frm_df.loc[self.frm_df['frm_type'] != 'link'].iterrows():
+                self.set_joints(index, joint_name(row['xi'], row['yi'], row['zi']),
+                                joint_name(row['xj'], row['yj'], row['zj']))
+
+            return self.joints
+
         def add_restraints_df(self, name=None, value=None):
 
-            self.frm_df.loc[self.frm_df['frm_i'] == name, 'i_restraint'] = {'i_restraint': value}
+            for index, end in self.joint_ends.get(name, []):
+                if end == 'i':
+                    self._frm_df.set(index, 'i_restraint', value)
 
-        def set_restraints(self, restraint_type='pinned'):
+        def gen_restraints(self, restraint_type='pinned'):
 
             restraints = self.frm_df.loc[(self.frm_df['frm_type'] == 'col') & (self.frm_df['story_no'] == 1), 'frm_i']
 
@@ -397,37 +575,89 @@ class Model:
 
             for joint_name in restraints:
                 self.add_restraints_df(joint_name, value)
+
+            return restraints, value
+
+        def set_restraints(self, restraint_type='pinned'):
+
+            restraints, value = self.gen_restraints(restraint_type)
+
+            for joint_name in restraints:
                 self.sap_obj.PointObj.SetRestraint(joint_name, value)
 
+            return restraints
+
+        def set_group(self, name, joints=(), frames=(), links=()):
+            # define a group of joints, frames, and links by name, e.g. the objects results are read for
+            self.sap_obj.GroupDef.SetGroup(name)
+
+            for joint_name in joints:
+                self.sap_obj.PointObj.SetGroupAssign(joint_name, name)
+
+            for frame_name in frames:
+                self.sap_obj.FrameObj.SetGroupAssign(frame_name, name)
+
+            for link_name in links:
+                self.sap_obj.LinkObj.SetGroupAssign(link_name, name)
+
     class Loads:
 
         def __init__(self, sap_obj):
             self.sap_obj = sap_obj
 
+            # every function and case definition loaded, in order, so two load definitions can be compared
+            self.defined = []
+
         def load_time_history(self, name='el_centro', file_name=os.getcwd() + r'\support\el_centro.txt',
                               headlines=0, pre_chars=0, points_per_line=3, value_type=2, free_format=False,
                               number_fixed=10):
+            self.defined.append(('load_time_history', name, file_name, headlines, pre_chars, points_per_line,
+                                 value_type, free_format, number_fixed))
             self.sap_obj.Func.FuncTH.SetFromFile_1(name, file_name, headlines, pre_chars, points_per_line,
                                                    value_type, free_format, number_fixed)
 
-        def set_time_history(self):
-            self.load_time_history()
-            self.sap_obj.LoadCases.ModHistLinear.SetCase('TIME_HISTORY')
-            self.sap_obj.LoadCases.ModHistLinear.SetDampConstant('TIME_HISTORY', 0)
-            self.sap_obj.LoadCases.ModHistLinear.SetLoads('TIME_HISTORY', 1, ['Accel'], ['U1'], ['el_centro'],
+        def load_th_user(self, name, time, values):
+            # user time history, e.g. a record read with groundmotion.load
+            time = np.asarray(time, dtype=float).tolist()
+            values = np.asarray(values, dtype=float).tolist()
+            self.defined.append(('load_th_user', name, time, values))
+            self.sap_obj.Func.FuncTH.SetUser(name, len(time), time, values)
+
+        def set_time_history(self, name='TIME_HISTORY', func=None, n_steps=2400, dt=0.005, damp=0):
+            # func names a function already loaded with load_th_user, otherwise el_centro is loaded from support
+            self.defined.append(('set_time_history', name, func, n_steps, dt, damp))
+            if func is None:
+                self.load_time_history()
+                func = 'el_centro'
+
+            self.sap_obj.LoadCases.ModHistLinear.SetCase(name)
+            self.sap_obj.LoadCases.ModHistLinear.SetDampConstant(name, damp)
+            self.sap_obj.LoadCases.ModHistLinear.SetLoads(name, 1, ['Accel'], ['U1'], [func],
                                                           [sap2000.GRAVITY], [1], [0], ['Global'], [0])
-            self.sap_obj.LoadCases.ModHistLinear.SetModalCase('TIME_HISTORY', 'MODAL')
-            self.sap_obj.LoadCases.ModHistLinear.SetMotionType('TIME_HISTORY', 1)
-            self.sap_obj.LoadCases.ModHistLinear.SetTimeStep('TIME_HISTORY', 2400, 0.005)
+            self.sap_obj.LoadCases.ModHistLinear.SetModalCase(name, 'MODAL')
+            self.sap_obj.LoadCases.ModHistLinear.SetMotionType(name, 1)
+            self.sap_obj.LoadCases.ModHistLinear.SetTimeStep(name, n_steps, dt)
 
         def load_rsa(self):
+            self.defined.append(('load_rsa',))
             self.sap_obj.Func.FuncRS.SetIBC2012('custom_rsa', 2, 0, 0, '', 1.5, 0.75, 8, 4, 0, 0, 0.05)
 
-        def set_rsa(self):
-            self.load_rsa()
+        def load_rs_user(self, name, periods, values, damp=0.05):
+            # user spectrum, e.g. the pseudo-accelerations in g from groundmotion.spectrum
+            self.defined.append(('load_rs_user', name, [float(period) for period in periods],
+                                 [float(value) for value in values], damp))
+            self.sap_obj.Func.FuncRS.SetUser(name, len(periods), list(periods), list(values), damp)
+
+        def set_rsa(self, func=None):
+            # func names a spectrum already loaded with load_rs_user, otherwise the IBC2012 spectrum is used
+            self.defined.append(('set_rsa', func))
+            if func is None:
+                self.load_rsa()
+                func = 'custom_rsa'
+
             self.sap_obj.LoadCases.ResponseSpectrum.SetCase('RSA')
             self.sap_obj.LoadCases.ResponseSpectrum.SetDampConstant('RSA', 0.05)
-            self.sap_obj.LoadCases.ResponseSpectrum.SetLoads('RSA', 1, ['U1'], ['custom_rsa'],
+            self.sap_obj.LoadCases.ResponseSpectrum.SetLoads('RSA', 1, ['U1'], [func],
                                                              [sap2000.GRAVITY], ['Global'], [0])
             self.sap_obj.LoadCases.ResponseSpectrum.SetModalCase('RSA', 'MODAL')
             self.sap_obj.LoadCases.ResponseSpectrum.SetModalComb_1('RSA', 1)
@@ -0,0 +1,812 @@
+import numpy as np
+import pandas as pd
+from math import pi
+import sap2000
+
+# %% UNIT CONVERSIONS
+# the native solver works internally in lb_in_F, these map every sap2000 unit system to its force in lb and its
+# length in inches
+
+FORCE_LB = {
+    1: 1.0, 2: 1.0, 3: 1000.0, 4: 1000.0,
+    5: 224.8089431, 6: 224.8089431, 7: 2.204622622, 8: 2.204622622,
+    9: 0.2248089431, 10: 0.2248089431, 11: 2204.622622, 12: 2204.622622,
+    13: 224.8089431, 14: 2.204622622, 15: 0.2248089431, 16: 2204.622622}
+
+LENGTH_IN = {
+    1: 1.0, 2: 12.0, 3: 1.0, 4: 12.0,
+    5: 1 / 25.4, 6: 1000 / 25.4, 7: 1 / 25.4, 8: 1000 / 25.4,
+    9: 1 / 25.4, 10: 1000 / 25.4, 11: 1 / 25.4, 12: 1000 / 25.4,
+    13: 10 / 25.4, 14: 10 / 25.4, 15: 10 / 25.4, 16: 10 / 25.4}
+
+# load_frm_df and load_link_df always push geometry and frame masses in lb_ft_F
+GEOMETRY_UNITS = sap2000.UNITS['lb_ft_F']
+
+# 2-D models are built in the XZ plane, these are the active [UX, UY, UZ, RX, RY, RZ] degrees of freedom
+PLANAR_DOF = [True, False, True, False, True, False]
+
+# link ends are matched to frame joints within this distance, in inches
+JOINT_TOL = 1e-6
+
+
+def unit_factors(units):
+    return FORCE_LB[units], LENGTH_IN[units]
+
+
+# %% RESPONSE SPECTRA
+
+def ibc2012(periods, ss=1.5, s1=0.75, tl=8, site_class=4, fa=0, fv=0):
+    # spectral acceleration in g of the IBC2012 design spectrum, with the same arguments as FuncRS.SetIBC2012
+    # site_class runs from 1 (A) to 6 (F), fa and fv are only used for site class F
+
+    ss_points = [0.25, 0.5, 0.75, 1.0, 1.25]
+    s1_points = [0.1, 0.2, 0.3, 0.4, 0.5]
+
+    fa_table = {1: [0.8] * 5, 2: [1.0] * 5, 3: [1.2, 1.2, 1.1, 1.0, 1.0],
+                4: [1.6, 1.4, 1.2, 1.1, 1.0], 5: [2.5, 1.7, 1.2, 0.9, 0.9]}
+    fv_table = {1: [0.8] * 5, 2: [1.0] * 5, 3: [1.7, 1.6, 1.5, 1.4, 1.3],
+                4: [2.4, 2.0, 1.8, 1.6, 1.5], 5: [3.5, 3.2, 2.8, 2.4, 2.4]}
+
+    if site_class != 6:
+        fa = np.interp(ss, ss_points, fa_table[site_class])
+        fv = np.interp(s1, s1_points, fv_table[site_class])
+
+    sds = 2 / 3 * fa * ss
+    sd1 = 2 / 3 * fv * s1
+
+    t_0 = 0.2 * sd1 / sds
+    t_s = sd1 / sds
+
+    periods = np.asarray(periods, dtype=float)
+
+    with np.errstate(divide='ignore'):
+        sa = np.where(periods < t_0, sds * (0.4 + 0.6 * periods / t_0),
+                      np.where(periods <= t_s, sds,
+                               np.where(periods <= tl, sd1 / periods, sd1 * tl / periods ** 2)))
+
+    return sa
+
+
+def cqc_coefficients(omega, damping):
+    # CQC correlation coefficients for modes sharing the same damping ratio
+
+    r = omega[np.newaxis, :] / omega[:, np.newaxis]
+
+    return (8 * damping ** 2 * (1 + r) * r ** 1.5) / ((1 - r ** 2) ** 2 + 4 * damping ** 2 * r * (1 + r) ** 2)
+
+
+# %% ELEMENT MATRICES
+
+def frame_stiffness(youngs, shear_mod, area, i33, shear_area, xi, zi, xj, zj):
+    # 6x6 stiffness of a shear-deformable frame in the XZ plane, ordered [UX, UZ, RY] at joint i then joint j
+
+    length = np.hypot(xj - xi, zj - zi)
+    c, s = (xj - xi) / length, (zj - zi) / length
+
+    phi = 12 * youngs * i33 / (shear_mod * shear_area * length ** 2) if shear_area > 0 else 0
+    ea = youngs * area / length
+    ei = youngs * i33 / (length ** 3 * (1 + phi))
+
+    k_local = np.array([
+        [ea, 0, 0, -ea, 0, 0],
+        [0, 12 * ei, 6 * ei * length, 0, -12 * ei, 6 * ei * length],
+        [0, 6 * ei * length, (4 + phi) * ei * length ** 2, 0, -6 * ei * length, (2 - phi) * ei * length ** 2],
+        [-ea, 0, 0, ea, 0, 0],
+        [0, -12 * ei, -6 * ei * length, 0, 12 * ei, -6 * ei * length],
+        [0, 6 * ei * length, (2 - phi) * ei * length ** 2, 0, -6 * ei * length, (4 + phi) * ei * length ** 2]])
+
+    # rotations in the local formulation are counterclockwise in the XZ plane, which is -RY
+    t_node = np.array([[c, s, 0], [-s, c, 0], [0, 0, -1]])
+    t = np.zeros((6, 6))
+    t[:3, :3] = t_node
+    t[3:, 3:] = t_node
+
+    return t.T @ k_local @ t
+
+
+def link_stiffness(k_axial, k_shear, xi, zi, xj, zj):
+    # 6x6 stiffness of a two-joint linear link with U1 along i-j and U2 in the XZ plane
+
+    length = np.hypot(xj - xi, zj - zi)
+    c, s = ((xj - xi) / length, (zj - zi) / length) if length > 0 else (1, 0)
+
+    axis_1 = np.array([c, s, 0])
+    axis_2 = np.array([-s, c, 0])
+
+    k_node = k_axial * np.outer(axis_1, axis_1) + k_shear * np.outer(axis_2, axis_2)
+
+    return np.block([[k_node, -k_node], [-k_node, k_node]])
+
+
+# %% ASSEMBLY
+
+class NativeModel:
+
+    def __init__(self, model_obj, props_units=sap2000.UNITS['lb_in_F']):
+
+        dof = next(iter(model_obj.props.mdl_dof_df.values.tolist()), None)
+
+        if dof is None or [bool(flag) for flag in dof] != PLANAR_DOF:
+            raise ValueError('The native solver only supports 2-D models in the XZ plane, the model has active '
+                             'degrees of freedom {}'.format(dof))
+
+        props = model_obj.props
+        frm_df = model_obj.geometry.frm_df
+
+        # joints are numbered without sap2000 when the frames were never loaded into a model
+        if frm_df.loc[frm_df['frm_type'] != 'link', ['frm_i', 'frm_j']].isna().any(axis=None):
+            model_obj.geometry.number_joints()
+            frm_df = model_obj.geometry.frm_df
+
+        force, length = unit_factors(props_units)
+        geo_force, geo_length = unit_factors(GEOMETRY_UNITS)
+        gravity = sap2000.GRAVITY * 12
+
+        self.joints = {}
+        for index, row in frm_df.loc[frm_df['frm_type'] != 'link'].iterrows():
+            self.joints.setdefault(row['frm_i'], (row['xi'] * geo_length, row['zi'] * geo_length))
+            self.joints.setdefault(row['frm_j'], (row['xj'] * geo_length, row['zj'] * geo_length))
+
+        self.joint_index = dict((name, i) for i, name in enumerate(self.joints))
+
+        # joints hashed on coordinates rounded to JOINT_TOL, the first joint at a location keeps it
+        self.joint_at = {}
+        for name, (x, z) in self.joints.items():
+            self.joint_at.setdefault((round(x / JOINT_TOL), round(z / JOINT_TOL)), name)
+
+        n_dof = 3 * len(self.joints)
+        self.k = np.zeros((n_dof, n_dof))
+        self.m = np.zeros(n_dof)
+        self.restrained = np.zeros(n_dof, dtype=bool)
+
+        mat_df = props.mat_df.set_index('material')
+        sec_df = props.frm_df.drop_duplicates('name', keep='last').set_index('name')
+        link_df = props.link_df.drop_duplicates('name', keep='last').set_index('name')
+
+        for index, row in frm_df.loc[frm_df['frm_type'] != 'link'].iterrows():
+            sec = sec_df.loc[row['prop_name']]
+            mat = mat_df.loc[sec['material']]
+
+            youngs = mat['youngs'] * force / length ** 2
+            shear_mod = youngs / (2 * (1 + mat['poisson']))
+            depth, width = sec['depth'] * length, sec['width'] * length
+            area = depth * width
+
+            xi, zi = self.joints[row['frm_i']]
+            xj, zj = self.joints[row['frm_j']]
+
+            k_e = frame_stiffness(youngs, shear_mod, area, width * depth ** 3 / 12, 5 / 6 * area, xi, zi, xj, zj)
+            self.add_element(k_e, row['frm_i'], row['frm_j'])
+
+            # line masses are lumped half at each end in the translational degrees of freedom
+            memb_length = np.hypot(xj - xi, zj - zi)
+            line_mass = mat['weight'] * force / length ** 3 * area / gravity
+            if pd.notna(row['mass']):
+                line_mass += row['mass'] * geo_force / geo_length ** 2
+
+            self.add_mass(line_mass * memb_length / 2, row['frm_i'], row['frm_j'])
+
+            if isinstance(row['i_restraint'], (list, tuple)):
+                self.add_restraint(row['frm_i'], row['i_restraint'])
+            if isinstance(row['j_restraint'], (list, tuple)):
+                self.add_restraint(row['frm_j'], row['j_restraint'])
+
+        # link user_name: (joint_i, joint_j, axial stiffness, shear stiffness)
+        self.links = {}
+
+        for index, row in frm_df.loc[frm_df['frm_type'] == 'link'].iterrows():
+            link = link_df.loc[row['prop_name']]
+
+            # U3, R1, and R2 are out of the XZ plane, R3 is the only in-plane one the solver has no stiffness for
+            if any(link['dof'][5:]):
+                raise ValueError('Link {} with property {} has an R3 degree of freedom, the native solver only '
+                                 'supports U1 and U2'.format(row['user_name'], row['prop_name']))
+
+            joint_i = self.find_joint(row['xi'] * geo_length, row['zi'] * geo_length)
+            joint_j = self.find_joint(row['xj'] * geo_length, row['zj'] * geo_length)
+
+            ke = [k if flag else 0 for k, flag in zip(link['ke'], link['dof'])]
+
+            k_axial, k_shear = ke[0] * force / length, ke[1] * force / length
+            self.add_element(link_stiffness(k_axial, k_shear, *self.joints[joint_i], *self.joints[joint_j]),
+                             joint_i, joint_j)
+            self.links[row['user_name']] = (joint_i, joint_j, k_axial, k_shear)
+
+            self.add_mass(link.get('m', 0) * force / length / 2, joint_i, joint_j)
+
+        self.free = ~self.restrained
+        self.dynamic = self.free & (self.m > 0)
+        self.static = self.free & (self.m <= 0)
+
+    def dofs(self, joint_name):
+        i = self.joint_index[joint_name]
+        return [3 * i, 3 * i + 1, 3 * i + 2]
+
+    def find_joint(self, x, z):
+        try:
+            return self.joint_at[(round(x / JOINT_TOL), round(z / JOINT_TOL))]
+        except KeyError:
+            raise KeyError('No joint at x={}, z={}'.format(x, z)) from None
+
+    def add_element(self, k_e, joint_i, joint_j):
+        idx = self.dofs(joint_i) + self.dofs(joint_j)
+        self.k[np.ix_(idx, idx)] += k_e
+
+    def add_mass(self, mass, joint_i, joint_j):
+        for joint_name in (joint_i, joint_j):
+            ux, uz, ry = self.dofs(joint_name)
+            self.m[[ux, uz]] += mass
+
+    def add_restraint(self, joint_name, value):
+        ux, uz, ry = self.dofs(joint_name)
+        # restraint flags follow [UX, UY, UZ, RX, RY, RZ]
+        self.restrained[[ux, uz, ry]] |= [bool(value[0]), bool(value[2]), bool(value[4])]
+
+    def condense(self):
+        # statically condense the massless degrees of freedom, returning the dynamic stiffness and the matrix that
+        # recovers massless displacements from dynamic ones
+
+        k_dd = self.k[np.ix_(self.dynamic, self.dynamic)]
+        k_ds = self.k[np.ix_(self.dynamic, self.static)]
+        k_ss = self.k[np.ix_(self.static, self.static)]
+
+        recover = -np.linalg.solve(k_ss, k_ds.T) if k_ss.size else np.zeros((0, k_dd.shape[0]))
+
+        return k_dd + k_ds @ recover, recover
+
+    def expand(self, u_dynamic, recover):
+        # full displacement vectors from dynamic displacements, one column per vector
+
+        u = np.zeros((self.k.shape[0], u_dynamic.shape[1]))
+        u[self.dynamic] = u_dynamic
+        u[self.static] = recover @ u_dynamic
+
+        return u
+
+    def modal(self, n_modes=12):
+
+        k_cond, recover = self.condense()
+        m_dyn = self.m[self.dynamic]
+
+        scale = 1 / np.sqrt(m_dyn)
+        eigen_value, psi = np.linalg.eigh(k_cond * scale[:, np.newaxis] * scale[np.newaxis, :])
+
+        n_modes = min(n_modes, len(eigen_value))
+
+        # mass-normalized mode shapes over the dynamic degrees of freedom
+        return eigen_value[:n_modes], psi[:, :n_modes] * scale[:, np.newaxis], recover
+
+    def influence(self, direction=0):
+        # unit ground displacement in UX (direction=0) or UZ (direction=1) over the dynamic degrees of freedom
+        r = np.zeros(self.k.shape[0])
+        r[direction::3] = 1
+        return r[self.dynamic]
+
+
+# %% TIME INTEGRATION
+
+def newmark(m, k, c, ag, dt, influence=None, outputs=None, history=False, beta=0.25, gamma=0.5):
+    # integrate a batch of linear systems under ground acceleration with the Newmark-beta method, defaulting to
+    # the unconditionally stable average acceleration scheme
+    # m holds lumped masses (..., n), k and c are (..., n, n), ag is (..., n_steps + 1) and the leading axes of
+    # every argument broadcast against each other into the batch shape
+    # outputs maps names to (..., r, 2 * n) matrices applied to the stacked [u, v] at every step, whose peak
+    # absolute values are returned along with the peak displacements
+
+    m = np.asarray(m, dtype=float)
+    k = np.asarray(k, dtype=float)
+    c = np.asarray(c, dtype=float)
+    ag = np.asarray(ag, dtype=float)
+    n = m.shape[-1]
+
+    influence = np.ones(n) if influence is None else np.asarray(influence, dtype=float)
+    outputs = {} if outputs is None else outputs
+
+    batch = np.broadcast_shapes(m.shape[:-1], k.shape[:-2], c.shape[:-2], ag.shape[:-1])
+    m_mat = m[..., np.newaxis] * np.eye(n)
+    eye = np.broadcast_to(np.eye(n), batch + (n, n))
+
+    a_1 = m_mat / (beta * dt ** 2) + gamma / (beta * dt) * c
+    a_2 = m_mat / (beta * dt) + (gamma / beta - 1) * c
+    a_3 = (1 / (2 * beta) - 1) * m_mat + dt * (gamma / (2 * beta) - 1) * c
+    k_hat_inv = np.linalg.inv(k + a_1)
+
+    # every step is linear in the state x = [u, v, a], so the whole Newmark update collapses into x <- A x + b ag
+    # with one batched matrix-vector product per step
+    du = np.concatenate(np.broadcast_arrays(k_hat_inv @ a_1 - eye, k_hat_inv @ a_2, k_hat_inv @ a_3), axis=-1)
+    u_row = du + np.concatenate([eye, 0 * eye, 0 * eye], axis=-1)
+    v_row = gamma / (beta * dt) * du + np.concatenate(
+        [0 * eye, (1 - gamma / beta) * eye, dt * (1 - gamma / (2 * beta)) * eye], axis=-1)
+    a_row = du / (beta * dt ** 2) - np.concatenate(
+        [0 * eye, eye / (beta * dt), (1 / (2 * beta) - 1) * eye], axis=-1)
+    transition = np.concatenate([u_row, v_row, a_row], axis=-2)
+
+    load = -(m * influence)
+    b_u = (k_hat_inv @ load[..., np.newaxis])[..., 0]
+    b = np.concatenate(np.broadcast_arrays(b_u, gamma / (beta * dt) * b_u, b_u / (beta * dt ** 2)), axis=-1)
+
+    # peak outputs are tracked through one stacked matrix acting on the state, displacements first
+    names = ['displ'] + list(outputs)
+    sizes = [n] + [np.shape(t)[-2] for t in outputs.values()]
+    tracked = np.concatenate([np.concatenate([eye, 0 * eye], axis=-1)] + [
+        np.broadcast_to(t, batch + np.shape(t)[-2:]) for t in outputs.values()], axis=-2)
+    tracked = np.concatenate([tracked, np.zeros(tracked.shape[:-1] + (n,))], axis=-1)
+
+    # the loop runs with the flattened batch along the last, contiguous axis
+    size = int(np.prod(batch))
+    transition = np.ascontiguousarray(np.moveaxis(np.broadcast_to(transition, batch + (3 * n, 3 * n)).reshape(
+        size, 3 * n, 3 * n), 0, -1))
+    tracked = np.ascontiguousarray(np.moveaxis(tracked.reshape(size, sum(sizes), 3 * n), 0, -1))
+    b = np.ascontiguousarray(np.broadcast_to(b, batch + (3 * n,)).reshape(size, 3 * n).T)
+    ag = np.ascontiguousarray(np.broadcast_to(ag, batch + ag.shape[-1:]).reshape(size, -1).T)
+
+    x = np.zeros((3 * n, size))
+    x[2 * n:] = -influence[:, np.newaxis] * ag[0]
+    peak = np.zeros((sum(sizes), size))
+    histories = [x]
+
+    for i in range(1, ag.shape[0]):
+        x = np.einsum('ijb,jb->ib', transition, x) + b * ag[i]
+        np.maximum(peak, np.abs(np.einsum('ijb,jb->ib', tracked, x)), out=peak)
+
+        if history:
+            histories.append(x)
+
+    peak = peak.T.reshape(batch + (sum(sizes),))
+
+    res = dict(zip(names, np.split(peak, np.cumsum(sizes)[:-1], axis=-1)))
+
+    if history:
+        # time runs along the first axis of each history
+        states = np.moveaxis(np.stack(histories), 1, -1).reshape((len(histories),) + batch + (3 * n,))
+        res['displ_history'] = states[..., :n]
+        res['veloc_history'] = states[..., n:2 * n]
+        res['accel_history'] = states[..., 2 * n:]
+
+    return res
+
+
+def modal_damping(m, phi, omega, damping):
+    # classical damping matrix reproducing the damping ratio in every mode of mass-normalized shapes phi
+    m_phi = m[..., :, np.newaxis] * phi
+    return (m_phi * (2 * damping * omega)[..., np.newaxis, :]) @ np.swapaxes(m_phi, -1, -2)
+
+
+# %% NONLINEAR VISCOUS DAMPERS
+# power-law fluid dampers f = c |v|^alpha sign(v), with v = d @ v the velocity across each damper, added to a linear
+# system integrated with average acceleration Newmark
+# everything but the damper forces is linear, so within a step the displacements are the linear prediction minus
+# k_hat^-1 d.T f and the damper velocities v_lin - g f with g = gamma / (beta dt) d k_hat^-1 d.T, which leaves only
+# the n_d damper forces to solve for: (|f| / c)^(1 / alpha) sign(f) + g f = v_lin
+# Newton is iterated on the forces rather than the velocities because the tangent 1 / (alpha c) (|f| / c)^(1 /
+# alpha - 1) stays finite at zero velocity for alpha <= 1, where the velocity form has an infinite one, and with
+# a single damper the residual is convex in |f| so the iteration started from an upper bound never overshoots
+
+def force_bound(v_lin, g, cd, alpha, f):
+    # upper bound of every damper force given the forces f of the others, from the rigid (g = 0) and the
+    # uncoupled (alpha -> 0) limits, signed like the velocity left to it, the exact bound for a single damper
+    g_diag = np.diagonal(g, axis1=-2, axis2=-1)
+    v_own = v_lin - np.einsum('bij,bj->bi', g, f) + g_diag * f
+    return np.sign(v_own) * np.minimum(cd * np.abs(v_own) ** alpha, np.abs(v_own) / g_diag)
+
+
+def damper_forces(v_lin, g, cd, alpha, f=None, tol=1e-10, max_iter=50):
+    # damper forces (size, n_d) of every batch member, v_lin (size, n_d), g (size, n_d, n_d), cd and alpha
+    # (size, n_d), returns the forces and the number of iterations the slowest member took
+    # the forces of the previous step are kept as the start where they lie below the bound and act the same way,
+    # and every iterate is pulled back to the bound, so a first step from a flat part of the curve cannot land far
+    # beyond the root and creep back at the (1 - alpha) rate Newton has on a steep power
+
+    zero = np.zeros_like(v_lin)
+    bound = force_bound(v_lin, g, cd, alpha, zero if f is None else f)
+    f = bound if f is None else np.where((f * bound > 0) & (np.abs(f) < np.abs(bound)), f, bound)
+
+    active = np.arange(len(f))
+
+    for iteration in range(1, max_iter + 1):
+        f_a, g_a, cd_a, v_a, alpha_a = f[active], g[active], cd[active], v_lin[active], alpha[active]
+
+        # the floor keeps the tangent of exponents above 1 finite at zero force
+        ratio = np.maximum(np.abs(f_a) / cd_a, 1e-300)
+        power = 1 / alpha_a
+
+        residual = np.sign(f_a) * ratio ** power + np.einsum('bij,bj->bi', g_a, f_a) - v_a
+        tangent = g_a + np.eye(f.shape[-1]) * (power / cd_a * ratio ** (power - 1))[..., np.newaxis]
+
+        # a single damper, e.g. coupled.damper_time_history, needs no batched solve
+        if f.shape[-1] == 1:
+            f_new = f_a - residual / tangent[..., 0]
+        else:
+            f_new = f_a - np.linalg.solve(tangent, residual[..., np.newaxis])[..., 0]
+
+        bound = force_bound(v_a, g_a, cd_a, alpha_a, f_new)
+        f_new = np.where(np.abs(f_new) > np.abs(bound), bound, f_new)
+
+        # members stop once their forces no longer change, relative to the force or to the damper at 1 velocity
+        done = (np.abs(f_new - f_a) <= tol * np.maximum(np.abs(f_new), cd_a)).all(axis=-1)
+        f[active] = f_new
+        active = active[~done]
+
+        if not len(active):
+            return f, iteration
+
+    return f, max_iter
+
+
+def newmark_dampers(m, k, c, ag, dt, d, cd, alpha, influence=None, outputs=None, history=False, tol=1e-10,
+                    max_iter=50, beta=0.25, gamma=0.5):
+    # integrate a batch of linear systems with nonlinear viscous dampers under ground acceleration
+    # m, k, c, ag, influence, and beta and gamma are as in newmark, d (..., n_d, n) maps the velocities to those
+    # across each damper, cd and alpha (..., n_d) are the damper constants and exponents, and all leading axes
+    # broadcast into the batch, e.g. cd[:, None, None] and alpha[None, :, None] with ag (n_records, n_steps + 1)
+    # sweep every (c, alpha) pair over every record
+    # outputs maps names to (..., r, 2 * n + n_d) matrices applied to the stacked [u, v, f] at every step, peak
+    # absolute displacements and damper forces are always returned, with 'newton_iterations' the most Newton
+    # iterations any step took
+
+    m = np.asarray(m, dtype=float)
+    k = np.asarray(k, dtype=float)
+    c = np.asarray(c, dtype=float)
+    ag = np.asarray(ag, dtype=float)
+    d = np.asarray(d, dtype=float)
+    cd = np.asarray(cd, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)
+    n = m.shape[-1]
+    n_d = d.shape[-2]
+
+    if (alpha <= 0).any() or (cd <= 0).any():
+        raise ValueError('Damper constants and exponents must be positive')
+
+    influence = np.ones(n) if influence is None else np.asarray(influence, dtype=float)
+    outputs = {} if outputs is None else outputs
+
+    batch = np.broadcast_shapes(m.shape[:-1], k.shape[:-2], c.shape[:-2], ag.shape[:-1], d.shape[:-2],
+                                cd.shape[:-1], alpha.shape[:-1])
+    size = int(np.prod(batch))
+
+    # the loop runs with the flattened batch along the first axis, small matrices last
+    def flat(array, shape):
+        return np.ascontiguousarray(np.broadcast_to(array, batch + shape).reshape((size,) + shape))
+
+    m_mat = m[..., np.newaxis] * np.eye(n)
+    k_hat_inv = flat(np.linalg.inv(k + m_mat / (beta * dt ** 2) + gamma / (beta * dt) * c), (n, n))
+    m_mat, c, d = flat(m_mat, (n, n)), flat(c, (n, n)), flat(d, (n_d, n))
+    cd, alpha = flat(cd, (n_d,)), flat(alpha, (n_d,))
+    ag = np.ascontiguousarray(np.broadcast_to(ag, batch + ag.shape[-1:]).reshape(size, -1).T)
+
+    k_hat_inv_dt = k_hat_inv @ np.swapaxes(d, -1, -2)
+    g = gamma / (beta * dt) * d @ k_hat_inv_dt
+
+    load = -flat(m, (n,)) * influence
+
+    names = ['displ', 'damper_force'] + list(outputs)
+    sizes = [n, n_d] + [np.shape(t)[-2] for t in outputs.values()]
+    tracked = np.concatenate([flat(np.eye(n, 2 * n + n_d), (n, 2 * n + n_d)),
+                              flat(np.eye(n_d, 2 * n + n_d, 2 * n), (n_d, 2 * n + n_d))] +
+                             [flat(t, np.shape(t)[-2:]) for t in outputs.values()], axis=-2)
+
+    u = np.zeros((size, n))
+    v = np.zeros((size, n))
+    a = -influence * ag[0][:, np.newaxis]
+    f = np.zeros((size, n_d))
+    peak = np.zeros((size, sum(sizes)))
+    histories = [np.concatenate([u, v, a, f], axis=-1)]
+    most_iterations = 0
+
+    def mv(matrix, vector):
+        return np.einsum('bij,bj->bi', matrix, vector)
+
+    for i in range(1, ag.shape[0]):
+        # linear prediction of the step with the damper forces left out
+        p = load * ag[i][:, np.newaxis] + \
+            mv(m_mat, u / (beta * dt ** 2) + v / (beta * dt) + (1 / (2 * beta) - 1) * a) + \
+            mv(c, gamma / (beta * dt) * u + (gamma / beta - 1) * v + dt * (gamma / (2 * beta) - 1) * a)
+        u_lin = mv(k_hat_inv, p)
+
+        v_base = (1 - gamma / beta) * v + dt * (1 - gamma / (2 * beta)) * a
+        v_lin = mv(d, gamma / (beta * dt) * (u_lin - u) + v_base)
+
+        # the forces of the previous step start the iteration once the response is under way
+        f, iterations = damper_forces(v_lin, g, cd, alpha, f if i > 1 else None, tol, max_iter)
+        most_iterations = max(most_iterations, iterations)
+
+        u_new = u_lin - mv(k_hat_inv_dt, f)
+        a = (u_new - u) / (beta * dt ** 2) - v / (beta * dt) - (1 / (2 * beta) - 1) * a
+        v = gamma / (beta * dt) * (u_new - u) + v_base
+        u = u_new
+
+        state = np.concatenate([u, v, f], axis=-1)
+        np.maximum(peak, np.abs(mv(tracked, state)), out=peak)
+
+        if history:
+            histories.append(np.concatenate([u, v, a, f], axis=-1))
+
+    peak = peak.reshape(batch + (sum(sizes),))
+
+    res = dict(zip(names, np.split(peak, np.cumsum(sizes)[:-1], axis=-1)))
+    res['newton_iterations'] = most_iterations
+
+    if history:
+        # time runs along the first axis of each history
+        states = np.stack(histories).reshape((len(histories),) + batch + (3 * n + n_d,))
+        res['displ_history'] = states[..., :n]
+        res['veloc_history'] = states[..., n:2 * n]
+        res['accel_history'] = states[..., 2 * n:3 * n]
+        res['damper_force_history'] = states[..., 3 * n:]
+
+    return res
+
+
+# %% EXACT DISCRETIZATION
+# a linear system x' = A x + B ag with x = [u, v] is propagated over a step by x <- phi x + gamma_0 ag_i +
+# gamma_1 ag_i+1, exact for a ground acceleration varying linearly between samples (first-order hold), so there is
+# no step-size stability limit and no period elongation, the only error is the sampling of the record itself
+# phi = e^(A dt) and both input matrices come from the exponential of one augmented matrix (Van Loan), computed
+# once per system and dt and reusable over any number of records
+
+# Pade coefficients and 1-norm limit of the degree 13 approximant (Higham 2005)
+PADE_13 = [64764752532480000, 32382376266240000, 7771770303897600, 1187353796428800, 129060195264000,
+           10559470521600, 670442572800, 33522128640, 1323241920, 40840800, 960960, 16380, 182, 1]
+THETA_13 = 5.371920351148152
+
+
+def expm(a):
+    # matrix exponential of a batch of square matrices (..., n, n) by scaling and squaring, every member scaled by
+    # its own power of two
+
+    a = np.asarray(a, dtype=float)
+    b = PADE_13
+    eye = np.eye(a.shape[-1])
+
+    norm = np.abs(a).sum(axis=-2).max(axis=-1)
+    with np.errstate(divide='ignore'):
+        s = np.maximum(0, np.ceil(np.log2(norm / THETA_13))).astype(int)
+    a = a / (2.0 ** s)[..., np.newaxis, np.newaxis]
+
+    a_2 = a @ a
+    a_4 = a_2 @ a_2
+    a_6 = a_4 @ a_2
+
+    u = a @ (a_6 @ (b[13] * a_6 + b[11] * a_4 + b[9] * a_2) + b[7] * a_6 + b[5] * a_4 + b[3] * a_2 + b[1] * eye)
+    v = a_6 @ (b[12] * a_6 + b[10] * a_4 + b[8] * a_2) + b[6] * a_6 + b[4] * a_4 + b[2] * a_2 + b[0] * eye
+
+    r = np.linalg.solve(v - u, v + u)
+
+    for i in range(int(s.max(initial=0))):
+        r = np.where((i < s)[..., np.newaxis, np.newaxis], r @ r, r)
+
+    return r
+
+
+def propagators(m, k, c, dt, influence=None):
+    # (phi, gamma_0, gamma_1) of a batch of systems, phi (..., 2 n, 2 n) and the input columns (..., 2 n)
+    # m holds lumped masses (..., n), k and c are (..., n, n), as in newmark
+
+    m = np.asarray(m, dtype=float)
+    k = np.asarray(k, dtype=float)
+    c = np.asarray(c, dtype=float)
+    n = m.shape[-1]
+
+    influence = np.ones(n) if influence is None else np.asarray(influence, dtype=float)
+    batch = np.broadcast_shapes(m.shape[:-1], k.shape[:-2], c.shape[:-2])
+
+    # [[A, B, 0], [0, 0, 1 / dt], [0, 0, 0]] dt, whose exponential holds phi and the integrals of e^(A s) B against
+    # the two hat functions of the step
+    augmented = np.zeros(batch + (2 * n + 2, 2 * n + 2))
+    augmented[..., :n, n:2 * n] = np.eye(n)
+    augmented[..., n:2 * n, :n] = -k / m[..., np.newaxis]
+    augmented[..., n:2 * n, n:2 * n] = -c / m[..., np.newaxis]
+    augmented[..., n:2 * n, 2 * n] = -influence
+    augmented[..., 2 * n, 2 * n + 1] = 1 / dt
+
+    exponential = expm(augmented * dt)
+
+    phi = exponential[..., :2 * n, :2 * n]
+    gamma_hold = exponential[..., :2 * n, 2 * n]
+    gamma_ramp = exponential[..., :2 * n, 2 * n + 1]
+
+    return phi, gamma_hold - gamma_ramp, gamma_ramp
+
+
+def state_space(m, k, c, ag, dt, influence=None, outputs=None, history=False, propagator=None):
+    # integrate a batch of linear systems under ground acceleration exactly for piecewise-linear ag, with the
+    # arguments, outputs, and results of newmark
+    # propagator, the propagators of the same systems, dt, and influence, skips computing them again, e.g. when
+    # the records of a suite are run in several calls
+
+    m = np.asarray(m, dtype=float)
+    k = np.asarray(k, dtype=float)
+    c = np.asarray(c, dtype=float)
+    ag = np.asarray(ag, dtype=float)
+    n = m.shape[-1]
+
+    influence = np.ones(n) if influence is None else np.asarray(influence, dtype=float)
+    outputs = {} if outputs is None else outputs
+
+    phi, gamma_0, gamma_1 = propagators(m, k, c, dt, influence) if propagator is None else propagator
+
+    batch = np.broadcast_shapes(phi.shape[:-2], ag.shape[:-1])
+
+    names = ['displ'] + list(outputs)
+    sizes = [n] + [np.shape(t)[-2] for t in outputs.values()]
+    eye = np.broadcast_to(np.eye(n), batch + (n, n))
+    tracked = np.concatenate([np.concatenate([eye, 0 * eye], axis=-1)] + [
+        np.broadcast_to(t, batch + np.shape(t)[-2:]) for t in outputs.values()], axis=-2)
+
+    # the loop runs with the flattened batch along the last, contiguous axis
+    size = int(np.prod(batch))
+    phi = np.ascontiguousarray(np.moveaxis(np.broadcast_to(phi, batch + (2 * n, 2 * n)).reshape(
+        size, 2 * n, 2 * n), 0, -1))
+    tracked = np.ascontiguousarray(np.moveaxis(tracked.reshape(size, sum(sizes), 2 * n), 0, -1))
+    gamma_0 = np.ascontiguousarray(np.broadcast_to(gamma_0, batch + (2 * n,)).reshape(size, 2 * n).T)
+    gamma_1 = np.ascontiguousarray(np.broadcast_to(gamma_1, batch + (2 * n,)).reshape(size, 2 * n).T)
+    ag = np.ascontiguousarray(np.broadcast_to(ag, batch + ag.shape[-1:]).reshape(size, -1).T)
+
+    x = np.zeros((2 * n, size))
+    peak = np.zeros((sum(sizes), size))
+    histories = [x]
+
+    for i in range(1, ag.shape[0]):
+        x = np.einsum('ijb,jb->ib', phi, x) + gamma_0 * ag[i - 1] + gamma_1 * ag[i]
+        np.maximum(peak, np.abs(np.einsum('ijb,jb->ib', tracked, x)), out=peak)
+
+        if history:
+            histories.append(x)
+
+    peak = peak.T.reshape(batch + (sum(sizes),))
+
+    res = dict(zip(names, np.split(peak, np.cumsum(sizes)[:-1], axis=-1)))
+
+    if history:
+        # time runs along the first axis of each history, accelerations follow from the equation of motion
+        states = np.moveaxis(np.stack(histories), 1, -1).reshape((len(histories),) + batch + (2 * n,))
+        m_b = np.broadcast_to(m, batch + (n,))
+        k_b = np.broadcast_to(k, batch + (n, n))
+        c_b = np.broadcast_to(c, batch + (n, n))
+        u, v = states[..., :n], states[..., n:]
+        res['displ_history'] = u
+        res['veloc_history'] = v
+        res['accel_history'] = -(np.einsum('...ij,...j->...i', k_b, u) + np.einsum('...ij,...j->...i', c_b, v)) / \
+            m_b - influence * np.moveaxis(ag.T.reshape(batch + (-1,)), -1, 0)[..., np.newaxis]
+
+    return res
+
+
+# %% RESULTS
+# result methods return the same list layout as the corresponding sap2000 OAPI calls
+
+class NativeResults:
+
+    def __init__(self, native_model, n_modes=12):
+        self.model = native_model
+        self.eigen_value, self.phi, self.recover = native_model.modal(n_modes)
+        self.omega = np.sqrt(np.abs(self.eigen_value))
+        self.period = 2 * pi / self.omega
+
+        # full displacement vectors per case, one column per mode for response spectra or per time step for time
+        # histories, and how those columns are enveloped
+        self.displ = {}
+        self.cases = {}
+
+    def set_rsa(self, name='RSA', spectrum=None, scale=sap2000.GRAVITY, damping=0.05, direction=0,
+                scale_units=sap2000.UNITS['lb_ft_F']):
+        # spectrum maps periods to spectral accelerations, defaulting to the IBC2012 function of Loads.load_rsa
+        # scale converts the spectrum to an acceleration in scale_units, as in ResponseSpectrum.SetLoads
+
+        if spectrum is None:
+            spectrum = ibc2012
+
+        m_dyn = self.model.m[self.model.dynamic]
+        gamma = self.phi.T @ (m_dyn * self.model.influence(direction))
+
+        accel = spectrum(self.period) * scale * unit_factors(scale_units)[1]
+
+        self.displ[name] = self.model.expand(self.phi * (gamma * accel / self.omega ** 2), self.recover)
+        self.cases[name] = cqc_coefficients(self.omega, damping)
+
+    def set_time_history(self, name='TIME_HISTORY', ag=None, dt=0.005, n_steps=2400, scale=sap2000.GRAVITY,
+                         damping=0, direction=0, scale_units=sap2000.UNITS['lb_ft_F']):
+        # direct integration of the condensed model, defaulting to the el_centro case of Loads.set_time_history
+        # unlike sap2000's ModHistLinear every mode of the condensed model takes part in the response
+
+        if ag is None:
+            import groundmotion
+            ag = groundmotion.resample(*groundmotion.read_time_history(), dt=dt, n_steps=n_steps)
+
+        k_cond, recover = self.model.condense()
+        m_dyn = self.model.m[self.model.dynamic]
+
+        eigen_value, psi = np.linalg.eigh(k_cond / np.sqrt(np.outer(m_dyn, m_dyn)))
+        phi = psi / np.sqrt(m_dyn)[:, np.newaxis]
+        c = modal_damping(m_dyn, phi, np.sqrt(np.abs(eigen_value)), damping)
+
+        ag = np.asarray(ag) * scale * unit_factors(scale_units)[1]
+        res = newmark(m_dyn, k_cond, c, ag, dt, influence=self.model.influence(direction), history=True)
+
+        self.displ[name] = self.model.expand(res['displ_history'].T, recover)
+        self.cases[name] = None
+
+    def envelope(self, case, values):
+        # the (step_type, values) pairs sap2000 reports for a case, with one row of values per output
+
+        if self.cases[case] is None:
+            return [('Max', values.max(axis=1)), ('Min', values.min(axis=1))]
+
+        return [('Max', np.sqrt(np.abs(np.einsum('im,mn,in->i', values, self.cases[case], values))))]
+
+    def modal_period(self):
+        n = len(self.period)
+        return [n, ['MODAL'] * n, ['Mode'] * n, list(range(1, n + 1)), self.period.tolist(),
+                (1 / self.period).tolist(), self.omega.tolist(), self.eigen_value.tolist(), 0]
+
+    def joint_result(self, name, case, values, factors):
+        # OAPI layout for joint results in [U1, U2, U3, R1, R2, R3] order from values in [UX, UZ, RY] rows
+        steps = self.envelope(case, values)
+        columns = [[float(step[1][0] / factors[0]) for step in steps], [0.0] * len(steps),
+                   [float(step[1][1] / factors[0]) for step in steps], [0.0] * len(steps),
+                   [float(step[1][2] / factors[1]) for step in steps], [0.0] * len(steps)]
+
+        return [len(steps), [name] * len(steps), [name] * len(steps), [case] * len(steps),
+                [step[0] for step in steps], [0] * len(steps)] + columns + [0]
+
+    def joint_displ(self, name, case='RSA', units=sap2000.UNITS['kip_in_F']):
+        if case not in self.displ or name not in self.model.joint_index:
+            return [0, [], [], [], [], [], [], [], [], [], [], [], 1]
+
+        force, length = unit_factors(units)
+
+        return self.joint_result(name, case, self.displ[case][self.model.dofs(name)], (length, 1))
+
+    def joint_react(self, name, case='RSA', units=sap2000.UNITS['kip_in_F']):
+        if case not in self.displ or name not in self.model.joint_index:
+            return [0, [], [], [], [], [], [], [], [], [], [], [], 1]
+
+        dofs = self.model.dofs(name)
+        if not self.model.restrained[dofs].any():
+            return [0, [], [], [], [], [], [], [], [], [], [], [], 0]
+
+        force, length = unit_factors(units)
+        reactions = self.model.k[dofs] @ self.displ[case]
+        reactions[~self.model.restrained[dofs]] = 0
+
+        return self.joint_result(name, case, reactions, (force, force * length))
+
+    def link_force(self, name, case='RSA', units=sap2000.UNITS['kip_in_F']):
+        # OAPI LinkForce layout, P and V2 are the same at both ends of a linear two-joint link
+        if case not in self.displ or name not in self.model.links:
+            return [0, [], [], [], [], [], [], [], [], [], [], [], [], 1]
+
+        joint_i, joint_j, k_axial, k_shear = self.model.links[name]
+        (xi, zi), (xj, zj) = self.model.joints[joint_i], self.model.joints[joint_j]
+        length = np.hypot(xj - xi, zj - zi)
+        c, s = ((xj - xi) / length, (zj - zi) / length) if length > 0 else (1, 0)
+
+        deform = self.displ[case][self.model.dofs(joint_j)] - self.displ[case][self.model.dofs(joint_i)]
+        forces = np.vstack([k_axial * (c * deform[0] + s * deform[1]), k_shear * (c * deform[1] - s * deform[0])])
+
+        force = unit_factors(units)[0]
+        steps = self.envelope(case, forces) * 2
+        points = [joint_i] * (len(steps) // 2) + [joint_j] * (len(steps) // 2)
+        zeros = [0.0] * len(steps)
+
+        return [len(steps), [name] * len(steps), [name] * len(steps), points, [case] * len(steps),
+                [step[0] for step in steps], [0] * len(steps),
+                [float(step[1][0] / force) for step in steps], [float(step[1][1] / force) for step in steps],
+                zeros, zeros, zeros, zeros, 0]
+
+
+def run(model_obj, anal_type='RSA', props_units=sap2000.UNITS['lb_in_F'], n_modes=12, **case_args):
+    # native alternative to Model.saveandrun, the MODAL case is always run
+
+    results = NativeResults(NativeModel(model_obj, props_units), n_modes)
+
+    if anal_type == 'RSA':
+        results.set_rsa(name='RSA', **case_args)
+
+    elif anal_type == 'TIME_HISTORY':
+        results.set_time_history(name='TIME_HISTORY', **case_args)
+
+    elif anal_type != 'MODAL':
+        raise ValueError('The native solver does not run {} cases'.format(anal_type))
+
+    return results
@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+import textmodel
+
+# %% CONTENT-ADDRESSED CACHE OF EXTRACTED ANALYSIS RESULTS
+# a model is recorded in memory (textmodel.new_recorder) and keyed by the hash of its full .$2k text, the analysis
+# case, the program version, and a tag of the function that extracted the results, so identical models are
+# analyzed once no matter which sweep point defines them
+# every entry is a small json file, the least recently used entries are deleted once the cache exceeds max_bytes,
+# down to low_bytes so the directory is only scanned once in a while
+# the size is kept as a running total of the entries this process wrote on top of a scan at startup and at every
+# eviction, so entries written by other processes count from the next eviction on
+
+
+class ResultCache:
+
+    def __init__(self, path, max_bytes=256 * 2 ** 20, backend=None, low_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.low_bytes = int(0.8 * max_bytes) if low_bytes is None else low_bytes
+
+        # program version string, filled from the first instance the cache is used with when None
+        self.backend = backend
+
+        os.makedirs(path, exist_ok=True)
+        self.size = sum(entry[1] for entry in self.entries())
+
+    def key(self, sap_model, anal_type, extractor=None):
+        # sap_model is the simulator.SapModel of a recorder Model, extractor names the function the cached results
+        # come from, e.g. 'sweep.extract_point'
+        text = '\n'.join([str(self.backend), anal_type, str(extractor)] + textmodel.tables(sap_model))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def file_name(self, key):
+        return os.path.join(self.path, key + '.json')
+
+    def get(self, key):
+        try:
+            with open(self.file_name(key)) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(self.file_name(key))
+        except OSError:
+            pass
+
+        return value
+
+    def put(self, key, value):
+        # write to a temporary file and rename so other processes never read a partial entry
+        temp_name = '{}.{}.tmp'.format(self.file_name(key), os.getpid())
+        with open(temp_name, 'w') as f:
+            json.dump(value, f)
+        self.size += os.path.getsize(temp_name)
+        os.replace(temp_name, self.file_name(key))
+
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        # (mtime, size, path) of every entry
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+
+        for mtime, entry_size, file_name in sorted(entries):
+            if size <= self.low_bytes:
+                break
+            try:
+                os.remove(file_name)
+            except OSError:
+                pass
+            size -= entry_size
+
+        self.size = size
+
+    def clear(self):
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.json'):
+                os.remove(entry.path)
+        self.size = 0
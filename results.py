@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import sap2000
+
+# %% BULK RESULT EXTRACTION
+# every object of interest is put in a sap2000 group once, then each result type is fetched for the whole group
+# with one OAPI call and returned as a DataFrame with one row per object, element, case, and step
+
+# names of the ByRef outputs of each result call, in order, after NumberResults
+LAYOUTS = {
+    'JointDispl': ['obj', 'elm', 'case', 'step_type', 'step_num', 'U1', 'U2', 'U3', 'R1', 'R2', 'R3'],
+    'JointReact': ['obj', 'elm', 'case', 'step_type', 'step_num', 'F1', 'F2', 'F3', 'M1', 'M2', 'M3'],
+    'FrameForce': ['obj', 'obj_sta', 'elm', 'elm_sta', 'case', 'step_type', 'step_num',
+                   'P', 'V2', 'V3', 'T', 'M2', 'M3'],
+    'LinkForce': ['obj', 'elm', 'point_elm', 'case', 'step_type', 'step_num', 'P', 'V2', 'V3', 'T', 'M2', 'M3'],
+}
+
+KEY_COLUMNS = ['obj', 'elm', 'point_elm', 'case', 'step_type']
+
+
+def fetch(sap_obj, result_type, name, item_type='GroupElm'):
+    # one result call for a group (or a single object with item_type='ObjectElm') of the cases selected for output
+    # numeric columns are converted to float arrays column by column, never element by element
+
+    columns = LAYOUTS[result_type]
+
+    res = getattr(sap_obj.Results, result_type)(name, sap2000.EITEM_TYPE_ELM[item_type], 0,
+                                                *[[] for _ in columns])
+
+    number_results, values, ret = res[0], res[1:-1], res[-1]
+
+    if ret != 0 or number_results == 0:
+        return pd.DataFrame(columns=columns)
+
+    return pd.DataFrame(dict((column, np.asarray(value) if column in KEY_COLUMNS else
+                              np.asarray(value, dtype=float)) for column, value in zip(columns, values)))
+
+
+def envelope(df, by=('obj', 'case')):
+    # largest absolute value of every numeric column for each combination of the by columns, over all steps
+
+    numeric = [column for column in df.columns if column not in KEY_COLUMNS and column != 'step_num'
+               and not column.endswith('_sta')]
+
+    return df[numeric].abs().groupby([df[column] for column in by]).max()
+
+
+# %% LAZY RESULTS OF THE LAST ANALYSIS
+# result sets are fetched on first access and kept per (result type, item, case, units), one call returns every
+# case selected for output so the other selected cases are kept too
+# cases are selected for output only when a result set needs them, the modal case along with the first of them so
+# modal_period is one ModalPeriod call, and a new Results object is needed after every analysis
+
+class Results:
+
+    def __init__(self, sap_obj, units=None, modal_case='MODAL'):
+        self.sap_obj = sap_obj
+        self.units = units
+        self.modal_case = modal_case
+
+        # cases selected for output and present units, None until this object sets them
+        self.selected = None
+        self.present_units = None
+
+        self.memo = {}
+
+    def select(self, case):
+        if self.selected is None:
+            self.sap_obj.Results.Setup.DeselectAllCasesAndCombosForOutput()
+            self.selected = set()
+            if self.modal_case is not None:
+                self.select(self.modal_case)
+
+        if case not in self.selected:
+            self.sap_obj.Results.Setup.SetCaseSelectedForOutput(case, True)
+            self.selected.add(case)
+
+    def switch_units(self, units):
+        if units is not None and units != self.present_units:
+            self.sap_obj.SetPresentUnits(units)
+            self.present_units = units
+
+    def get(self, result_type, name, case, item_type='GroupElm', units=None):
+        units = self.units if units is None else units
+        key = (result_type, name, item_type, case, units)
+
+        if key not in self.memo:
+            self.select(case)
+            self.switch_units(units)
+
+            df = fetch(self.sap_obj, result_type, name, item_type)
+            for selected_case in self.selected:
+                self.memo[(result_type, name, item_type, selected_case, units)] = (
+                    df.loc[df['case'] == selected_case].reset_index(drop=True))
+
+        return self.memo[key]
+
+    def joint_displ(self, name, case, item_type='GroupElm', units=None):
+        return self.get('JointDispl', name, case, item_type, units)
+
+    def joint_react(self, name, case, item_type='GroupElm', units=None):
+        return self.get('JointReact', name, case, item_type, units)
+
+    def frame_force(self, name, case, item_type='GroupElm', units=None):
+        return self.get('FrameForce', name, case, item_type, units)
+
+    def link_force(self, name, case, item_type='GroupElm', units=None):
+        return self.get('LinkForce', name, case, item_type, units)
+
+    def modal_period(self, case=None):
+        # mode numbers, periods, frequencies, circular frequencies, and eigenvalues as arrays, of the modal case by
+        # default, which is already selected once any other result set was fetched
+        case = self.modal_case if case is None else case
+        key = ('ModalPeriod', case)
+
+        if key not in self.memo:
+            if case not in (self.selected or ()):
+                self.select(case)
+
+            (number_results, cases, step_type, step_num, period, frequency, circ_freq, eigen_value,
+             ret) = self.sap_obj.Results.ModalPeriod(0, [], [], [], [], [], [], [])
+
+            mask = np.asarray(cases) == case if number_results else np.zeros(0, dtype=bool)
+            self.memo[key] = dict((column, np.asarray(values, dtype=float)[mask]) for column, values in
+                                  [('mode', step_num), ('period', period), ('frequency', frequency),
+                                   ('circ_freq', circ_freq), ('eigen_value', eigen_value)])
+
+        return self.memo[key]
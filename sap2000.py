@@ -1,6 +1,4 @@
 import os
-import sys
-import comtypes.client
 
 
 # %% CHECK WHETHER SAP2000 IS INSTALLED, AND SET WORKING PATH
@@ -26,7 +24,17 @@ def check_model_path(model_path=os.getcwd() + r'\models'):
 # %% INITIALIZE COM CODE TO TIE INTO SAP2000 CSI OAPI AND OPEN SAP2000
 # OR ATTACH TO EXISTING OPEN INSTANCE AND INSTANTIATE SAP2000 OBJECT
 def attachtoapi(attach_to_instance=False, specify_path=True,
-                program_path=r'C:\Program Files\Computers and Structures\SAP2000 25\SAP2000.exe'):
+                program_path=r'C:\Program Files\Computers and Structures\SAP2000 25\SAP2000.exe',
+                binding_version=None):
+    # comtypes is only available on Windows, import it here so the rest of the package loads anywhere
+    # binding_version, e.g. '25.0.0', imports the wrappers pre-generated by bindings.py instead of letting
+    # comtypes generate them
+    if binding_version is not None:
+        import bindings
+        bindings.use(binding_version)
+
+    import comtypes.client
+
     my_sap_object = None
 
     if attach_to_instance:
@@ -55,9 +63,8 @@ def attachtoapi(attach_to_instance=False, specify_path=True,
                 # 'create an instance of the SAPObject from the specified path
                 my_sap_object = helper.CreateObject(program_path)
 
-            except (OSError, comtypes.COMError):
-                print('Cannot start a new instance of the program from ' + program_path)
-                sys.exit(-1)
+            except (OSError, comtypes.COMError) as error:
+                raise RuntimeError('Cannot start a new instance of the program from ' + program_path) from error
 
             else:
 
@@ -69,9 +76,8 @@ def attachtoapi(attach_to_instance=False, specify_path=True,
                 # create an instance of the SAPObject from the latest installed SAP2000
                 my_sap_object = helper.CreateObjectProgID('CSI.SAP2000.API.SapObject')
 
-            except (OSError, comtypes.COMError):
-                print('Cannot start a new instance of the program.')
-                sys.exit(-1)
+            except (OSError, comtypes.COMError) as error:
+                raise RuntimeError('Cannot start a new instance of the program.') from error
 
             else:
                 print('SAP2000 is now running')
@@ -90,6 +96,14 @@ def opensap2000(my_sap_object, visible=False):
     return sap_model
 
 
+def get_version(sap_model):
+    # program version, e.g. '25.0.0 25.0'
+
+    version, number, ret = sap_model.GetVersion('', 0)
+
+    return '{} {}'.format(version, number)
+
+
 # %% CLOSE SAP2000 MODEL AND APPLICATION
 def closesap2000(my_sap_object, save_model=False):
     my_sap_object.ApplicationExit(save_model)
@@ -162,6 +176,13 @@ EITEM_TYPE = {
     'Group': 1,
     'SelectedObjects': 2}
 
+# the Results.* calls take eItemTypeElm, not eItemType
+EITEM_TYPE_ELM = {
+    'ObjectElm': 0,
+    'Element': 1,
+    'GroupElm': 2,
+    'SelectionElm': 3}
+
 MATERIAL_TYPES = {
     'MATERIAL_STEEL': 1,
     'MATERIAL_CONCRETE': 2,
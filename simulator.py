@@ -0,0 +1,668 @@
+import os
+import re
+import numpy as np
+import sap2000
+import native
+import groundmotion
+from modelclasses import Model
+
+# %% IN-PROCESS STAND-IN FOR THE SAP2000 OAPI
+# SapModel implements the calls Model and sweep.run_point make on sap_obj, with the same arguments and the same
+# [ByRef outputs..., ret] return lists comtypes produces. The model is recorded into a shadow Model in lb_in_F
+# properties and lb_ft_F geometry, and RunAnalysis solves it with the native solver.
+
+PROPS_UNITS = sap2000.UNITS['lb_in_F']
+
+# load directions of response spectrum and time history cases, U2 is out of plane for 2-D models
+DIRECTIONS = {'U1': 0, 'U3': 1}
+
+DOF_NAMES = ['U1', 'U2', 'U3', 'R1', 'R2', 'R3']
+
+NO_RESULTS = [0, [], [], [], [], [], [], [], [], [], [], [], 1]
+
+
+class SapObject:
+
+    def __init__(self):
+        self.SapModel = None
+
+    def ApplicationStart(self, units=sap2000.UNITS['kip_in_F'], visible=False, file_name=''):
+        self.SapModel = SapModel(units)
+        return 0
+
+    def ApplicationExit(self, file_save=False):
+        self.SapModel = None
+        return 0
+
+
+class Interface:
+    # groups calls the way the OAPI does, e.g. sap_obj.PropFrame.SetRectangle
+
+    def __init__(self, sap_model):
+        self.sap_model = sap_model
+
+
+class SapModel:
+
+    def __init__(self, units=sap2000.UNITS['kip_in_F']):
+        self.units = units
+        self.file_path = ''
+
+        self.PropMaterial = PropMaterial(self)
+        self.PropFrame = PropFrame(self)
+        self.PropLink = PropLink(self)
+        self.FrameObj = FrameObj(self)
+        self.LinkObj = LinkObj(self)
+        self.PointObj = PointObj(self)
+        self.Func = Func(self)
+        self.LoadCases = LoadCases(self)
+        self.Analyze = Analyze(self)
+        self.File = File(self)
+        self.View = View(self)
+        self.Results = Results(self)
+        self.GroupDef = GroupDef(self)
+
+        self.clear()
+
+    def clear(self):
+        self.model = Model(None)
+        self.points = {}
+        self.point_keys = {}
+        self.groups = {}
+        self.rs_funcs = {}
+        self.rs_damp = {}
+        self.rs_points = {}
+        self.th_funcs = {}
+        self.cases = {}
+        self.run_flags = {}
+        self.results = None
+
+    def InitializeNewModel(self, units=sap2000.UNITS['kip_in_F']):
+        self.units = units
+        self.clear()
+        return 0
+
+    def GetVersion(self, version='', number=0):
+        return ['simulator', 0.0, 0]
+
+    def SetModelIsLocked(self, locked=True):
+        return 0
+
+    def SetPresentUnits(self, units):
+        self.units = units
+        return 0
+
+    def GetPresentUnits(self):
+        return self.units
+
+    # unit conversions from the present units
+    def force(self):
+        return native.FORCE_LB[self.units]
+
+    def length(self):
+        return native.LENGTH_IN[self.units]
+
+    def to_geometry(self, value):
+        return value * self.length() / native.LENGTH_IN[native.GEOMETRY_UNITS]
+
+    def add_point(self, x, y, z, tol=1e-6):
+        # points within tol (ft) of an existing point are merged, as sap2000 does for AddByCoord
+        coords = (self.to_geometry(x), self.to_geometry(y), self.to_geometry(z))
+        key = tuple(round(coord / tol) for coord in coords)
+        if key not in self.point_keys:
+            self.point_keys[key] = str(len(self.points) + 1)
+            self.points[self.point_keys[key]] = coords
+        return self.point_keys[key]
+
+
+class PropMaterial(Interface):
+
+    def SetMaterial(self, name, mat_type, *args):
+        mat_df = self.sap_model.model.props.mat_df
+        if name not in mat_df['material'].values:
+            self.sap_model.model.props.add_mat_df({'material': name, 'material_id': mat_type, 'youngs': 0,
+                                                   'poisson': 0, 't_coeff': 0, 'weight': 0})
+        return 0
+
+    def set(self, name, **values):
+        mat_df = self.sap_model.model.props.mat_df
+        for column, value in values.items():
+            mat_df.loc[mat_df['material'] == name, column] = value
+        return 0
+
+    def SetMPIsotropic(self, name, youngs, poisson, t_coeff, *args):
+        force, length = self.sap_model.force(), self.sap_model.length()
+        return self.set(name, youngs=youngs * force / length ** 2, poisson=poisson, t_coeff=t_coeff)
+
+    def SetWeightAndMass(self, name, option, value):
+        force, length = self.sap_model.force(), self.sap_model.length()
+        if option == 2:
+            # mass per unit volume
+            value = value * sap2000.GRAVITY * 12 / length
+        return self.set(name, weight=value * force / length ** 3)
+
+
+class PropFrame(Interface):
+
+    def SetRectangle(self, name, material, depth, width, *args):
+        length = self.sap_model.length()
+        self.sap_model.model.props.add_frm_df([{'name': name, 'material': material, 'depth': depth * length,
+                                                'width': width * length, 'modifiers': [1] * 8}])
+        return 0
+
+    def SetModifiers(self, name, modifiers):
+        frm_df = self.sap_model.model.props.frm_df
+        for index in frm_df.index[frm_df['name'] == name]:
+            frm_df.at[index, 'modifiers'] = list(modifiers)
+        return [list(modifiers), 0]
+
+
+class PropLink(Interface):
+
+    def SetLinear(self, name, dof, fixed, ke, ce, dj2, dj3, ke_coupled=False, ce_coupled=False, notes='', guid=''):
+        force, length = self.sap_model.force(), self.sap_model.length()
+
+        # translational terms are per length, rotational terms per radian
+        factors = [force / length] * 3 + [force * length] * 3
+        self.sap_model.model.props.add_link_df({'name': name, 'dof': list(dof), 'fixed': list(fixed),
+                                                'ke': [k * f for k, f in zip(ke, factors)],
+                                                'ce': [c * f for c, f in zip(ce, factors)],
+                                                'dj2': dj2 * length, 'dj3': dj3 * length,
+                                                'ke_coupled': ke_coupled, 'ce_coupled': ce_coupled,
+                                                'notes': notes, 'guid': guid,
+                                                'w': 0, 'm': 0, 'R1': 0, 'R2': 0, 'R3': 0})
+        return [list(dof), list(fixed), list(ke), list(ce), 0]
+
+    def SetWeightAndMass(self, name, w, m, r1, r2, r3):
+        force, length = self.sap_model.force(), self.sap_model.length()
+        link_df = self.sap_model.model.props.link_df
+        mask = link_df['name'] == name
+        link_df.loc[mask, 'w'] = w * force
+        link_df.loc[mask, 'm'] = m * force / length
+        link_df.loc[mask, ['R1', 'R2', 'R3']] = [r * force * length for r in (r1, r2, r3)]
+        return 0
+
+
+class GroupDef(Interface):
+
+    def SetGroup(self, name, *args):
+        self.sap_model.groups.setdefault(name, {'joint': [], 'frame': [], 'link': []})
+        return 0
+
+
+def assign_group(sap_model, kind, name, group_name, remove=False):
+    members = sap_model.groups[group_name][kind]
+    if remove:
+        if name in members:
+            members.remove(name)
+    elif name not in members:
+        members.append(name)
+    return 0
+
+
+class FrameObj(Interface):
+
+    def SetGroupAssign(self, name, group_name, remove=False, item_type=0):
+        return assign_group(self.sap_model, 'frame', name, group_name, remove)
+
+    def AddByCoord(self, xi, yi, zi, xj, yj, zj, name='', prop_name='Default', user_name='', csys='Global'):
+        sap_model = self.sap_model
+        geometry = sap_model.model.geometry
+
+        frm_i = sap_model.add_point(xi, yi, zi)
+        frm_j = sap_model.add_point(xj, yj, zj)
+        name = user_name if user_name else str(len(geometry.members.get((None, None, 'frame'), [])) + 1)
+
+        (xi, yi, zi), (xj, yj, zj) = sap_model.points[frm_i], sap_model.points[frm_j]
+        index = geometry.add_frm_df(xi=xi, yi=yi, zi=zi, xj=xj, yj=yj, zj=zj, name=name, prop_name=prop_name,
+                                    user_name=name, csys=csys, frm_type='frame', mass=0)
+        geometry.set_joints(index, frm_i, frm_j)
+
+        return [name, 0]
+
+    def GetPoints(self, name, point_i='', point_j=''):
+        geometry = self.sap_model.model.geometry
+        if name not in geometry.names:
+            return ['', '', 1]
+        return [geometry.get_end(name, 'i')[3], geometry.get_end(name, 'j')[3], 0]
+
+    def SetMass(self, name, mass, replace=False, item_type=0):
+        force, length = self.sap_model.force(), self.sap_model.length()
+        geo_length = native.LENGTH_IN[native.GEOMETRY_UNITS]
+
+        # mass per unit length in lb_ft_F
+        mass = mass * force * (geo_length / length) ** 2
+
+        geometry = self.sap_model.model.geometry
+        geometry.set_member(name, 'mass', mass if replace else geometry.get_member(name, 'mass') + mass)
+        return 0
+
+
+class LinkObj(Interface):
+
+    def SetGroupAssign(self, name, group_name, remove=False, item_type=0):
+        return assign_group(self.sap_model, 'link', name, group_name, remove)
+
+    def AddByPoint(self, point_i, point_j, name='', is_single_joint=False, prop_name='Default', user_name=''):
+        sap_model = self.sap_model
+        geometry = sap_model.model.geometry
+
+        name = user_name if user_name else str(len(geometry.members.get((None, None, 'link'), [])) + 1)
+        (xi, yi, zi), (xj, yj, zj) = sap_model.points[point_i], sap_model.points[point_j]
+
+        geometry.add_link_df(frm_i=point_i, frm_j=point_j, xi=xi, yi=yi, zi=zi, xj=xj, yj=yj, zj=zj, name=name,
+                             is_single_joint=is_single_joint, prop_name=prop_name, user_name=name,
+                             frm_type='link')
+        return [name, 0]
+
+
+class PointObj(Interface):
+
+    def SetGroupAssign(self, name, group_name, remove=False, item_type=0):
+        return assign_group(self.sap_model, 'joint', name, group_name, remove)
+
+    def SetRestraint(self, name, value, item_type=0):
+        frm_df = self.sap_model.model.geometry.frm_df
+        for index, end in self.sap_model.model.geometry.joint_ends.get(name, []):
+            frm_df.at[index, end + '_restraint'] = list(value)
+        return [list(value), 0]
+
+
+class FuncRS(Interface):
+
+    def SetIBC2012(self, name, option, latitude, longitude, zip_code, ss, s1, tl, site_class, fa, fv, damp):
+        def spectrum(periods):
+            return native.ibc2012(periods, ss=ss, s1=s1, tl=tl, site_class=site_class, fa=fa, fv=fv)
+
+        self.sap_model.rs_funcs[name] = spectrum
+        self.sap_model.rs_damp[name] = damp
+        return 0
+
+    def SetUser(self, name, number_items, periods, values, damp):
+        self.sap_model.rs_funcs[name] = groundmotion.interpolate(periods, values)
+        self.sap_model.rs_damp[name] = damp
+        self.sap_model.rs_points[name] = (list(periods), list(values))
+        return [list(periods), list(values), 0]
+
+
+class FuncTH(Interface):
+
+    def SetFromFile_1(self, name, file_name, headlines=0, pre_chars=0, points_per_line=1, value_type=2,
+                      free_format=True, number_fixed=10, dt=0.02):
+        # sap2000 runs on Windows, accept its path separators
+        file_name = file_name.replace('\\', os.sep)
+        self.sap_model.th_funcs[name] = groundmotion.read_time_history(
+            file_name, headlines, pre_chars, points_per_line, value_type, free_format, number_fixed, dt)
+        return 0
+
+    def SetUser(self, name, number_items, time, values):
+        self.sap_model.th_funcs[name] = (np.asarray(time[:number_items], dtype=float),
+                                         np.asarray(values[:number_items], dtype=float))
+        return [list(time), list(values), 0]
+
+
+class Func(Interface):
+
+    def __init__(self, sap_model):
+        super().__init__(sap_model)
+        self.FuncRS = FuncRS(sap_model)
+        self.FuncTH = FuncTH(sap_model)
+
+
+class LoadCase(Interface):
+    # settings shared by the response spectrum and linear modal history cases
+
+    case_type = None
+
+    def case(self, name):
+        return self.sap_model.cases.setdefault(name, {'case_type': self.case_type, 'damp': 0, 'loads': [],
+                                                      'modal_case': 'MODAL', 'n_steps': 0, 'dt': 0})
+
+    def SetCase(self, name):
+        self.sap_model.cases.pop(name, None)
+        self.case(name)
+        self.sap_model.run_flags.setdefault(name, True)
+        return 0
+
+    def SetDampConstant(self, name, damp):
+        self.case(name)['damp'] = damp
+        return 0
+
+    def SetModalCase(self, name, modal_case):
+        self.case(name)['modal_case'] = modal_case
+        return 0
+
+
+class ResponseSpectrum(LoadCase):
+
+    case_type = 'RSA'
+
+    def SetLoads(self, name, number_loads, load_name, func, sf, csys, ang):
+        self.case(name)['loads'] = [(load_name[i], func[i], sf[i], self.sap_model.units) for i in range(number_loads)]
+        return [list(load_name), list(func), list(sf), list(csys), list(ang), 0]
+
+    def SetModalComb_1(self, name, modal_comb, f1=1, f2=0, td=60):
+        # the native solver always combines modes with CQC
+        self.case(name)['modal_comb'] = modal_comb
+        return 0
+
+
+class ModHistLinear(LoadCase):
+
+    case_type = 'TIME_HISTORY'
+
+    def SetLoads(self, name, number_loads, load_type, load_name, func, sf, tf, at, csys, ang):
+        self.case(name)['loads'] = [(load_name[i], func[i], sf[i], self.sap_model.units, tf[i], at[i])
+                                    for i in range(number_loads)]
+        return [list(load_type), list(load_name), list(func), list(sf), list(tf), list(at), list(csys), list(ang), 0]
+
+    def SetMotionType(self, name, motion_type):
+        return 0
+
+    def SetTimeStep(self, name, n_steps, dt):
+        self.case(name).update({'n_steps': n_steps, 'dt': dt})
+        return 0
+
+
+class LoadCases(Interface):
+
+    def __init__(self, sap_model):
+        super().__init__(sap_model)
+        self.ResponseSpectrum = ResponseSpectrum(sap_model)
+        self.ModHistLinear = ModHistLinear(sap_model)
+
+
+class Analyze(Interface):
+
+    def SetActiveDOF(self, dof):
+        self.sap_model.model.props.set_mdl_dof_df(list(dof))
+        return [list(dof), 0]
+
+    def SetRunCaseFlag(self, name, run, all_cases=False):
+        if all_cases:
+            for case_name in list(self.sap_model.cases) + ['MODAL']:
+                self.sap_model.run_flags[case_name] = run
+        else:
+            self.sap_model.run_flags[name] = run
+        return 0
+
+    def RunAnalysis(self):
+        sap_model = self.sap_model
+
+        results = native.NativeResults(native.NativeModel(sap_model.model, PROPS_UNITS))
+
+        for name, case in sap_model.cases.items():
+            if not sap_model.run_flags.get(name, True) or not case['loads']:
+                continue
+
+            if len(case['loads']) > 1 or case['loads'][0][0] not in DIRECTIONS:
+                raise ValueError('Case {} has loads {}, the simulator only runs cases with one U1 or U3 load'.format(
+                    name, [load[0] for load in case['loads']]))
+
+            load = case['loads'][0]
+            if case['case_type'] == 'RSA':
+                results.set_rsa(name, spectrum=sap_model.rs_funcs[load[1]], scale=load[2], damping=case['damp'],
+                                direction=DIRECTIONS[load[0]], scale_units=load[3])
+
+            else:
+                time, values = sap_model.th_funcs[load[1]]
+                ag = groundmotion.resample(time * load[4] + load[5], values, case['dt'], case['n_steps'])
+                results.set_time_history(name, ag=ag, dt=case['dt'], n_steps=case['n_steps'], scale=load[2],
+                                         damping=case['damp'], direction=DIRECTIONS[load[0]],
+                                         scale_units=load[3])
+
+        sap_model.results = results
+        return 0
+
+
+# %% TEXT MODEL (.$2k) FILES
+# OpenFile reads back the tables textmodel.tables writes, every value in lb_in_F, and replays them through the
+# calls above, so a model opened from text is recorded exactly like one built call by call
+
+FIELD = re.compile(r'(\w+)=("[^"]*"|\S+)')
+
+
+def read_tables(file_name):
+    # table name: list of rows, each a dict of column: text value
+    tables, rows = {}, None
+    with open(file_name) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('TABLE:'):
+                rows = tables.setdefault(line.split(':', 1)[1].strip().strip('"'), [])
+            elif line == 'END TABLE DATA':
+                break
+            elif line and rows is not None:
+                rows.append(dict((key, value.strip('"')) for key, value in FIELD.findall(line)))
+    return tables
+
+
+def yes(value):
+    return value == 'Yes'
+
+
+def by_name(rows, column):
+    # rows grouped by column, in order of first appearance
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[column], []).append(row)
+    return groups
+
+
+class File(Interface):
+
+    def NewBlank(self):
+        return 0
+
+    def OpenFile(self, file_name):
+        if not os.path.exists(file_name):
+            return 1
+
+        tables = read_tables(file_name)
+        sap_model = self.sap_model
+        sap_model.InitializeNewModel(PROPS_UNITS)
+
+        geometry = sap_model.model.geometry
+        geo_length = native.LENGTH_IN[native.GEOMETRY_UNITS]
+
+        for row in tables.get('ACTIVE DEGREES OF FREEDOM', []):
+            sap_model.Analyze.SetActiveDOF([yes(row[name]) for name in ('UX', 'UY', 'UZ', 'RX', 'RY', 'RZ')])
+
+        # materials, sections, and link properties
+        material_ids = dict((name.split('_')[-1].title(), material_id)
+                            for material_id, name in sap2000.EMATERIAL_TYPES.items())
+        for row in tables.get('MATERIAL PROPERTIES 01 - GENERAL', []):
+            sap_model.PropMaterial.SetMaterial(row['Material'], material_ids[row['Type']])
+        for row in tables.get('MATERIAL PROPERTIES 02 - BASIC MECHANICAL PROPERTIES', []):
+            sap_model.PropMaterial.SetMPIsotropic(row['Material'], float(row['E1']), float(row['U12']),
+                                                  float(row['A1']))
+            sap_model.PropMaterial.SetWeightAndMass(row['Material'], 1, float(row['UnitWeight']))
+
+        for row in tables.get('FRAME SECTION PROPERTIES 01 - GENERAL', []):
+            sap_model.PropFrame.SetRectangle(row['SectionName'], row['Material'], float(row['t3']), float(row['t2']))
+
+        linear = by_name(tables.get('LINK PROPERTY DEFINITIONS 02 - LINEAR', []), 'Link')
+        for row in tables.get('LINK PROPERTY DEFINITIONS 01 - GENERAL', []):
+            dof, fixed, ke, ce = [False] * 6, [False] * 6, [0.0] * 6, [0.0] * 6
+            for dof_row in linear.get(row['Link'], []):
+                i = DOF_NAMES.index(dof_row['DOF'])
+                kind = 'Trans' if i < 3 else 'Rot'
+                dof[i], fixed[i] = True, yes(dof_row['Fixed'])
+                ke[i], ce[i] = float(dof_row[kind + 'KE']), float(dof_row[kind + 'CE'])
+            sap_model.PropLink.SetLinear(row['Link'], dof, fixed, ke, ce, 0, 0)
+            sap_model.PropLink.SetWeightAndMass(row['Link'], float(row['Weight']), float(row['Mass']),
+                                                float(row['RotInert1']), float(row['RotInert2']),
+                                                float(row['RotInert3']))
+
+        # joints keep the names of the file, frames and links are added between them
+        for row in tables.get('JOINT COORDINATES', []):
+            coords = tuple(float(row[axis]) / geo_length for axis in ('XorR', 'Y', 'Z'))
+            sap_model.points[row['Joint']] = coords
+            sap_model.point_keys[tuple(round(coord / 1e-6) for coord in coords)] = row['Joint']
+
+        sections = dict((row['Frame'], row['AnalSect']) for row in tables.get('FRAME SECTION ASSIGNMENTS', []))
+        for row in tables.get('CONNECTIVITY - FRAME', []):
+            (xi, yi, zi), (xj, yj, zj) = sap_model.points[row['JointI']], sap_model.points[row['JointJ']]
+            index = geometry.add_frm_df(xi=xi, yi=yi, zi=zi, xj=xj, yj=yj, zj=zj, name=row['Frame'],
+                                        prop_name=sections.get(row['Frame'], 'Default'), user_name=row['Frame'],
+                                        csys='Global', frm_type='frame', mass=0)
+            geometry.set_joints(index, row['JointI'], row['JointJ'])
+
+        for row in tables.get('JOINT RESTRAINT ASSIGNMENTS', []):
+            sap_model.PointObj.SetRestraint(row['Joint'], [yes(row[name]) for name in DOF_NAMES])
+
+        for row in tables.get('FRAME ADDED MASS ASSIGNMENTS', []):
+            sap_model.FrameObj.SetMass(row['Frame'], float(row['MassPerLen']), True)
+
+        link_props = dict((row['Link'], row['LinkProp']) for row in tables.get('LINK PROPERTY ASSIGNMENTS', []))
+        for row in tables.get('CONNECTIVITY - LINK', []):
+            sap_model.LinkObj.AddByPoint(row['JointI'], row['JointJ'], '', False,
+                                         link_props.get(row['Link'], 'Default'), row['Link'])
+
+        for row in tables.get('GROUPS 1 - DEFINITIONS', []):
+            sap_model.GroupDef.SetGroup(row['GroupName'])
+        for row in tables.get('GROUPS 2 - ASSIGNMENTS', []):
+            assign_group(sap_model, row['ObjectType'].lower(), row['ObjectLabel'], row['GroupName'])
+
+        # functions
+        for name, rows in by_name(tables.get('FUNCTION - RESPONSE SPECTRUM - USER', []), 'Name').items():
+            sap_model.Func.FuncRS.SetUser(name, len(rows), [float(row['Period']) for row in rows],
+                                          [float(row['Accel']) for row in rows], float(rows[0]['FuncDamp']))
+        for name, rows in by_name(tables.get('FUNCTION - TIME HISTORY - USER', []), 'Name').items():
+            sap_model.Func.FuncTH.SetUser(name, len(rows), [float(row['Time']) for row in rows],
+                                          [float(row['Value']) for row in rows])
+
+        # load cases, scale factors are written for lb_in_F
+        case_types = {'LinRespSpec': sap_model.LoadCases.ResponseSpectrum,
+                      'LinModHist': sap_model.LoadCases.ModHistLinear}
+        for row in tables.get('LOAD CASE DEFINITIONS', []):
+            if row['Type'] in case_types:
+                case_types[row['Type']].SetCase(row['Case'])
+                case_types[row['Type']].SetModalCase(row['Case'], row['ModalCase'])
+            sap_model.run_flags[row['Case']] = yes(row['RunCase'])
+
+        response_spectrum = sap_model.LoadCases.ResponseSpectrum
+        for row in tables.get('CASE - RESPONSE SPECTRUM 1 - GENERAL', []):
+            response_spectrum.SetDampConstant(row['Case'], float(row['ConstDamp']))
+        for name, rows in by_name(tables.get('CASE - RESPONSE SPECTRUM 2 - LOAD ASSIGNMENTS', []), 'Case').items():
+            response_spectrum.SetLoads(name, len(rows), [row['LoadName'] for row in rows],
+                                       [row['Function'] for row in rows], [float(row['TransAccSF']) for row in rows],
+                                       ['GLOBAL'] * len(rows), [0] * len(rows))
+
+        modal_history = sap_model.LoadCases.ModHistLinear
+        for row in tables.get('CASE - MODAL HISTORY 1 - GENERAL', []):
+            modal_history.SetTimeStep(row['Case'], int(float(row['OutSteps'])), float(row['StepSize']))
+            modal_history.SetDampConstant(row['Case'], float(row['ConstDamp']))
+        for name, rows in by_name(tables.get('CASE - MODAL HISTORY 2 - LOAD ASSIGNMENTS', []), 'Case').items():
+            modal_history.SetLoads(name, len(rows), ['Accel'] * len(rows), [row['LoadName'] for row in rows],
+                                   [row['Function'] for row in rows], [float(row['TransAccSF']) for row in rows],
+                                   [float(row['TimeFactor']) for row in rows],
+                                   [float(row['ArrivalTime']) for row in rows], ['GLOBAL'] * len(rows),
+                                   [0] * len(rows))
+
+        sap_model.file_path = file_name
+        return 0
+
+    def Save(self, file_name=''):
+        # nothing is written, the path is only recorded
+        self.sap_model.file_path = file_name
+        return 0
+
+
+class View(Interface):
+
+    def RefreshView(self, window=0, zoom=True):
+        return 0
+
+
+class Setup(Interface):
+
+    def __init__(self, sap_model):
+        super().__init__(sap_model)
+        self.selected = set()
+        self.mode_shape = (1, 1)
+
+    def DeselectAllCasesAndCombosForOutput(self):
+        self.selected.clear()
+        return 0
+
+    def SetCaseSelectedForOutput(self, name, selected=True):
+        if selected:
+            self.selected.add(name)
+        else:
+            self.selected.discard(name)
+        return 0
+
+    def SetOptionModeShape(self, first, last, all_modes=False):
+        self.mode_shape = (first, last)
+        return 0
+
+    def SetOptionModalHist(self, option):
+        return 0
+
+
+class Results(Interface):
+
+    def __init__(self, sap_model):
+        super().__init__(sap_model)
+        self.Setup = Setup(sap_model)
+
+    def item_results(self, result_type, kind, name, item_type, n_columns):
+        # concatenate the results of every object and selected case in the OAPI layout, objects are one object
+        # or the members of a group
+        results = self.sap_model.results
+        if item_type == sap2000.EITEM_TYPE_ELM['ObjectElm']:
+            names = [name]
+        elif item_type == sap2000.EITEM_TYPE_ELM['GroupElm'] and name in self.sap_model.groups:
+            names = self.sap_model.groups[name][kind]
+        else:
+            names = None
+
+        if results is None or names is None:
+            return [0] + [[] for _ in range(n_columns)] + [1]
+
+        out = [0] + [[] for _ in range(n_columns)] + [0]
+        for item_name in names:
+            for case in sorted(self.Setup.selected):
+                if case not in results.displ:
+                    continue
+                res = getattr(results, result_type)(item_name, case, self.sap_model.units)
+                out[0] += res[0]
+                for i in range(1, n_columns + 1):
+                    out[i] += res[i]
+
+        return out
+
+    def JointDispl(self, name, item_type=0, *args):
+        return self.item_results('joint_displ', 'joint', name, item_type, 11)
+
+    def JointReact(self, name, item_type=0, *args):
+        return self.item_results('joint_react', 'joint', name, item_type, 11)
+
+    def LinkForce(self, name, item_type=0, *args):
+        return self.item_results('link_force', 'link', name, item_type, 12)
+
+    def FrameForce(self, name, item_type=0, *args):
+        # the native solver does not recover frame internal forces
+        return [0] + [[] for _ in range(13)] + [1]
+
+    def ModalPeriod(self, *args):
+        results = self.sap_model.results
+        if results is None or 'MODAL' not in self.Setup.selected:
+            return [0, [], [], [], [], [], [], [], 1]
+        return results.modal_period()
+
+
+# %% DROP-IN REPLACEMENTS FOR sap2000.attachtoapi AND sweep.open_instance
+
+def attachtoapi(*args, **kwargs):
+    return SapObject()
+
+
+def open_instance(visible=False):
+    sap_object = SapObject()
+    return sap_object, sap2000.opensap2000(sap_object, visible=visible)
+
+
+def close_instance(sap_object):
+    sap2000.closesap2000(sap_object, save_model=False)
@@ -0,0 +1,162 @@
+import os
+import glob
+import numpy as np
+import sap2000
+import sweep
+import results
+import groundmotion
+from modelclasses import Model
+
+SUITE_COLUMNS = ['file_name', 'record', 'no_frames', 'k1', 'kp', 'max_F1_frm1', 'max_F1_frm2']
+
+RESPONSE_COLUMNS = ['max_F1_frm1', 'max_F1_frm2']
+
+
+# %% GROUND-MOTION RECORDS
+# records are read with groundmotion.load, once per process no matter how many points use them, and with a
+# record_cache directory the parsed records are kept as .npy files so later runs skip the text parsing
+
+RECORDS = {}
+
+
+def find_records(record_path, patterns=('*.AT2', '*.at2', '*.txt')):
+    # every record file in record_path, .txt files are read like support/el_centro.txt
+    return sorted(set(file_name for pattern in patterns for file_name in glob.glob(os.path.join(record_path, pattern))))
+
+
+def read_record(file_name, record_cache=None):
+    if file_name not in RECORDS:
+        RECORDS[file_name] = groundmotion.load(file_name, record_cache)
+    return RECORDS[file_name]
+
+
+# %% ONE MODEL PER SWEEP POINT AND RECORD SET
+# a point is built once with one time history case per record, every case is run in one analysis, and the base
+# reactions of every case are read in one call
+
+class SuiteStore(sweep.ResultStore):
+    # one row per (file_name, record), append takes the list of rows run_point returns for a point
+
+    columns = SUITE_COLUMNS
+    index_col = ['file_name', 'record']
+
+    def append(self, file_name, rows):
+        for row in rows:
+            super().append(file_name, row)
+
+
+def suite_points(points, records, dt=0.005, damp=0, record_cache=None, batch_size=None, stored=()):
+    # (file_name, k1, kp, flag, records, dt, damp, record_cache) for every sweep point and set of at most
+    # batch_size records, records of a point already in stored (file_name, record) pairs are left out
+
+    tasks = []
+    for file_name, k1_loop, kp_loop, flag in points:
+        pending = [record for record in records if (file_name, os.path.basename(record)) not in stored]
+        step = batch_size or len(pending) or 1
+        for i in range(0, len(pending), step):
+            tasks.append((file_name, k1_loop, kp_loop, flag, tuple(pending[i:i + step]), dt, damp, record_cache))
+
+    return tasks
+
+
+def extract_point(model_obj, flag, cases):
+    # peak base reactions of each frame for every case, in kip_ft_F
+
+    res = results.Results(model_obj.sap_obj, units=sap2000.UNITS['kip_ft_F'])
+
+    # select every case first so one JointReact call returns them all
+    for case in cases:
+        res.select(case)
+
+    extracted = {'max_F1_frm1': [], 'max_F1_frm2': []}
+    for case in cases:
+        max_F1 = results.envelope(res.joint_react('BASE', case), by=['obj'])['F1']
+
+        extracted['max_F1_frm1'].append(float(max_F1['1']))
+        extracted['max_F1_frm2'].append(float(max_F1['5']) if flag == 2 else None)
+
+    return extracted
+
+
+def run_point(model_obj, model_path, file_name, k1_loop, kp_loop, flag, records, dt=0.005, damp=0,
+              record_cache=None, bulk=False, cache=None, incremental=False):
+    # build, analyze, and extract one sweep point under every record, returning one SuiteStore row per record
+    # bulk, cache, and incremental work as in sweep.run_point
+
+    cases = ['TH_{}'.format(i + 1) for i in range(len(records))]
+
+    def build(model):
+        params = sweep.build_point(model, k1_loop, kp_loop, flag)
+
+        for i, record in enumerate(records):
+            time, values = read_record(record, record_cache)
+            model.loads.load_th_user('GM_{}'.format(i + 1), time, values)
+            model.loads.set_time_history(cases[i], 'GM_{}'.format(i + 1), n_steps=int(np.ceil(time[-1] / dt)),
+                                         dt=dt, damp=damp)
+
+        return params
+
+    params, extracted = sweep.analyze_point(model_obj, model_path, file_name, build,
+                                            lambda model: extract_point(model, flag, cases), anal_type=cases,
+                                            bulk=bulk, cache=cache, incremental=incremental,
+                                            extractor='suite.extract_point')
+
+    no_frames, kp, frm1_col_stiff = params[:3]
+
+    return [[os.path.basename(record), no_frames, frm1_col_stiff * 2, kp if flag == 2 else None,
+             extracted['max_F1_frm1'][i], extracted['max_F1_frm2'][i]] for i, record in enumerate(records)]
+
+
+def run_suite(points, records, model_path, store, n_workers=1, open_function=sweep.open_instance,
+              close_function=sweep.close_instance, dt=0.005, damp=0, record_cache=None, batch_size=None,
+              bulk=False, cache=None, incremental=False):
+    # every (record, sweep point) combination, returning the per-record table read back from the SuiteStore
+    # records already in store are skipped, so an interrupted suite resumes where it stopped
+    # with n_workers > 1 the point and record set tasks are spread over sweep.run_parallel workers
+
+    stored = set(store.load().index) if store.done else set()
+
+    tasks = suite_points(points, records, dt, damp, record_cache, batch_size, stored)
+
+    if n_workers > 1:
+        return sweep.run_parallel(tasks, model_path, n_workers=n_workers, open_function=open_function,
+                                  close_function=close_function, bulk=bulk, cache=cache, incremental=incremental,
+                                  store=store, run_function=run_point)
+
+    sap_object, sap_model = open_function()
+    model_obj = Model(sap_model)
+    model_obj.new()
+
+    for task in tasks:
+        store.append(task[0], run_point(model_obj, model_path, *task, bulk=bulk, cache=cache,
+                                        incremental=incremental))
+
+        print('Finished running {} under {} records ...'.format(task[0], len(task[4])))
+
+    close_function(sap_object)
+
+    store.sync()
+    return store.load()
+
+
+# %% STATISTICS OVER RECORDS
+
+def statistics(suite_df, columns=RESPONSE_COLUMNS):
+    # median and 84th percentile of each response over the records of every point, assuming the lognormal
+    # distribution usual for record suites, median = exp(mean(ln x)) and 84th percentile = median * exp(beta)
+    # where beta is the standard deviation of ln x
+
+    logs = np.log(suite_df[columns].astype(float).where(lambda df: df > 0))
+    grouped = logs.groupby(level='file_name', sort=False)
+    median = np.exp(grouped.mean())
+    beta = grouped.std()
+
+    stats_df = suite_df[['no_frames', 'k1', 'kp']].groupby(level='file_name', sort=False).first()
+    stats_df['n_records'] = suite_df.groupby(level='file_name', sort=False).size()
+
+    for column in columns:
+        stats_df[column + '_median'] = median[column]
+        stats_df[column + '_84'] = median[column] * np.exp(beta[column])
+        stats_df[column + '_beta'] = beta[column]
+
+    return stats_df
@@ -4,18 +4,20 @@ cwd = os.getcwd()
 
 print(cwd)
 
-file_path = 'el_centro.txt'
+file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'el_centro.txt')
 
 # Using Pandas with a column specification
 col_specification = [(0, 10), (20, 30), (30, 40), (30, 40), (50, 60), (70, 80)]
 
 data = pd.read_fwf(file_path, colspecs='infer', header=None)
 
-times = pd.concat([data[0], data[2], data[4]], sort=True)
+# each line holds three time and acceleration pairs, read the pairs row by row so time stays in order
+pairs = data.to_numpy().reshape(-1, 2)
+pairs = pairs[~pd.isna(pairs).any(axis=1)]
 
-# times.sortvalues(ascending=True)
+times = pd.Series(pairs[:, 0])
 
-accels = pd.concat([data[1], data[3], data[5]], sort=True)
+accels = pd.Series(pairs[:, 1])
 
 
 new_data = pd.concat([times, accels], axis=1)
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+import sweep
+
+INPUTS = ['k1', 'k2', 'kp', 'm1', 'm2']
+OUTPUTS = ['max_u1_frm1', 'max_u1_frm2', 'user_T', 'sap_T']
+
+
+# %% RADIAL BASIS FUNCTION SURROGATES OF STORED SWEEPS
+# every output of an out_df is interpolated over the inputs that vary in it with a radial basis function and a
+# linear polynomial, inputs are scaled to [0, 1] so k and m carry the same weight
+# leave-one-out errors of every stored point come from one inverse of the interpolation matrix (Rippa), their
+# root mean square is the cross-validated error of each output, and the relative error of the stored point nearest
+# a query, scaled by the distance to it over the distance to its own nearest stored point (the gap its leave-one-out
+# error was measured across), estimates the error there, queries outside the stored inputs get an infinite estimate
+
+
+# kernels of the squared distance, so no square root is taken, evaluated in place on the array they are given
+# squared distances are clipped to TINY so the logarithm of thin_plate is always finite
+TINY = np.finfo(float).tiny
+
+
+def thin_plate(r2):
+    r2_log = np.log(r2)
+    r2_log *= r2
+    r2_log *= 0.5
+    return r2_log
+
+
+def cubic(r2):
+    return np.power(r2, 1.5, out=r2)
+
+
+def linear(r2):
+    return np.sqrt(r2, out=r2)
+
+
+KERNELS = {
+    'thin_plate': thin_plate,
+    'cubic': cubic,
+    'linear': linear,
+}
+
+# queries are evaluated this many at a time, large enough for the distances to be one matrix product per block and
+# small enough for the (block, n_points) work arrays to stay in cache
+BLOCK = 1024
+
+
+def squared_distances(x, y):
+    # squared euclidean distances between the rows of x and y, accumulated in place one input at a time
+    d2 = np.subtract.outer(x[:, 0], y[:, 0])
+    d2 *= d2
+    for j in range(1, x.shape[1]):
+        step = np.subtract.outer(x[:, j], y[:, j])
+        step *= step
+        d2 += step
+    return d2
+
+
+class Surrogate:
+
+    def __init__(self, out_df, inputs=INPUTS, outputs=OUTPUTS, no_frames=2, kernel='thin_plate', smoothing=0):
+        # fits the out_df rows with no_frames frames, or every row when no_frames is None
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.no_frames = no_frames
+        self.kernel = KERNELS[kernel]
+        self.smoothing = smoothing
+
+        self.fit(out_df)
+
+    def fit(self, out_df):
+        self.out_df = out_df
+
+        df = out_df if self.no_frames is None else out_df.loc[out_df['no_frames'] == self.no_frames]
+        x_df = df[self.inputs].astype(float)
+        y_df = df[self.outputs].astype(float)
+
+        # inputs that do not vary are checked on queries instead of interpolated, outputs never computed are left out
+        self.used_inputs = [column for column in self.inputs if x_df[column].nunique() > 1]
+        self.constants = dict((column, x_df[column].iloc[0]) for column in self.inputs
+                              if x_df[column].nunique() == 1)
+        self.used_outputs = [column for column in self.outputs if y_df[column].notna().any()]
+
+        keep = x_df[self.used_inputs].notna().all(axis=1) & y_df[self.used_outputs].notna().all(axis=1)
+
+        # repeated inputs, e.g. single frames stored once per kp, are averaged
+        data = pd.concat([x_df.loc[keep, self.used_inputs], y_df.loc[keep, self.used_outputs]], axis=1)
+        data = data.groupby(self.used_inputs).mean().reset_index()
+
+        n, d = len(data), len(self.used_inputs)
+        if n < d + 2:
+            raise ValueError('{} stored points are too few to fit {} inputs'.format(n, d))
+
+        x = data[self.used_inputs].to_numpy()
+        self.lower = x.min(axis=0)
+        self.scale = x.max(axis=0) - self.lower
+        self.centers = (x - self.lower) / self.scale
+        y = data[self.used_outputs].to_numpy()
+
+        # |x - c|^2 of queries as the one matrix product [x, |x|^2, 1] [-2 c, 1, |c|^2]^T
+        self.centers_t = np.vstack([-2 * self.centers.T, np.ones(n), (self.centers ** 2).sum(axis=1)])
+
+        d2 = squared_distances(self.centers, self.centers)
+        np.fill_diagonal(d2, np.inf)
+        self.spacing_2 = d2.min(axis=1)
+        np.fill_diagonal(d2, TINY)
+
+        poly = np.hstack([np.ones((n, 1)), self.centers])
+        matrix = np.block([[self.kernel(d2) + self.smoothing * np.eye(n), poly],
+                           [poly.T, np.zeros((d + 1, d + 1))]])
+
+        inverse = np.linalg.inv(matrix)
+        self.coef = inverse @ np.vstack([y, np.zeros((d + 1, y.shape[1]))])
+
+        # leave-one-out error of every stored point without refitting
+        self.loo = self.coef[:n] / np.diag(inverse)[:n, np.newaxis]
+        self.loo_relative = np.abs(self.loo) / np.maximum(np.abs(y), np.finfo(float).tiny)
+
+        self.cv_error = pd.DataFrame({'rms': np.sqrt((self.loo ** 2).mean(axis=0)),
+                                      'max': np.abs(self.loo).max(axis=0),
+                                      'relative_rms': np.sqrt((self.loo_relative ** 2).mean(axis=0))},
+                                     index=self.used_outputs)
+
+        return self
+
+    def predict(self, query):
+        # values and estimated relative errors, (n_queries, n_outputs) arrays, of a DataFrame holding the inputs
+        # inputs left out of query are taken at the constant they had in every stored point
+
+        x = (query[self.used_inputs].to_numpy(dtype=float) - self.lower) / self.scale
+        n = len(self.centers)
+
+        # linear part for every query at once, radial part and nearest stored point block by block
+        values = self.coef[n] + x @ self.coef[n + 1:]
+        x_expanded = np.hstack([x, (x ** 2).sum(axis=1)[:, np.newaxis], np.ones((len(x), 1))])
+        nearest = np.empty(len(x), dtype=int)
+        nearest_2 = np.empty(len(x))
+
+        for start in range(0, len(x), BLOCK):
+            block = slice(start, start + BLOCK)
+
+            d2 = x_expanded[block] @ self.centers_t
+            np.maximum(d2, TINY, out=d2)
+
+            nearest[block] = d2.argmin(axis=1)
+            nearest_2[block] = d2[np.arange(len(d2)), nearest[block]]
+            values[block] += self.kernel(d2) @ self.coef[:n]
+
+        error = self.loo_relative[nearest] * np.sqrt(nearest_2 / self.spacing_2[nearest])[:, np.newaxis]
+
+        outside = ((x < -1e-9) | (x > 1 + 1e-9)).any(axis=1)
+        for column, value in self.constants.items():
+            if column in query.columns:
+                outside |= ~np.isclose(query[column].to_numpy(dtype=float), value, rtol=1e-9, atol=0)
+        error[outside] = np.inf
+
+        return values, error
+
+    def query(self, query, fallback=None, threshold=0.05, refit=True):
+        # surrogate outputs of every query row, with the largest estimated relative error and the source of the row
+        # rows estimated above threshold are analyzed with fallback(rows), which returns an out_df with one row per
+        # query row in order (e.g. sweep_fallback), and are added to the fit when refit is True
+
+        values, error = self.predict(query)
+
+        query_df = pd.DataFrame(values, columns=self.used_outputs, index=query.index)
+        query_df['error'] = error.max(axis=1)
+        query_df['source'] = 'surrogate'
+
+        if fallback is not None:
+            analyze = (query_df['error'] > threshold).to_numpy()
+
+            if analyze.any():
+                run_df = fallback(query.loc[analyze])
+
+                query_df.loc[analyze, self.used_outputs] = run_df[self.used_outputs].to_numpy(dtype=float)
+                query_df.loc[analyze, 'error'] = 0.0
+                query_df.loc[analyze, 'source'] = 'analysis'
+
+                if refit:
+                    self.fit(pd.concat([self.out_df, run_df]))
+
+        return query_df
+
+
+# %% COUPLED-FRAME SWEEPS
+
+def sweep_fallback(run, flag=2):
+    # fallback for Surrogate.query, analyzes the (k1, kp) of query rows as sweep points with run(points), which
+    # returns an out_df holding them (e.g. the run function of main.py)
+    # build_point fixes the masses and frame 2 stiffness, so only k1 and kp of the queries are used
+
+    def fallback(query):
+        points = [sweep.sweep_point(float(k1), float(kp), flag) for k1, kp in zip(query['k1'], query['kp'])]
+        out_df = run(points)
+        return out_df.loc[[point[0] for point in points]]
+
+    return fallback
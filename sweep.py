@@ -0,0 +1,567 @@
+import os
+import csv
+import queue
+import collections
+import multiprocessing
+from math import pi, sqrt
+import pandas as pd
+import sap2000
+import coupled
+import textmodel
+import results
+import instrument
+import bindings
+from modelclasses import Model
+
+OUT_COLUMNS = ['file_name', 'no_frames',
+               'max_u1_frm1', 'max_u1_frm2',
+               'm1', 'm2',
+               'k1', 'k2', 'kp',
+               'user_T', 'sap_T',
+               'frm1_bm_stiff', 'frm2_bm_stiff',
+               'frm1_col_stiff', 'frm2_col_stiff',
+               'frm1_bm_weight', 'frm2_bm_weight']
+
+
+def new_out_df():
+    out_df = pd.DataFrame(columns=OUT_COLUMNS)
+    out_df.set_index('file_name', inplace=True)
+    return out_df
+
+
+# %% CHECKPOINTED RESULTS
+# rows are appended to a csv file as points finish and forced to disk every sync_every rows, so a crash loses at
+# most sync_every points and a restarted sweep skips every file_name already stored
+
+class ResultStore:
+
+    # header and index of the csv file, subclasses store other tables the same way
+    columns = OUT_COLUMNS
+    index_col = 'file_name'
+
+    def __init__(self, file_name, sync_every=10):
+        self.file_name = file_name
+        self.sync_every = sync_every
+        self.pending = 0
+
+        # drop a row left half written by a crash
+        if os.path.exists(file_name):
+            with open(file_name, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+
+        new_file = not os.path.exists(file_name) or os.path.getsize(file_name) == 0
+
+        self.done = set() if new_file else set(self.load().index.get_level_values(0))
+
+        self.f = open(file_name, 'a', newline='')
+        self.writer = csv.writer(self.f)
+
+        if new_file:
+            self.writer.writerow(self.columns)
+            self.sync()
+
+    def append(self, file_name, row):
+        self.writer.writerow([file_name] + ['' if value is None else value for value in row])
+        self.done.add(file_name)
+
+        self.pending += 1
+        if self.pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.f.closed:
+            self.sync()
+            self.f.close()
+
+    def load(self):
+        # every stored row as an out_df
+        out_df = pd.read_csv(self.file_name, index_col=self.index_col)
+        return out_df.loc[~out_df.index.duplicated(keep='last')]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# %% SWEEP POINTS
+
+def sweep_point(k1_loop, kp_loop, flag):
+    # (file_name, k1, kp, flag) of one point
+    file_name = 'k1-{}_kp-{}_frm-{}'.format(k1_loop / 1000, kp_loop / 1000, flag)
+    return file_name, k1_loop, kp_loop, flag
+
+
+def sweep_points(n12_range, kp1_range, run_flags, m1, w2):
+    # (file_name, k1, kp, flag) for every point of the sweep, in the order main.py runs them
+
+    points = []
+
+    for n12_loop in n12_range:
+
+        k1_loop = round(m1 * (n12_loop * w2) ** 2, 2)
+
+        for kp1_loop in kp1_range:
+
+            kp_loop = round(k1_loop * kp1_loop, 4)
+
+            for flag in run_flags:
+                points.append(sweep_point(k1_loop, kp_loop, flag))
+
+    return points
+
+
+def build_point(model_obj, k1_loop, kp_loop, flag):
+    # define and load model geometry, properties, and loading for one sweep point
+
+    # %% DEFINE MODEL GEOMETRY, PROPERTIES, AND LOADING
+
+    # set degrees of freedom
+    model_obj.props.set_mdl_dof_df(dof='2-D')
+
+    # load degrees of freedom for 2-D motion into sap2000
+    model_obj.props.load_mdl_dof_df()
+
+    # set material properties
+    mat_prop = {'material': 'STEEL', 'material_id': sap2000.MATERIAL_TYPES['MATERIAL_STEEL'],
+                'youngs': 29000000, 'poisson': 0.3, 't_coeff': 6E-06, 'weight': 0}
+
+    model_obj.props.add_mat_df(mat_prop)
+
+    # load dataframe of material properties into sap2000
+    model_obj.props.load_mat_df()
+
+    frm1_col_stiff = k1_loop / 2
+    frm1_bm_stiff = 50 * frm1_col_stiff
+
+    frm2_col_stiff = 50000
+    frm2_bm_stiff = 50 * frm2_col_stiff
+
+    # generate frame properties
+    model_obj.props.gen_frm(frm1_col_stiff, frm1_bm_stiff, frm2_col_stiff, frm2_bm_stiff)
+
+    # load dataframe of frame properties into sap2000
+    model_obj.props.load_frm_df()
+
+    # add link property, single frame models leave it out so they do not depend on kp
+
+    dof = [False] * 6
+    fixed = [0] * 6
+    ke = [0] * 6
+    ce = [0] * 6
+    dj2 = 0
+    dj3 = 0
+
+    dof[0] = True
+
+    ke[0] = kp_loop
+    kp = ke[0]
+
+    link_prop = {'name': 'Default', 'dof': dof, 'fixed': fixed,
+                 'ke': ke, 'ce': ce, 'dj2': dj2, 'dj3': dj3,
+                 'ke_coupled': False, 'ce_coupled': False,
+                 'notes': '', 'guid': 'Default', 'w': 0,
+                 'm': 0, 'R1': 0, 'R2': 0, 'R3': 0}
+
+    if flag == 2:
+        model_obj.props.add_link_df(link_prop)
+
+        model_obj.props.load_link_df()
+
+    # switch to k-ft units
+    model_obj.switch_units(units=sap2000.UNITS['lb_ft_F'])
+
+    # generate frames given arguments set into the gen_frm_df() function and load frames into sap2000
+
+    no_frames = flag
+    no_stories = 1
+    frm_width = 20
+    frm1_bm_weight = 125000
+    frm2_bm_weight = 125000
+    frm_height = 20
+    frm_spacing = 20
+
+    model_obj.geometry.gen_frm(no_frames=no_frames, no_stories=no_stories, frm_width=frm_width,
+                               frm_height=frm_height, frm_spacing=frm_spacing,
+                               frm1_bm_weight=frm1_bm_weight, frm2_bm_weight=frm2_bm_weight)
+
+    model_obj.geometry.load_frm_df()
+
+    if flag == 2:
+        # add link
+
+        model_obj.geometry.new_link()
+
+        model_obj.geometry.load_link_df()
+
+    # add restraints
+
+    restraints = model_obj.geometry.set_restraints('fixed')
+
+    # base joints, whose reactions are read in one call
+
+    model_obj.geometry.set_group('BASE', joints=restraints)
+
+    # refresh sap2000 view to show elements
+
+    model_obj.refresh_view()
+
+    # add response spectrum
+
+    model_obj.loads.set_rsa()
+
+    return (no_frames, kp, frm1_col_stiff, frm1_bm_stiff, frm2_col_stiff, frm2_bm_stiff,
+            frm1_bm_weight, frm2_bm_weight)
+
+
+def extract_point(model_obj, flag):
+    # peak base reactions of each frame under RSA and the period of the first (longest) mode, in kip_ft_F
+
+    res = results.Results(model_obj.sap_obj, units=sap2000.UNITS['kip_ft_F'])
+
+    # reactions of every base joint in one call, joint 1 is the left column of frame 1 and joint 5 of frame 2
+    max_F1 = results.envelope(res.joint_react('BASE', 'RSA'), by=['obj'])['F1']
+
+    max_F1_frm1 = float(max_F1['1'])
+
+    max_F1_frm2 = None
+    if flag == 2:
+
+        max_F1_frm2 = float(max_F1['5'])
+
+    # the first mode is the one user_T predicts, the shortest period belongs to the highest (axial) mode
+    sap_T = float(res.modal_period()['period'].max())
+
+    return {'max_F1_frm1': max_F1_frm1, 'max_F1_frm2': max_F1_frm2, 'sap_T': sap_T}
+
+
+def analyze_point(model_obj, model_path, file_name, build, extract, anal_type='RSA', bulk=False, cache=None,
+                  incremental=False, extractor=None):
+    # build(model_obj) defines a model and returns its parameters, extract(model_obj) reads its results after the
+    # anal_type cases (one name or a list of them) are run, returns both
+    # with bulk=True the model is recorded in memory, written as one .$2k text file, and opened in a single call
+    # with a resultcache.ResultCache, a model identical to one analyzed before is answered from the cache without
+    # any call to sap2000, extractor names the function behind extract so results of different ones never collide
+    # with incremental=True the model is kept after the analysis and the next point only pushes the sections,
+    # link properties, and masses that changed (Model.update), it is rebuilt when anything else changes
+
+    # with an instrument.wrap sap_obj, the calls and build, analyze, and extract times are kept under file_name
+    with instrument.point(model_obj.sap_obj, file_name):
+
+        recorder, key, extracted = None, None, None
+
+        with instrument.phase(model_obj.sap_obj, 'build'):
+
+            if bulk or cache is not None or incremental:
+                recorder = textmodel.new_recorder()
+                params = build(recorder)
+
+                if cache is not None:
+                    if cache.backend is None:
+                        cache.backend = sap2000.get_version(model_obj.sap_obj)
+                    key = cache.key(recorder.sap_obj, anal_type if isinstance(anal_type, str) else ','.join(anal_type),
+                                    extractor)
+                    extracted = cache.get(key)
+
+            if extracted is None:
+
+                if incremental and model_obj.update(recorder):
+                    pass
+
+                elif bulk:
+                    if incremental and not model_obj.geometry.frm_df.empty:
+                        model_obj.reset()
+
+                    textmodel.load(model_obj.sap_obj, textmodel.export(recorder, model_path, file_name))
+
+                    if incremental:
+                        model_obj.adopt(recorder)
+
+                else:
+                    if incremental and not model_obj.geometry.frm_df.empty:
+                        model_obj.reset()
+
+                    params = build(model_obj)
+
+        if extracted is None:
+
+            # %% SAVE MODEL AND RUN IT
+
+            with instrument.phase(model_obj.sap_obj, 'analyze'):
+
+                model_obj.switch_units(units=sap2000.UNITS['kip_in_F'])
+
+                model_obj.saveandrun(model_path=model_path, file_name=file_name, anal_type=anal_type)
+
+                model_obj.refresh_view()
+
+            # %% OBTAIN DATA
+
+            with instrument.phase(model_obj.sap_obj, 'extract'):
+
+                extracted = extract(model_obj)
+
+                if cache is not None:
+                    cache.put(key, extracted)
+
+            if not incremental:
+                with instrument.phase(model_obj.sap_obj, 'reset'):
+                    model_obj.reset()
+
+    return params, extracted
+
+
+def run_point(model_obj, model_path, file_name, k1_loop, kp_loop, flag, bulk=False, cache=None,
+              incremental=False):
+    # build, analyze, and extract one sweep point under RSA, returning its out_df row
+    # the extractor name changes with what extract_point returns (sap_T of the first mode since v2), so cached
+    # results of an older version are never read
+
+    params, extracted = analyze_point(model_obj, model_path, file_name,
+                                      lambda model: build_point(model, k1_loop, kp_loop, flag),
+                                      lambda model: extract_point(model, flag), bulk=bulk, cache=cache,
+                                      incremental=incremental, extractor='sweep.extract_point.v2')
+
+    (no_frames, kp, frm1_col_stiff, frm1_bm_stiff, frm2_col_stiff, frm2_bm_stiff,
+     frm1_bm_weight, frm2_bm_weight) = params
+
+    m1 = frm1_bm_weight / sap2000.GRAVITY / 12
+    k1 = frm1_col_stiff * 2
+    user_T = 2 * pi * sqrt(m1 / k1)
+
+    m2 = None
+    k2 = None
+    if flag == 2:
+
+        m2 = frm2_bm_weight / sap2000.GRAVITY / 12
+        k2 = frm2_col_stiff * 2
+
+        user_T = float(coupled.eigen(m1, m2, k1, k2, kp)[1][0])
+
+    elif flag == 1:
+        frm2_bm_stiff = None
+        frm2_col_stiff = None
+        frm2_bm_weight = None
+        kp = None
+
+    return [no_frames,
+            extracted['max_F1_frm1'], extracted['max_F1_frm2'],
+            m1, m2,
+            k1, k2, kp,
+            user_T, extracted['sap_T'],
+            frm1_bm_stiff, frm2_bm_stiff,
+            frm1_col_stiff, frm2_col_stiff,
+            frm1_bm_weight, frm2_bm_weight]
+
+
+# %% PARALLEL EXECUTION OVER SEVERAL SAP2000 INSTANCES
+# open_instance and close_instance must be top-level functions so they can be sent to worker processes, swap
+# them for a fake sap_obj to run the executor without SAP2000
+
+def open_instance(visible=False, binding_version=None):
+    # bind functools.partial(open_instance, binding_version='25.0.0') to start workers on pre-generated bindings
+    sap_object = sap2000.attachtoapi(attach_to_instance=False, specify_path=False, binding_version=binding_version)
+    return sap_object, bindings.cached(sap2000.opensap2000(sap_object, visible=visible))
+
+
+def close_instance(sap_object):
+    sap2000.closesap2000(sap_object, save_model=False)
+
+
+def worker(worker_id, model_path, tasks, result_queue, open_function, close_function, bulk=False, cache=None,
+           incremental=False, run_function=run_point, profile=False, warm=False):
+
+    # every worker saves into its own directory so .sdb files never collide
+    worker_path = os.path.join(model_path, 'worker{}'.format(worker_id))
+    os.makedirs(worker_path, exist_ok=True)
+
+    sap_object, model_obj = None, None
+
+    # with profile=True every OAPI call is timed, over restarted instances too, and the report is written to
+    # worker_path/profile.json
+    recorder = instrument.Recorder() if profile else None
+
+    def start():
+        sap_object, sap_model = open_function()
+        model_obj = Model(instrument.wrap(sap_model, profile, recorder))
+        model_obj.new()
+        return sap_object, model_obj
+
+    # with warm=True the instance is started before the first point arrives (daemon.Daemon), a worker that cannot
+    # start one exits
+    if warm:
+        sap_object, model_obj = start()
+        result_queue.put(('ready', worker_id, None, None))
+
+    for index, point in iter(tasks.get, None):
+        result_queue.put(('started', worker_id, index, None))
+
+        try:
+            if sap_object is None:
+                sap_object, model_obj = start()
+
+            row = run_function(model_obj, worker_path, *point, bulk=bulk, cache=cache, incremental=incremental)
+            result_queue.put(('done', worker_id, index, row))
+
+        except Exception as error:
+            result_queue.put(('failed', worker_id, index, repr(error)))
+
+            # restart the instance for the next point
+            try:
+                close_function(sap_object)
+            except Exception:
+                pass
+
+            sap_object, model_obj = None, None
+
+    if sap_object is not None:
+        close_function(sap_object)
+
+    if recorder is not None:
+        recorder.export(os.path.join(worker_path, 'profile.json'))
+
+
+def run_parallel(points, model_path, n_workers=2, open_function=open_instance, close_function=close_instance,
+                 max_retries=2, poll=1.0, bulk=False, cache=None, incremental=False, store=None,
+                 run_function=run_point, profile=False):
+    # run sweep points on n_workers SAP2000 instances, returning the merged out_df
+    # with a ResultStore, rows are written to it as they arrive instead of being kept in memory, and the returned
+    # out_df is read back from it
+    # run_function(model_obj, model_path, *point, ...) runs one point, it must be a top-level function and other
+    # functions than run_point need a store for the rows they return (e.g. suite.SuiteStore)
+    # with profile=True every worker writes the OAPI call timings of its points to model_path/worker<id>/profile.json
+    # points that fail are retried on a fresh instance up to max_retries times, and points held by a worker
+    # process that dies are requeued on a replacement worker
+    # every worker has its own task queue and is handed its next point only when it answers the last one, so the
+    # point a worker holds is always known, also when it dies before telling it started it
+
+    context = multiprocessing.get_context('spawn')
+    result_queue = context.Queue()
+
+    pending = collections.deque(range(len(points)))
+    queues = {}
+    assigned = {}  # worker_id: index of the point handed to it
+    in_flight = {}  # worker_id: index of the point it started
+    ready = set()  # workers that have answered since they were started
+
+    def start(worker_id):
+        ready.discard(worker_id)
+        queues[worker_id] = context.Queue()
+        process = context.Process(target=worker, args=(worker_id, model_path, queues[worker_id], result_queue,
+                                                       open_function, close_function, bulk, cache, incremental,
+                                                       run_function, profile),
+                                  daemon=True)
+        process.start()
+        return process
+
+    def hand_out():
+        # next pending points to the live workers holding none, a dead one is replaced before it gets any
+        for worker_id, process in workers.items():
+            if pending and worker_id not in assigned and process.is_alive():
+                index = pending.popleft()
+                assigned[worker_id] = index
+                queues[worker_id].put((index, points[index]))
+
+    workers = dict((worker_id, start(worker_id)) for worker_id in range(n_workers))
+    hand_out()
+
+    attempts = [0] * len(points)
+    rows = {}
+    remaining = len(points)
+    startup_failures = 0
+
+    def retry(index, message):
+        nonlocal remaining
+        attempts[index] += 1
+        if attempts[index] <= max_retries:
+            pending.append(index)
+        else:
+            print(message)
+            remaining -= 1
+
+    def receive(status, worker_id, index, value):
+        nonlocal remaining, startup_failures
+
+        # a worker that answers has started, only workers dying before that count against startup
+        if worker_id not in ready:
+            ready.add(worker_id)
+            startup_failures = 0
+
+        if status == 'started':
+            in_flight[worker_id] = index
+            return
+
+        in_flight.pop(worker_id, None)
+        assigned.pop(worker_id, None)
+
+        if status == 'done':
+            if store is None:
+                rows[index] = value
+            else:
+                store.append(points[index][0], value)
+            remaining -= 1
+            print('Finished running {} ...'.format(points[index][0]))
+
+        else:
+            retry(index, 'There were issues running {}: {}'.format(points[index][0], value))
+
+        hand_out()
+
+    while remaining:
+        try:
+            receive(*result_queue.get(timeout=poll))
+            continue
+
+        except queue.Empty:
+            dead = [worker_id for worker_id, process in workers.items() if not process.is_alive()]
+
+        # answers a worker sent before dying are read before its point is requeued
+        while True:
+            try:
+                receive(*result_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        for worker_id in dead:
+            index = assigned.pop(worker_id, None)
+
+            if worker_id in in_flight:
+                index = in_flight.pop(worker_id)
+                retry(index, 'Worker {} died running {}'.format(worker_id, points[index][0]))
+
+            elif index is not None:
+                # the worker died before starting the point it was handed, which is not held against the point
+                pending.appendleft(index)
+
+            if worker_id not in ready:
+                startup_failures += 1
+                if startup_failures > max_retries * n_workers:
+                    raise RuntimeError('Sweep workers keep exiting before running any point')
+
+            workers[worker_id] = start(worker_id)
+
+        hand_out()
+
+    for worker_id in workers:
+        queues[worker_id].put(None)
+
+    for process in workers.values():
+        process.join()
+
+    if store is not None:
+        store.sync()
+        return store.load()
+
+    out_df = new_out_df()
+    for index in sorted(rows):
+        out_df.loc[points[index][0]] = rows[index]
+
+    return out_df
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import sweep
+import sap2000
+import adaptive
+import simulator
+from modelclasses import Model
+
+
+def counted(function):
+    calls = []
+
+    def evaluate(xy):
+        calls.append(list(xy))
+        return [function(x, y) for x, y in xy]
+
+    return evaluate, calls
+
+
+def test_flat_responses_keep_the_coarse_grid():
+    evaluate, calls = counted(lambda x, y: [1.0, 2.0 * x + y])
+
+    samples_df = adaptive.sample(evaluate, [0, 1, 2], [0, 1], tol=1e-6, max_level=5, responses=['a', 'b'])
+
+    # the cell centers of level 1 are the only points added to the 3 x 2 grid
+    assert len(calls) == 2
+    assert len(samples_df) == 6 + 2
+    assert samples_df['level'].max() == 1
+    assert samples_df.columns.tolist() == ['x', 'y', 'a', 'b', 'level']
+
+
+def test_refinement_stops_at_max_level():
+    evaluate, calls = counted(lambda x, y: [np.tanh(50 * (x - 0.3))])
+
+    samples_df = adaptive.sample(evaluate, [0, 1], [0, 1], tol=1e-3, max_level=3)
+
+    assert samples_df['level'].max() == 3
+    assert len(calls) == 1 + 2 * 3
+    assert len(set(zip(samples_df['x'], samples_df['y']))) == len(samples_df)
+
+    # points along the steep band are 1 / 2 ** max_level apart, the flat side at x = 1 is not refined that far
+    assert np.isclose(np.diff(np.unique(samples_df['x'])).min(), 1 / 8)
+    assert not ((samples_df['x'] > 0.75) & (samples_df['level'] == 3)).any()
+
+
+def serial_run(model_path):
+    sap_object, sap_model = simulator.open_instance()
+    model_obj = Model(sap_model)
+    model_obj.new()
+
+    def run(points):
+        out_df = sweep.new_out_df()
+        for point in points:
+            out_df.loc[point[0]] = sweep.run_point(model_obj, model_path, *point)
+        return out_df
+
+    return run
+
+
+def test_sweep_evaluator_pairs_runs_by_flag(tmp_path):
+    m1 = 125000 / sap2000.GRAVITY / 12
+    w2 = np.sqrt(100000 / m1)
+    xy = [(0.5, 0.5), (1.0, 0.25)]
+
+    responses = adaptive.sweep_evaluator(serial_run(str(tmp_path)), m1, w2, (1, 2))(xy)
+    assert np.allclose(adaptive.sweep_evaluator(serial_run(str(tmp_path)), m1, w2, (2, 1))(xy), responses)
+
+    # coupling the softer frame 1 to frame 2 stiffens it and shortens its period
+    assert responses[0][0] < 1 and responses[0][1] < 1
+
+    # identical frames move in phase in their first mode, the link carries nothing
+    assert np.allclose(responses[1], 1)
+
+    with pytest.raises(ValueError, match='run_flags'):
+        adaptive.sweep_evaluator(serial_run(str(tmp_path)), m1, w2, (2,))
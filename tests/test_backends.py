@@ -0,0 +1,14 @@
+import backends
+
+
+def fail_open():
+    raise RuntimeError('Cannot start a new instance of the program.')
+
+
+def test_compare_skips_backends_that_cannot_start(monkeypatch):
+    monkeypatch.setitem(backends.BACKENDS, 'failing', (fail_open, None))
+
+    bench_df = backends.compare(('failing',), n=1)
+
+    assert bench_df.empty
+    assert bench_df.columns.tolist() == backends.OUT_COLUMNS
@@ -0,0 +1,34 @@
+import numpy as np
+import coupled
+
+
+def test_eigen_matches_numpy_and_is_mass_orthonormal():
+    m1, m2, k2 = 2.0, 1.0, 100.0
+    k1, kp = coupled.grid([0.5, 1.0, 1.7], [0.01, 0.3, 2.0], m1, m2, k2)
+
+    omega, period, shapes = coupled.eigen(m1, m2, k1, k2, kp)
+
+    m = np.diag([m1, m2])
+    k = np.empty(k1.shape + (2, 2))
+    k[..., 0, 0], k[..., 0, 1], k[..., 1, 0], k[..., 1, 1] = k1 + kp, -kp, -kp, k2 + kp
+    values = np.linalg.eigvals(np.linalg.solve(m, k))
+
+    assert np.allclose(omega, np.sqrt(np.sort(values.real, axis=-1)), rtol=1e-12)
+    assert np.allclose(period, 2 * np.pi / omega, rtol=1e-12)
+    assert np.allclose(np.swapaxes(shapes, -1, -2) @ m @ shapes, np.eye(2), atol=1e-12)
+    assert np.allclose(np.swapaxes(shapes, -1, -2) @ k @ shapes, omega[..., np.newaxis] ** 2 * np.eye(2),
+                       rtol=1e-10, atol=1e-10 * k2)
+
+
+def test_eigen_without_coupling_spring_gives_the_separate_frames():
+    m1, m2, k1, k2 = 2.0, 1.0, 50.0, 100.0
+
+    omega, period, shapes = coupled.eigen(m1, m2, k1, k2, 0.0)
+
+    assert np.allclose(omega, [np.sqrt(k1 / m1), np.sqrt(k2 / m2)], rtol=1e-12)
+    assert np.allclose(shapes, np.diag([1 / np.sqrt(m1), 1 / np.sqrt(m2)]), atol=1e-12)
+
+    # tuned frames without coupling have a repeated frequency, the shapes must still be orthonormal
+    omega, period, shapes = coupled.eigen(m1, m2, 2 * k2, k2, 0.0)
+    assert np.allclose(omega, np.sqrt(k2 / m2), rtol=1e-12)
+    assert np.allclose(shapes.T @ np.diag([m1, m2]) @ shapes, np.eye(2), atol=1e-12)
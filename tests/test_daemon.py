@@ -0,0 +1,70 @@
+import os
+import time
+import threading
+import pytest
+import sweep
+import daemon
+
+
+def test_authkey_reads_the_key_of_a_process_that_created_it_first(tmp_path, monkeypatch):
+    key_file = str(tmp_path / 'key')
+    os_open = os.open
+
+    def open_after_another_process(path, flags, mode=0o777):
+        # another daemon writes its key between the failed read and the exclusive create
+        with open(path, 'wb') as f:
+            f.write(b'other')
+        return os_open(path, flags, mode)
+
+    monkeypatch.setattr(os, 'open', open_after_another_process)
+    assert daemon.authkey(key_file) == b'other'
+
+    monkeypatch.setattr(os, 'open', os_open)
+    assert daemon.authkey(key_file) == b'other'
+
+
+def fail_open():
+    raise OSError('no instance can be started')
+
+
+def run_in_thread(function, *args):
+    outcome = {}
+
+    def run():
+        try:
+            outcome['value'] = function(*args)
+        except Exception as error:
+            outcome['error'] = error
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_stop_answers_jobs_still_pending(tmp_path):
+    server = daemon.Daemon(str(tmp_path), address=str(tmp_path / 'daemon.sock'), key=b'key')
+
+    # no instances are running, so the job waits until the daemon stops
+    thread, outcome = run_in_thread(server.submit, 'sweep', [sweep.sweep_point(50000.0, 25000.0, 1)])
+    time.sleep(0.1)
+    server.stop()
+    thread.join(5)
+
+    assert isinstance(outcome['error'], RuntimeError)
+    with pytest.raises(RuntimeError):
+        server.submit('sweep', [sweep.sweep_point(50000.0, 25000.0, 1)])
+
+
+def test_replacements_that_never_start_fail_pending_jobs(tmp_path):
+    server = daemon.Daemon(str(tmp_path), address=str(tmp_path / 'daemon.sock'), key=b'key', poll=0.1)
+    server.start()
+
+    # every replacement instance fails to start once the running one dies
+    server.open_function = fail_open
+    server.workers[0].kill()
+
+    thread, outcome = run_in_thread(server.submit, 'sweep', [sweep.sweep_point(50000.0, 25000.0, 1)])
+    thread.join(120)
+
+    assert 'keep exiting' in str(outcome['error'])
+    server.stopping = True
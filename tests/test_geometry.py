@@ -0,0 +1,39 @@
+import pytest
+import textmodel
+
+
+def test_new_link_counts_stories_from_the_ground():
+    model = textmodel.new_recorder()
+    model.geometry.gen_frm(no_frames=2, no_stories=3, no_bays=2)
+
+    for story_no in (0, 1, 2, 3):
+        model.geometry.new_link(story_no=story_no, user_name='link{}'.format(story_no))
+
+    links = model.geometry.frm_df.set_index('user_name')
+    assert [links.loc['link{}'.format(story_no), 'story_no'] for story_no in (0, 1, 2, 3)] == [3, 1, 2, 3]
+    assert links.loc['link1', 'zi'] == links.loc['link1', 'zj'] == 20
+
+    with pytest.raises(ValueError):
+        model.geometry.new_link(story_no=4)
+
+    with pytest.raises(ValueError, match='Frame 3 has no beam stories'):
+        model.geometry.new_link(frame_no=3)
+
+
+def test_assigning_frm_df_rebuilds_the_indexes():
+    model = textmodel.new_recorder()
+    geometry = model.geometry
+    geometry.gen_frm(no_frames=2, no_stories=3, no_bays=1, frm_height=20)
+    geometry.number_joints()
+
+    # the same frames in reverse order with every member raised by 10
+    frm_df = geometry.frm_df.iloc[::-1].copy()
+    frm_df[['zi', 'zj']] += 10
+    geometry.frm_df = frm_df
+
+    assert geometry.names == dict((name, index) for index, name in enumerate(frm_df['user_name']))
+    assert geometry.get_end(frm_df['user_name'].iloc[0], 'j')[2] == frm_df['zj'].iloc[0]
+
+    geometry.new_link(story_no=1, user_name='link1')
+    link = geometry.frm_df.set_index('user_name').loc['link1']
+    assert link['zi'] == link['zj'] == 30
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import native
+import groundmotion
+
+
+def test_spectrum_matches_sdof_state_space_runs():
+    dt, periods, damping = 0.01, np.array([0.0, 0.1, 0.5, 2.0]), np.array([0.0, 0.05, 0.2])
+    time = dt * np.arange(1001)
+    ag = np.sin(7 * time) * np.exp(-0.3 * time) + 0.3 * np.sin(23 * time)
+
+    sd, psv, psa = groundmotion.spectrum(ag, dt, periods, damping)
+
+    omega = 2 * np.pi / periods[1:, np.newaxis]
+    m = np.ones(omega.shape + (1,))
+    k = (omega ** 2)[..., np.newaxis, np.newaxis]
+    c = (2 * damping * omega)[..., np.newaxis, np.newaxis]
+    res = native.state_space(m, k, c, ag, dt)
+
+    assert sd.shape == (4, 3)
+    assert np.allclose(sd[1:], res['displ'][..., 0], rtol=1e-8)
+    assert np.allclose(psa[1:], omega ** 2 * sd[1:], rtol=1e-12)
+    assert np.allclose(psa[0], np.abs(ag).max()) and (sd[0] == 0).all()
+
+
+def write_at2(file_name, values, dt):
+    with open(file_name, 'w') as f:
+        f.write('PEER NGA STRONG MOTION DATABASE RECORD\nTEST RECORD\nACCELERATION TIME SERIES IN UNITS OF G\n')
+        f.write('NPTS=  {}, DT=   {:.4f} SEC\n'.format(len(values), dt))
+        for i in range(0, len(values), 5):
+            f.write(''.join('{:15.7E}'.format(value) for value in values[i:i + 5]) + '\n')
+
+
+def test_read_at2_roundtrip(tmp_path):
+    values = np.sin(np.arange(23) / 3)
+    write_at2(str(tmp_path / 'record.AT2'), values, 0.005)
+
+    time, read = groundmotion.read_at2(str(tmp_path / 'record.AT2'))
+
+    assert np.allclose(time, 0.005 * np.arange(23))
+    assert np.allclose(read, values, rtol=1e-7)
+
+
+def test_load_caches_records_and_refreshes_changed_files(tmp_path):
+    file_name = str(tmp_path / 'record.at2')
+    cache_path = str(tmp_path / 'cache')
+    write_at2(file_name, np.arange(12.0), 0.01)
+
+    time, values = groundmotion.load(file_name, cache_path)
+    cached_time, cached_values = groundmotion.load(file_name, cache_path)
+    assert len(os.listdir(cache_path)) == 1
+    assert np.array_equal(cached_time, time) and np.array_equal(cached_values, np.arange(12.0))
+
+    # a changed file hashes to a new entry instead of reading the stale one
+    write_at2(file_name, -np.arange(12.0), 0.01)
+    time, values = groundmotion.load(file_name, cache_path)
+    assert len(os.listdir(cache_path)) == 2
+    assert np.array_equal(values, -np.arange(12.0))
+
+    # text records are cached with their reading options
+    time, values = groundmotion.load(groundmotion.EL_CENTRO, cache_path)
+    assert np.array_equal(values, groundmotion.read_time_history()[1])
+    assert len(os.listdir(cache_path)) == 3
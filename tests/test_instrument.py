@@ -0,0 +1,47 @@
+import sap2000
+import simulator
+import instrument
+
+
+def test_proxy_counts_calls_per_point():
+    sap_object, sap_model = simulator.open_instance()
+    proxy = instrument.wrap(sap_model)
+    recorder = instrument.recorder_of(proxy)
+
+    proxy.InitializeNewModel(sap2000.UNITS['lb_in_F'])
+    with instrument.point(proxy, 'p1'):
+        with instrument.phase(proxy, 'build'):
+            for x in range(3):
+                proxy.FrameObj.AddByCoord(x, 0, 0, x, 0, 10)
+        proxy.Analyze.SetActiveDOF([True, False, True, False, True, False])
+        proxy.GetPresentUnits()
+
+    # sub-objects and timed methods are cached on the proxy after their first use
+    assert proxy.FrameObj is proxy.FrameObj
+    assert proxy.GetPresentUnits() == sap2000.UNITS['lb_in_F']
+
+    report = recorder.report()
+    calls = report['points']['p1']['calls']
+    assert calls['FrameObj.AddByCoord']['count'] == 3
+    assert calls['FrameObj.AddByCoord']['arg_items'] == 18
+    assert calls['Analyze.SetActiveDOF']['arg_items'] == 6
+    assert report['points']['setup']['calls']['InitializeNewModel']['count'] == 1
+    assert report['totals']['GetPresentUnits']['count'] == 2
+    assert 'build' in report['points']['p1']['phases_s']
+
+    simulator.close_instance(sap_object)
+
+
+def test_disabled_instrumentation_passes_the_model_through():
+    sap_object, sap_model = simulator.open_instance()
+
+    assert instrument.wrap(sap_model, enabled=False) is sap_model
+    assert instrument.recorder_of(sap_model) is None
+    with instrument.point(sap_model, 'p1'), instrument.phase(sap_model, 'build'):
+        sap_model.InitializeNewModel(sap2000.UNITS['lb_in_F'])
+
+    # without a recorder the proxy only caches, its methods are the model's own
+    proxy = instrument.Proxy(sap_model, None)
+    assert proxy.InitializeNewModel == sap_model.InitializeNewModel
+
+    simulator.close_instance(sap_object)
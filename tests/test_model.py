@@ -0,0 +1,57 @@
+import sap2000
+import sweep
+import simulator
+import textmodel
+import pandas as pd
+from modelclasses import Model, Table, TableAttribute
+
+
+def test_update_pushes_props_in_the_units_they_were_loaded_in(tmp_path):
+    sap_object, sap_model = simulator.open_instance()
+    model_obj = Model(sap_model)
+    model_obj.new()
+    sweep.run_point(model_obj, str(tmp_path), *sweep.sweep_point(50000.0, 25000.0, 2), incremental=True)
+    assert model_obj.props.units == {'frm_df': sap2000.UNITS['lb_in_F'], 'link_df': sap2000.UNITS['lb_in_F']}
+
+    recorder = textmodel.new_recorder()
+    sweep.build_point(recorder, 60000.0, 30000.0, 2)
+    assert model_obj.update(recorder)
+
+    # the same point with props loaded in other units has to be rebuilt
+    recorder = textmodel.new_recorder()
+    recorder.switch_units(sap2000.UNITS['kip_ft_F'])
+    sweep.build_point(recorder, 70000.0, 30000.0, 2)
+    assert recorder.props.units['frm_df'] == sap2000.UNITS['kip_ft_F']
+    assert not model_obj.update(recorder)
+
+    simulator.close_instance(sap_object)
+
+
+class Owner:
+    df = TableAttribute()
+
+    def __init__(self):
+        self._df = Table(['name', 'value'])
+        self.index = {}
+
+    def reindex(self):
+        self.index = dict((name, i) for i, name in enumerate(self._df.df['name']))
+
+
+def test_table_rows_materialize_in_order_and_assignment_reindexes():
+    owner = Owner()
+    owner._df.append([{'name': 'a', 'value': 1}, {'name': 'b', 'value': 2}])
+    owner._df.extend(pd.DataFrame({'name': ['c'], 'value': [3]}))
+    owner._df.append([{'name': 'd', 'value': 4}])
+
+    # pending rows are read and written in place before they are materialized
+    assert len(owner._df) == 4 and owner._df.get(3, 'name') == 'd'
+    owner._df.set(3, 'value', 5)
+
+    assert owner.df['name'].tolist() == ['a', 'b', 'c', 'd']
+    assert owner.df['value'].tolist() == [1, 2, 3, 5]
+    assert owner.index == {}
+
+    owner.df = owner.df.iloc[::-1]
+    assert owner.df.index.tolist() == [0, 1, 2, 3]
+    assert owner.index == {'d': 0, 'c': 1, 'b': 2, 'a': 3}
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import sweep
+import native
+import textmodel
+
+
+def coupled_model():
+    model = textmodel.new_recorder()
+    sweep.build_point(model, 50000.0, 25000.0, 2)
+    return model
+
+
+def test_links_are_attached_to_the_frame_joints_at_their_ends():
+    model = coupled_model()
+    native_model = native.NativeModel(model)
+
+    for joint_i, joint_j, k_axial, k_shear in native_model.links.values():
+        assert native_model.joints[joint_i][1] == native_model.joints[joint_j][1]
+        assert native_model.joints[joint_i][0] < native_model.joints[joint_j][0]
+
+
+def test_invalid_models_raise_value_error():
+    model = coupled_model()
+    model.props.set_mdl_dof_df(dof='3-D')
+    with pytest.raises(ValueError, match='XZ plane'):
+        native.NativeModel(model)
+
+    model = coupled_model()
+    link_df = model.props.link_df.copy()
+    link_df['dof'] = [[True, False, False, False, False, True]] * len(link_df)
+    model.props.link_df = link_df
+    with pytest.raises(ValueError, match='R3'):
+        native.NativeModel(model)
+
+    with pytest.raises(ValueError, match='PUSHOVER'):
+        native.run(coupled_model(), anal_type='PUSHOVER')
+
+
+def step_response(omega, damping, time, ag):
+    # closed-form displacement of an SDOF starting at rest under a constant ground acceleration ag
+    omega_d = omega * np.sqrt(1 - damping ** 2)
+    decay = np.exp(-damping * omega * time)
+    free = decay * (np.cos(omega_d * time) + damping / np.sqrt(1 - damping ** 2) * np.sin(omega_d * time))
+    return -ag / omega ** 2 * (1 - free)
+
+
+@pytest.mark.parametrize('damping', [0.0, 0.05])
+def test_newmark_follows_the_closed_form_sdof_response(damping):
+    omega, dt = 2 * np.pi, 0.001
+    ag = np.full(3001, 9.81)
+    time = dt * np.arange(ag.size)
+
+    res = native.newmark([1.0], [[omega ** 2]], [[2 * damping * omega]], ag, dt, history=True)
+    exact = step_response(omega, damping, time, 9.81)
+
+    assert np.allclose(res['displ_history'][:, 0], exact, rtol=0, atol=1e-4 * np.abs(exact).max())
+    assert np.isclose(res['displ'][0], np.abs(exact).max(), rtol=1e-4)
+
+
+def test_linear_dampers_match_the_viscous_run():
+    m = np.array([2.0, 1.0])
+    k = np.array([[300.0, -100.0], [-100.0, 100.0]])
+    d = np.array([[1.0, -1.0]])
+    cd, dt = 5.0, 0.005
+    ag = np.sin(np.linspace(0, 20, 2001)) * np.linspace(1, 0, 2001)
+
+    linear = native.newmark(m, k, cd * d.T @ d, ag, dt, history=True)
+    dampers = native.newmark_dampers(m, k, np.zeros((2, 2)), ag, dt, d, [cd], [1.0], history=True)
+
+    for name in ('displ', 'displ_history', 'veloc_history', 'accel_history'):
+        assert np.allclose(dampers[name], linear[name], rtol=1e-8, atol=1e-12)
+    force = cd * linear['veloc_history'] @ d.T
+    assert np.allclose(dampers['damper_force'], np.abs(force).max(axis=0), rtol=1e-8)
+
+
+def test_expm_matches_the_eigendecomposition():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(3, 4, 4))
+    values = rng.normal(scale=[[0.1], [3.0], [40.0]], size=(3, 4))
+    a = vectors @ (values[..., np.newaxis] * np.linalg.inv(vectors))
+
+    exact = vectors @ (np.exp(values)[..., np.newaxis] * np.linalg.inv(vectors))
+
+    assert np.allclose(native.expm(a), exact, rtol=1e-9, atol=1e-9 * np.abs(exact).max())
+
+
+def test_state_space_matches_newmark_at_small_dt():
+    m = np.array([2.0, 1.0])
+    k = np.array([[300.0, -100.0], [-100.0, 100.0]])
+    c = 0.02 * k
+    dt = 0.001
+    ag = np.sin(np.linspace(0, 20, 10001)) * np.linspace(1, 0, 10001)
+
+    exact = native.state_space(m, k, c, ag, dt, history=True)
+    approx = native.newmark(m, k, c, ag, dt, history=True)
+
+    assert np.allclose(exact['displ'], approx['displ'], rtol=1e-4)
+    assert np.allclose(exact['displ_history'], approx['displ_history'], atol=1e-4 * np.abs(exact['displ']).max())
+
+
+def test_state_space_is_exact_for_a_constant_ground_acceleration():
+    omega, damping, dt = 2 * np.pi, 0.05, 0.05
+    ag = np.full(61, 9.81)
+
+    res = native.state_space([1.0], [[omega ** 2]], [[2 * damping * omega]], ag, dt, history=True)
+
+    assert np.allclose(res['displ_history'][:, 0], step_response(omega, damping, dt * np.arange(61), 9.81),
+                       rtol=1e-10, atol=1e-12)
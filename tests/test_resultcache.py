@@ -0,0 +1,25 @@
+import os
+import textmodel
+import resultcache
+
+
+def test_key_depends_on_the_extractor(tmp_path):
+    cache = resultcache.ResultCache(str(tmp_path), backend='v')
+    model = textmodel.new_recorder()
+    model.geometry.gen_frm(no_frames=1, no_stories=2)
+
+    assert (cache.key(model.sap_obj, 'RSA', 'sweep.extract_point') !=
+            cache.key(model.sap_obj, 'RSA', 'suite.extract_point'))
+
+
+def test_put_evicts_oldest_entries_down_to_low_bytes(tmp_path):
+    cache = resultcache.ResultCache(str(tmp_path), max_bytes=1000, low_bytes=500)
+
+    for i in range(30):
+        cache.put('key{}'.format(i), 'x' * 98)
+        os.utime(cache.file_name('key{}'.format(i)), (i, i))
+
+    sizes = [entry[1] for entry in cache.entries()]
+    assert cache.size == sum(sizes) <= 1000
+    assert cache.get('key29') == 'x' * 98
+    assert cache.get('key0') is None
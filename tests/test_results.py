@@ -0,0 +1,63 @@
+import sap2000
+import results
+
+
+class StubResults:
+
+    def __init__(self):
+        self.calls = []
+        self.Setup = self
+
+    def DeselectAllCasesAndCombosForOutput(self):
+        self.calls.append('deselect')
+        return 0
+
+    def SetCaseSelectedForOutput(self, case, selected=True):
+        self.calls.append(('select', case))
+        return 0
+
+    def ModalPeriod(self, *args):
+        self.calls.append('ModalPeriod')
+        return [3, ['MODAL', 'MODAL', 'RSA'], ['Mode'] * 3, [1.0, 2.0, 1.0], [0.5, 0.2, 9.0], [2.0, 5.0, 0.1],
+                [12.6, 31.4, 0.6], [158.0, 987.0, 0.4], 0]
+
+    def JointReact(self, name, item_type, number_results, *columns):
+        self.calls.append((name, item_type))
+        return [1, ['1'], ['1'], ['RSA'], ['Max'], [0.0], [2.0], [0.0], [0.0], [0.0], [0.0], [0.0], 0]
+
+
+class StubSapObj:
+
+    def __init__(self):
+        self.Results = StubResults()
+
+
+def test_fetch_passes_group_element_item_type():
+    sap_obj = StubSapObj()
+
+    df = results.fetch(sap_obj, 'JointReact', 'BASE')
+
+    # eItemTypeElm.GroupElm, eItemType.Group (1) would ask for an element named BASE
+    assert sap_obj.Results.calls == [('BASE', 2)]
+    assert sap_obj.Results.calls[0][1] == sap2000.EITEM_TYPE_ELM['GroupElm']
+    assert df['F1'].tolist() == [2.0]
+
+
+def test_fetch_passes_object_element_item_type():
+    sap_obj = StubSapObj()
+
+    results.fetch(sap_obj, 'JointReact', '1', item_type='ObjectElm')
+
+    assert sap_obj.Results.calls == [('1', 0)]
+
+
+def test_modal_period_is_one_call_after_other_results():
+    sap_obj = StubSapObj()
+    res = results.Results(sap_obj)
+
+    res.joint_react('BASE', 'RSA')
+    del sap_obj.Results.calls[:]
+
+    # the modal case was selected along with RSA, only rows of the modal case are kept
+    assert res.modal_period()['period'].tolist() == [0.5, 0.2]
+    assert sap_obj.Results.calls == ['ModalPeriod']
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import sweep
+import simulator
+from modelclasses import Model
+
+
+def run_point(tmp_path, flag, bulk):
+    sap_object, sap_model = simulator.open_instance()
+    model_obj = Model(sap_model)
+    model_obj.new()
+    row = sweep.run_point(model_obj, str(tmp_path), *sweep.sweep_point(50000.0, 25000.0, flag), bulk=bulk)
+    simulator.close_instance(sap_object)
+    return row
+
+
+@pytest.mark.parametrize('flag', [1, 2])
+def test_bulk_point_opened_from_text_matches_the_point_built_call_by_call(tmp_path, flag):
+    row = run_point(tmp_path, flag, bulk=False)
+    bulk_row = run_point(tmp_path, flag, bulk=True)
+
+    # the text file keeps 10 significant digits
+    assert [value is None for value in bulk_row] == [value is None for value in row]
+    assert np.allclose([value for value in bulk_row if value is not None],
+                       [value for value in row if value is not None], rtol=1e-8)
+
+
+def test_cases_with_more_than_one_load_raise_value_error():
+    sap_object, sap_model = simulator.open_instance()
+    model_obj = Model(sap_model)
+    model_obj.new()
+    sweep.build_point(model_obj, 50000.0, 25000.0, 1)
+
+    sap_model.LoadCases.ResponseSpectrum.SetLoads('RSA', 2, ['U1', 'U3'], ['custom_rsa'] * 2, [1, 1],
+                                                  ['GLOBAL'] * 2, [0, 0])
+    with pytest.raises(ValueError, match='RSA'):
+        sap_model.Analyze.RunAnalysis()
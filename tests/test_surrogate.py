@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import surrogate
+
+
+def stored_sweep():
+    k1, kp = np.meshgrid(np.linspace(1e4, 1e5, 6), np.linspace(1e4, 1e5, 6))
+    out_df = pd.DataFrame({'k1': k1.ravel(), 'k2': 5e4, 'kp': kp.ravel(), 'm1': 1.0, 'm2': 1.0, 'no_frames': 2})
+    out_df['user_T'] = 2 * np.pi * np.sqrt(out_df['m1'] / out_df['k1'])
+    out_df['max_u1_frm1'] = 1e3 / (out_df['k1'] + 0.5 * out_df['kp'])
+    return out_df
+
+
+def test_predict_matches_stored_points_and_grows_the_error_with_distance():
+    out_df = stored_sweep()
+    model = surrogate.Surrogate(out_df, outputs=['max_u1_frm1', 'user_T'])
+
+    values, error = model.predict(out_df)
+    assert np.allclose(values, out_df[['max_u1_frm1', 'user_T']].to_numpy(), rtol=1e-9)
+    assert np.allclose(error, 0, atol=1e-6)
+
+    # a quarter and half way to the next stored k1
+    query = pd.DataFrame({'k1': [50500.0, 55000.0], 'kp': [28000.0, 28000.0]})
+    values, error = model.predict(query)
+    assert (error[0] < error[1]).all()
+    assert np.allclose(values[:, 1], 2 * np.pi * np.sqrt(1 / query['k1']), rtol=1e-2)
@@ -0,0 +1,24 @@
+import os
+import sweep
+import simulator
+
+
+def dying_run_point(model_obj, model_path, file_name, *point, **options):
+    # the process of the first worker to run a point dies halfway through it
+    marker = os.path.join(os.path.dirname(model_path), 'died')
+    if file_name.endswith('frm-2') and not os.path.exists(marker):
+        open(marker, 'w').close()
+        model_obj.new()
+        os._exit(1)
+
+    return sweep.run_point(model_obj, model_path, file_name, *point, **options)
+
+
+def test_run_parallel_requeues_the_point_of_a_dead_worker(tmp_path):
+    points = [sweep.sweep_point(50000.0, kp, flag) for kp in (25000.0, 50000.0) for flag in (1, 2)]
+
+    out_df = sweep.run_parallel(points, str(tmp_path), n_workers=2, open_function=simulator.open_instance,
+                                close_function=simulator.close_instance, poll=0.1, run_function=dying_run_point)
+
+    assert os.path.exists(os.path.join(str(tmp_path), 'died'))
+    assert list(out_df.index) == [point[0] for point in points]
@@ -0,0 +1,72 @@
+import os
+import sweep
+import textmodel
+
+
+def test_export_keeps_the_dots_of_point_names(tmp_path):
+    recorder = textmodel.new_recorder()
+    sweep.build_point(recorder, 50000.0, 25000.0, 2)
+
+    names = [textmodel.export(recorder, str(tmp_path), file_name)
+             for file_name in ('k1-50.0_kp-25.0_frm-1', 'k1-50.0_kp-25.0_frm-2', 'TestModel-001.sdb')]
+
+    assert [os.path.basename(name) for name in names] == [
+        'k1-50.0_kp-25.0_frm-1.$2k', 'k1-50.0_kp-25.0_frm-2.$2k', 'TestModel-001.$2k']
+
+
+GOLDEN = '''TABLE:  "LINK PROPERTY DEFINITIONS 02 - LINEAR"
+   Link=Default   DOF=U1   Fixed=No   TransKE=25000   TransCE=0
+ 
+TABLE:  "JOINT COORDINATES"
+   Joint=1   CoordSys=GLOBAL   CoordType=Cartesian   XorR=0   Y=0   Z=0
+   Joint=2   CoordSys=GLOBAL   CoordType=Cartesian   XorR=0   Y=0   Z=240
+   Joint=3   CoordSys=GLOBAL   CoordType=Cartesian   XorR=240   Y=0   Z=0
+   Joint=4   CoordSys=GLOBAL   CoordType=Cartesian   XorR=240   Y=0   Z=240
+   Joint=5   CoordSys=GLOBAL   CoordType=Cartesian   XorR=480   Y=0   Z=0
+   Joint=6   CoordSys=GLOBAL   CoordType=Cartesian   XorR=480   Y=0   Z=240
+   Joint=7   CoordSys=GLOBAL   CoordType=Cartesian   XorR=720   Y=0   Z=0
+   Joint=8   CoordSys=GLOBAL   CoordType=Cartesian   XorR=720   Y=0   Z=240
+ 
+TABLE:  "JOINT RESTRAINT ASSIGNMENTS"
+   Joint=1   U1=Yes   U2=Yes   U3=Yes   R1=Yes   R2=Yes   R3=Yes
+   Joint=3   U1=Yes   U2=Yes   U3=Yes   R1=Yes   R2=Yes   R3=Yes
+   Joint=5   U1=Yes   U2=Yes   U3=Yes   R1=Yes   R2=Yes   R3=Yes
+   Joint=7   U1=Yes   U2=Yes   U3=Yes   R1=Yes   R2=Yes   R3=Yes
+ 
+TABLE:  "CONNECTIVITY - FRAME"
+   Frame=frm1_st1_col1   JointI=1   JointJ=2   IsCurved=No
+   Frame=frm1_st1_col2   JointI=3   JointJ=4   IsCurved=No
+   Frame=frm1_st1_bm1   JointI=2   JointJ=4   IsCurved=No
+   Frame=frm2_st1_col1   JointI=5   JointJ=6   IsCurved=No
+   Frame=frm2_st1_col2   JointI=7   JointJ=8   IsCurved=No
+   Frame=frm2_st1_bm1   JointI=6   JointJ=8   IsCurved=No
+ 
+TABLE:  "FRAME SECTION ASSIGNMENTS"
+   Frame=frm1_st1_col1   SectionType=Rectangular   AutoSelect=N.A.   AnalSect=F1_RECT_COL1   MatProp=Default
+   Frame=frm1_st1_col2   SectionType=Rectangular   AutoSelect=N.A.   AnalSect=F1_RECT_COL1   MatProp=Default
+   Frame=frm1_st1_bm1   SectionType=Rectangular   AutoSelect=N.A.   AnalSect=F1_RECT_BM1   MatProp=Default
+   Frame=frm2_st1_col1   SectionType=Rectangular   AutoSelect=N.A.   AnalSect=F2_RECT_COL1   MatProp=Default
+   Frame=frm2_st1_col2   SectionType=Rectangular   AutoSelect=N.A.   AnalSect=F2_RECT_COL1   MatProp=Default
+   Frame=frm2_st1_bm1   SectionType=Rectangular   AutoSelect=N.A.   AnalSect=F2_RECT_BM1   MatProp=Default
+ 
+TABLE:  "FRAME ADDED MASS ASSIGNMENTS"
+   Frame=frm1_st1_bm1   MassPerLen=1.348999531
+   Frame=frm2_st1_bm1   MassPerLen=1.348999531
+ 
+TABLE:  "CONNECTIVITY - LINK"
+   Link=Default   JointI=4   JointJ=6
+ 
+TABLE:  "LINK PROPERTY ASSIGNMENTS"
+   Link=Default   LinkType=Linear   LinkJoints=TwoJoint   LinkProp=Default
+ '''
+
+
+def test_geometry_tables_of_a_coupled_point(tmp_path):
+    recorder = textmodel.new_recorder()
+    sweep.build_point(recorder, 50000.0, 25000.0, 2)
+
+    with open(textmodel.write(recorder.sap_obj, str(tmp_path / 'point.$2k'))) as f:
+        text = f.read()
+
+    assert text.startswith('TABLE:  "PROGRAM CONTROL"\n') and text.endswith('END TABLE DATA\n')
+    assert GOLDEN in text
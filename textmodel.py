@@ -0,0 +1,197 @@
+import os
+import numpy as np
+import sap2000
+import native
+import simulator
+from modelclasses import Model
+
+# %% SAP2000 TEXT MODEL (.$2k) FILES
+# a Model is built against a simulator.SapModel recorder, written as one text model, and opened in SAP2000 with a
+# single File.OpenFile call instead of one COM call per table row
+# every table is written in lb_in_F
+
+FILE_UNITS = sap2000.UNITS['lb_in_F']
+
+# periods at which spectra without user points (e.g. IBC2012) are tabulated
+EXPORT_PERIODS = np.unique(np.concatenate([np.arange(0, 1, 0.01), np.arange(1, 4, 0.05), np.arange(4, 10.5, 0.5)]))
+
+DOF_NAMES = ['U1', 'U2', 'U3', 'R1', 'R2', 'R3']
+
+
+def new_recorder():
+    # Model whose load_* calls are recorded in memory instead of sent to SAP2000
+    recorder = Model(simulator.SapModel())
+    recorder.new()
+    return recorder
+
+
+def fmt(value):
+    if isinstance(value, (bool, np.bool_)):
+        return 'Yes' if value else 'No'
+    if isinstance(value, str):
+        return '"{}"'.format(value) if (' ' in value or not value) else value
+    return '{:.10G}'.format(float(value))
+
+
+def table(name, rows):
+    lines = ['TABLE:  "{}"'.format(name)]
+    for row in rows:
+        lines.append('   ' + '   '.join('{}={}'.format(key, fmt(value)) for key, value in row.items()))
+    lines.append(' ')
+    return lines
+
+
+def tables(sap_model):
+    # list of text lines for every table of a recorded simulator.SapModel
+
+    model = sap_model.model
+    props = model.props
+    frm_df = model.geometry.frm_df
+    frames = frm_df.loc[frm_df['frm_type'] != 'link']
+    links = frm_df.loc[frm_df['frm_type'] == 'link']
+    geo_length = native.LENGTH_IN[native.GEOMETRY_UNITS]
+
+    lines = table('PROGRAM CONTROL', [{'ProgramName': 'SAP2000', 'Version': '25.0.0', 'CurrUnits': 'Lb, in, F'}])
+
+    dof = next(iter(props.mdl_dof_df.values.tolist()), [True] * 6)
+    lines += table('ACTIVE DEGREES OF FREEDOM',
+                   [dict((name, bool(flag)) for name, flag in zip(['UX', 'UY', 'UZ', 'RX', 'RY', 'RZ'], dof))])
+
+    # materials and sections
+    lines += table('MATERIAL PROPERTIES 01 - GENERAL', [
+        {'Material': row['material'], 'Type': sap2000.EMATERIAL_TYPES[row['material_id']].split('_')[-1].title(),
+         'SymType': 'Isotropic', 'TempDepend': False} for index, row in props.mat_df.iterrows()])
+
+    lines += table('MATERIAL PROPERTIES 02 - BASIC MECHANICAL PROPERTIES', [
+        {'Material': row['material'], 'UnitWeight': row['weight'],
+         'UnitMass': row['weight'] / (sap2000.GRAVITY * 12), 'E1': row['youngs'],
+         'G12': row['youngs'] / (2 * (1 + row['poisson'])), 'U12': row['poisson'], 'A1': row['t_coeff']}
+        for index, row in props.mat_df.iterrows()])
+
+    sections = []
+    for index, row in props.frm_df.drop_duplicates('name', keep='last').iterrows():
+        t3, t2 = row['depth'], row['width']
+        sections.append({'SectionName': row['name'], 'Material': row['material'], 'Shape': 'Rectangular',
+                         't3': t3, 't2': t2, 'Area': t3 * t2, 'I33': t2 * t3 ** 3 / 12, 'I22': t3 * t2 ** 3 / 12,
+                         'AS2': 5 / 6 * t3 * t2, 'AS3': 5 / 6 * t3 * t2})
+    lines += table('FRAME SECTION PROPERTIES 01 - GENERAL', sections)
+
+    link_props = props.link_df.drop_duplicates('name', keep='last')
+    lines += table('LINK PROPERTY DEFINITIONS 01 - GENERAL', [
+        {'Link': row['name'], 'LinkType': 'Linear', 'Mass': row['m'], 'Weight': row['w'],
+         'RotInert1': row['R1'], 'RotInert2': row['R2'], 'RotInert3': row['R3'], 'DefLength': 1, 'DefArea': 1}
+        for index, row in link_props.iterrows()])
+
+    linear = []
+    for index, row in link_props.iterrows():
+        for i, name in enumerate(DOF_NAMES):
+            if row['dof'][i]:
+                kind = 'Trans' if i < 3 else 'Rot'
+                linear.append({'Link': row['name'], 'DOF': name, 'Fixed': bool(row['fixed'][i]),
+                               kind + 'KE': row['ke'][i], kind + 'CE': row['ce'][i]})
+    lines += table('LINK PROPERTY DEFINITIONS 02 - LINEAR', linear)
+
+    # joints, frames, and links
+    lines += table('JOINT COORDINATES', [
+        {'Joint': name, 'CoordSys': 'GLOBAL', 'CoordType': 'Cartesian', 'XorR': x * geo_length,
+         'Y': y * geo_length, 'Z': z * geo_length} for name, (x, y, z) in sap_model.points.items()])
+
+    restraints = {}
+    for index, row in frames.iterrows():
+        for end in ('i', 'j'):
+            if isinstance(row[end + '_restraint'], list):
+                restraints[row['frm_' + end]] = row[end + '_restraint']
+    lines += table('JOINT RESTRAINT ASSIGNMENTS', [
+        dict([('Joint', name)] + [(dof_name, bool(flag)) for dof_name, flag in zip(DOF_NAMES, value)])
+        for name, value in restraints.items()])
+
+    lines += table('CONNECTIVITY - FRAME', [
+        {'Frame': row['user_name'], 'JointI': row['frm_i'], 'JointJ': row['frm_j'], 'IsCurved': False}
+        for index, row in frames.iterrows()])
+
+    lines += table('FRAME SECTION ASSIGNMENTS', [
+        {'Frame': row['user_name'], 'SectionType': 'Rectangular', 'AutoSelect': 'N.A.',
+         'AnalSect': row['prop_name'], 'MatProp': 'Default'} for index, row in frames.iterrows()])
+
+    lines += table('FRAME ADDED MASS ASSIGNMENTS', [
+        {'Frame': row['user_name'], 'MassPerLen': row['mass'] / geo_length ** 2}
+        for index, row in frames.iterrows() if row['mass'] == row['mass'] and row['mass'] != 0])
+
+    lines += table('CONNECTIVITY - LINK', [
+        {'Link': row['user_name'], 'JointI': row['frm_i'], 'JointJ': row['frm_j']}
+        for index, row in links.iterrows()])
+
+    lines += table('LINK PROPERTY ASSIGNMENTS', [
+        {'Link': row['user_name'], 'LinkType': 'Linear', 'LinkJoints': 'TwoJoint', 'LinkProp': row['prop_name']}
+        for index, row in links.iterrows()])
+
+    kinds = [('joint', 'Joint'), ('frame', 'Frame'), ('link', 'Link')]
+    lines += table('GROUPS 1 - DEFINITIONS', [{'GroupName': name, 'Selection': True, 'SectionCut': True}
+                                              for name in sap_model.groups])
+    lines += table('GROUPS 2 - ASSIGNMENTS', [{'GroupName': name, 'ObjectType': label, 'ObjectLabel': item}
+                                              for name, group in sap_model.groups.items()
+                                              for kind, label in kinds for item in group[kind]])
+
+    # functions
+    spectra = []
+    for name, spectrum in sap_model.rs_funcs.items():
+        periods, values = sap_model.rs_points.get(name, (EXPORT_PERIODS, spectrum(EXPORT_PERIODS)))
+        spectra += [{'Name': name, 'Period': period, 'Accel': value, 'FuncDamp': sap_model.rs_damp[name]}
+                    for period, value in zip(periods, values)]
+    lines += table('FUNCTION - RESPONSE SPECTRUM - USER', spectra)
+
+    histories = []
+    for name, (times, values) in sap_model.th_funcs.items():
+        histories += [{'Name': name, 'Time': time, 'Value': value} for time, value in zip(times, values)]
+    lines += table('FUNCTION - TIME HISTORY - USER', histories)
+
+    # load cases
+    case_types = {'RSA': 'LinRespSpec', 'TIME_HISTORY': 'LinModHist'}
+    lines += table('LOAD CASE DEFINITIONS', [
+        {'Case': 'MODAL', 'Type': 'LinModal', 'InitialCond': 'Zero', 'RunCase': sap_model.run_flags.get('MODAL', True)}
+    ] + [{'Case': name, 'Type': case_types[case['case_type']], 'InitialCond': 'Zero',
+          'ModalCase': case['modal_case'], 'RunCase': sap_model.run_flags.get(name, True)}
+         for name, case in sap_model.cases.items()])
+
+    lines += table('MODAL CASES 1 - GENERAL', [{'Case': 'MODAL', 'ModeType': 'Eigen', 'MaxNumModes': 12,
+                                                'MinNumModes': 1}])
+
+    rsa = dict((name, case) for name, case in sap_model.cases.items() if case['case_type'] == 'RSA')
+    lines += table('CASE - RESPONSE SPECTRUM 1 - GENERAL', [
+        {'Case': name, 'ModalCombo': 'CQC', 'DirCombo': 'SRSS', 'DampingType': 'Constant',
+         'ConstDamp': case['damp']} for name, case in rsa.items()])
+    lines += table('CASE - RESPONSE SPECTRUM 2 - LOAD ASSIGNMENTS', [
+        {'Case': name, 'LoadName': load[0], 'CoordSys': 'GLOBAL', 'Function': load[1], 'Angle': 0,
+         'TransAccSF': load[2] * native.LENGTH_IN[load[3]]} for name, case in rsa.items() for load in case['loads']])
+
+    th = dict((name, case) for name, case in sap_model.cases.items() if case['case_type'] == 'TIME_HISTORY')
+    lines += table('CASE - MODAL HISTORY 1 - GENERAL', [
+        {'Case': name, 'OutSteps': case['n_steps'], 'StepSize': case['dt'], 'DampingType': 'Constant',
+         'ConstDamp': case['damp'], 'MotionType': 'Transient'} for name, case in th.items()])
+    lines += table('CASE - MODAL HISTORY 2 - LOAD ASSIGNMENTS', [
+        {'Case': name, 'LoadType': 'Accel', 'LoadName': load[0], 'Function': load[1], 'CoordSys': 'GLOBAL',
+         'Angle': 0, 'TransAccSF': load[2] * native.LENGTH_IN[load[3]], 'TimeFactor': load[4],
+         'ArrivalTime': load[5]} for name, case in th.items() for load in case['loads']])
+
+    return lines + ['END TABLE DATA']
+
+
+def write(sap_model, file_name):
+    with open(file_name, 'w') as f:
+        f.write('\n'.join(tables(sap_model)) + '\n')
+    return file_name
+
+
+def load(sap_obj, file_name):
+    # open the text model in SAP2000 with one call, present units follow the file
+    ret = sap_obj.File.OpenFile(file_name)
+    sap_obj.SetPresentUnits(FILE_UNITS)
+    return ret
+
+
+def export(recorder, model_path, file_name):
+    # write a recorder Model next to the .sdb file_name would be saved as
+    # only .sdb is cut off, point names like 'k1-50.0_kp-25.0_frm-2' hold dots of their own
+    if file_name.lower().endswith('.sdb'):
+        file_name = file_name[:-len('.sdb')]
+    return write(recorder.sap_obj, os.path.join(model_path, file_name + '.$2k'))